@@ -1,7 +1,8 @@
 from .extracthero import ExtractHero
 from .parsehero import ParseHero
 from .filterhero import FilterHero
-from .schemas import WhatToRetain, ExtractOp, ParseOp, FilterOp,  FilterChainOp
+from .pipeline import ExtractPipeline
+from .schemas import WhatToRetain, FrozenWhatToRetain, ExtractOp, ParseOp, FilterOp,  FilterChainOp
 from .utils import load_html, read_md
 
 __version__ = "0.1.5.5"
@@ -0,0 +1,289 @@
+# extracthero/cache.py
+"""
+Content-addressed response cache for MyLLMService.
+
+Keys are a sha256 of (operation, model, response schema, rendered prompts),
+so re-running the same pages and specs is served locally, while any change
+to a prompt template, spec or model misses naturally. Only successful raw
+provider results are stored; each prompt method still post-processes the
+cached result exactly as it would a live one.
+
+• ResponseCache    — the interface MyLLMService talks to; subclass it to plug
+  in another backend.
+• InMemoryLRUCache — process-local tier with size-based LRU eviction.
+• SqliteCache      — disk tier shared by every process on a node (WAL-mode
+  SQLite, TTL expiry, LRU trimming to a byte budget).
+• InMemoryReductionCache / SqliteReductionCache — HtmlReducer outputs keyed
+  by the canonical HTML fingerprint, used by ExtractHero(reduction_cache=...).
+
+The disk tiers store their rows in extracthero.sqlite_store.SqliteStore.
+"""
+
+from __future__ import annotations
+
+import abc
+import copy
+import dataclasses
+import hashlib
+import json
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from llmservice.generation_engine import GenerationRequest, GenerationResult
+
+from extracthero.coalescing import request_fingerprint
+from extracthero.fingerprints import html_fingerprint
+from extracthero.sqlite_store import SqliteStore
+
+
+def cache_key(generation_request: GenerationRequest, operation_name: str) -> str:
+    """Cache key of a request issued under ``operation_name``."""
+    digest = hashlib.sha256(operation_name.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(request_fingerprint(generation_request).encode("ascii"))
+    return digest.hexdigest()
+
+
+# GenerationResult fields worth caching; the request, the formatted prompt
+# (often the whole corpus), the raw provider response and per-call timing
+# are dropped.
+_PERSISTED_FIELDS = ("success", "trace_id", "content", "raw_content", "operation_name",
+                     "usage", "error_message", "model", "response_type", "response_id")
+
+
+def cacheable_record(result: GenerationResult) -> Dict[str, Any]:
+    """The persisted fields of ``result``, with its own copy of usage."""
+    record = {name: getattr(result, name) for name in _PERSISTED_FIELDS}
+    record["usage"] = dict(result.usage or {})
+    return record
+
+
+def _value_bytes(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", "surrogatepass"))
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+def estimate_result_bytes(result: GenerationResult) -> int:
+    """Approximate memory held by a cached (stripped) result."""
+    size = sum(_value_bytes(getattr(result, name)) for name in ("content", "raw_content", "error_message"))
+    return size + 512  # remaining fields, usage dict, key
+
+
+class ResponseCache(abc.ABC):
+    """
+    Interface of a response cache. ``get`` returns a result the caller may
+    mutate (or None); ``put`` must not keep a reference the caller can mutate.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[GenerationResult]:
+        ...
+
+    @abc.abstractmethod
+    def put(self, key: str, result: GenerationResult) -> None:
+        ...
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class _ByteBoundedLRU:
+    """
+    Thread-safe LRU map bounded by the approximate size of its values.
+
+    ``get`` returns a shallow copy; subclasses compute each value's size and
+    store it with ``_store``. Values larger than ``max_bytes`` are not kept.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.copy(entry[0])
+
+    def _store(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class InMemoryLRUCache(_ByteBoundedLRU, ResponseCache):
+    """
+    Thread-safe LRU cache bounded by the approximate size of stored results.
+
+    Parameters
+    ----------
+    max_bytes : int, default 64 MiB
+        Entries are evicted least-recently-used first once the total exceeds this.
+    """
+
+    def put(self, key: str, result: GenerationResult) -> None:
+        stored = GenerationResult(**cacheable_record(result))
+        self._store(key, stored, estimate_result_bytes(stored))
+
+
+# ─────────────────────────── disk tier ───────────────────────────
+
+
+class SqliteCache(ResponseCache):
+    """
+    Disk-backed ResponseCache shared by all worker processes on a node.
+
+    Parameters are those of SqliteStore; results are stored as JSON, so a
+    result whose content isn't JSON-serialisable is simply not cached.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        table: str = "llm_responses",
+    ):
+        self.store = SqliteStore(path, table=table, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[GenerationResult]:
+        data = self.store.get_bytes(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return GenerationResult(**json.loads(data))
+
+    def put(self, key: str, result: GenerationResult) -> None:
+        try:
+            data = json.dumps(cacheable_record(result)).encode("utf-8")
+        except (TypeError, ValueError):
+            return
+        self.store.put_bytes(key, data)
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "hits": self.hits, "misses": self.misses}
+
+
+def reduction_cache_key(html: str) -> str:
+    """
+    Cache key of an HtmlReducer input: the canonical fingerprint, so pages
+    differing only in nonces, tokens or tracking params share an entry.
+    """
+    return html_fingerprint(html)
+
+
+class InMemoryReductionCache(_ByteBoundedLRU):
+    """
+    Process-local LRU cache of ReduceOperations, bounded by the size of their
+    raw and reduced HTML.
+    """
+
+    def put(self, key: str, reduce_op: Any) -> None:
+        size = sum(
+            len(value) for value in (getattr(reduce_op, "raw_data", None), getattr(reduce_op, "reduced_data", None))
+            if isinstance(value, str)
+        ) + 512
+        self._store(key, copy.copy(reduce_op), size)
+
+
+class SqliteReductionCache:
+    """
+    Disk-backed cache of HtmlReducer ReduceOperations for ExtractHero.
+
+    Values are pickled; only point it at a database written by your own workers.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        table: str = "html_reductions",
+    ):
+        self.store = SqliteStore(path, table=table, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self.store.get_bytes(key)
+        if data is None:
+            self.misses += 1
+            return None
+        try:
+            op = pickle.loads(data)
+        except Exception:
+            # Written by an incompatible domreducer version
+            self.misses += 1
+            return None
+        self.hits += 1
+        return op
+
+    def put(self, key: str, reduce_op: Any) -> None:
+        if dataclasses.is_dataclass(reduce_op) and not getattr(reduce_op, "success", True):
+            return
+        self.store.put_bytes(key, pickle.dumps(reduce_op, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,61 @@
+# extracthero/chain_cache.py
+"""
+Prefix cache for FilterHero.chain.
+
+• chain_prefix_keys — one key per chain stage, hashing the chain input and
+  the stages up to and including it.
+• ChainPrefixCache  — FilterOps of chain stages under those keys, used by
+  FilterHero(chain_cache=...), so chains sharing leading stages on the same
+  input reuse them.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from typing import Any
+
+from llmservice.generation_engine import GenerationResult
+
+from extracthero.cache import _ByteBoundedLRU, cacheable_record, estimate_result_bytes
+from extracthero.schemas import spec_list_fingerprint
+
+
+def chain_prefix_keys(text: Any, stages: Any) -> list:
+    """
+    One key per chain stage: stage ``i``'s key hashes the chain input and
+    the spec fingerprints and strategies of stages ``0..i``, so chains that
+    start with the same stages on the same input share their leading keys.
+    """
+    if isinstance(text, str):
+        data = text
+    else:
+        data = json.dumps(text, sort_keys=True, default=str)
+    digest = hashlib.sha256(data.encode("utf-8", "surrogatepass"))
+    keys = []
+    for extraction_spec, filter_strategy in stages:
+        digest.update(b"\x00")
+        digest.update(spec_list_fingerprint(extraction_spec).encode("ascii"))
+        digest.update(b"\x00")
+        digest.update((filter_strategy or "").encode("utf-8", "surrogatepass"))
+        keys.append(digest.copy().hexdigest())
+    return keys
+
+
+class ChainPrefixCache(_ByteBoundedLRU):
+    """
+    Process-local LRU of successful chain-stage FilterOps, bounded by the
+    size of their content and stripped generation result.
+    """
+
+    def put(self, key: str, filter_op: Any) -> None:
+        if not getattr(filter_op, "success", False):
+            return
+        stored = copy.copy(filter_op)
+        size = len(str(filter_op.content or "")) + 512
+        if isinstance(filter_op.generation_result, GenerationResult):
+            # Drop the formatted prompt (the stage input) and raw response
+            stored.generation_result = GenerationResult(**cacheable_record(filter_op.generation_result))
+            size += estimate_result_bytes(stored.generation_result)
+        self._store(key, stored, size)
@@ -0,0 +1,170 @@
+# extracthero/coalescing.py
+"""
+Single-flight coalescing for MyLLMService.
+
+Concurrent GenerationRequests with the same model, prompts and response
+schema share one provider call: the first caller (the leader) executes it
+and every caller that arrives while it is in flight waits for that result.
+Sync and async callers — from any thread or event loop — can share a flight.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from llmservice.generation_engine import GenerationRequest, GenerationResult
+
+
+def schema_name(schema: Any) -> str:
+    """Stable name of a response schema (pydantic class, dict or None)."""
+    if schema is None:
+        return ""
+    if isinstance(schema, type):
+        return f"{schema.__module__}.{schema.__qualname__}"
+    return repr(schema)
+
+
+def request_fingerprint(generation_request: GenerationRequest) -> str:
+    """Hash of everything that determines the provider's answer to a request."""
+    digest = hashlib.sha256()
+    for part in (
+        generation_request.model or "",
+        schema_name(generation_request.response_schema),
+        generation_request.system_prompt or "",
+        generation_request.user_prompt or "",
+    ):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def shared_copy(result: GenerationResult, counter: str = "coalesced_requests") -> GenerationResult:
+    """
+    Copy of a result served without a provider call (coalesced or cached).
+
+    The provider was only billed once, so the copy's usage reports zero
+    tokens and cost plus ``counter: 1``; summing usage across a batch then
+    gives the real spend.
+    """
+    follower = copy.copy(result)
+    usage = {
+        key: (0 if isinstance(value, (int, float)) and not isinstance(value, bool) else value)
+        for key, value in (result.usage or {}).items()
+    }
+    usage[counter] = 1
+    follower.usage = usage
+    return follower
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error", "waiters", "loop")
+
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # set when the leader is async
+        self.event = threading.Event()
+        self.result: Optional[GenerationResult] = None
+        self.error: Optional[BaseException] = None
+        self.waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class SingleFlight:
+    """Registry of in-flight requests keyed by request_fingerprint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def _join(self, key: str) -> Tuple[_Flight, bool]:
+        """Return (flight, is_leader)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _finish(self, key: str, flight: _Flight, result=None, error=None) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+            # Snapshot before the leader's caller post-processes (and mutates) its result
+            flight.result = copy.copy(result) if result is not None else None
+            flight.error = error
+            waiters, flight.waiters = flight.waiters, []
+            flight.event.set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def _follower_result(self, flight: _Flight) -> Optional[GenerationResult]:
+        """Shared result, or None when the leader was cancelled and the follower must retry."""
+        if flight.error is None:
+            return shared_copy(flight.result)
+        if isinstance(flight.error, (asyncio.CancelledError, KeyboardInterrupt)):
+            return None
+        raise flight.error
+
+    def do(self, key: str, call: Callable[[], GenerationResult]) -> GenerationResult:
+        """Run ``call`` unless an identical request is in flight; then share its result."""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                try:
+                    result = call()
+                except BaseException as e:
+                    self._finish(key, flight, error=e)
+                    raise
+                self._finish(key, flight, result=result)
+                return result
+
+            if flight.loop is not None and flight.loop is _running_loop():
+                # Blocking here would freeze the loop the leader runs on.
+                return call()
+            flight.event.wait()
+            shared = self._follower_result(flight)
+            if shared is not None:
+                return shared
+
+    async def do_async(self, key: str, call: Callable[[], Awaitable[GenerationResult]]) -> GenerationResult:
+        """Async version of do."""
+        while True:
+            flight, leader = self._join(key)
+            if leader:
+                flight.loop = asyncio.get_running_loop()
+                try:
+                    result = await call()
+                except BaseException as e:
+                    self._finish(key, flight, error=e)
+                    raise
+                self._finish(key, flight, result=result)
+                return result
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            with self._lock:
+                if flight.event.is_set():
+                    future.set_result(None)
+                else:
+                    flight.waiters.append((loop, future))
+            await future
+            shared = self._follower_result(flight)
+            if shared is not None:
+                return shared
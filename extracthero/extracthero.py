@@ -6,12 +6,22 @@ from __future__ import annotations
 import logging
 logger = logging.getLogger(__name__)
 
+import asyncio
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from time import time
-from typing import List, Union, Optional, Tuple, Dict
-import json
-import tiktoken
+from typing import Any, AsyncIterator, Iterable, List, Union, Optional, Tuple, Dict
 
+from extracthero.cache import InMemoryReductionCache, reduction_cache_key
+from extracthero.chain_cache import ChainPrefixCache
+from extracthero.failure_cache import FailureCache
 from extracthero.myllmservice import MyLLMService
+from extracthero.near_duplicates import (
+    NearDuplicateEntry,
+    NearDuplicateIndex,
+    NearDuplicateMatch,
+    near_duplicate_spec_key,
+)
 from extracthero.schemas import (
     ExtractConfig,
     ExtractOp,
@@ -19,38 +29,269 @@ from extracthero.schemas import (
     FilterChainOp,
     ParseOp,
     WhatToRetain,
+    spec_list_fingerprint,
 )
 from extracthero.filterhero import FilterHero
 from extracthero.parsehero import ParseHero
-from extracthero.utils import load_html
+from extracthero.section_scoring import best_sections_trim, compiled_target
+from extracthero.token_ledger import TokenLedger
+from extracthero.utils import load_html, trim_to_token_budget
 from domreducer import HtmlReducer
 
 
 
+def _reduce_html_worker(html: str):
+    """Run HtmlReducer on one document. Module-level so process pools can pickle it."""
+    return HtmlReducer(html).reduce()
 
 
 class ExtractHero:
     """High-level orchestrator with 3 phases: HTML Reduction → Filter → Parse."""
 
-    def __init__(self, config: ExtractConfig | None = None, llm: MyLLMService | None = None):
+    def __init__(
+        self,
+        config: ExtractConfig | None = None,
+        llm: MyLLMService | None = None,
+        reduction_executor: str | Executor | None = "thread",
+        reduction_workers: Optional[int] = None,
+        reduction_cache: Any = None,
+        token_ledger: Optional[TokenLedger] = None,
+        near_duplicates: Optional[NearDuplicateIndex] = None,
+        chain_cache: Optional[ChainPrefixCache] = None,
+        failure_cache: Optional[FailureCache] = None,
+    ):
+        """
+        Parameters
+        ----------
+        reduction_executor : "process" | "thread" | Executor | None
+            Where the async pipelines run the CPU-bound HtmlReducer pass.
+            "thread" (default) uses a lazily created ThreadPoolExecutor, which
+            keeps the event loop free; "process" uses a ProcessPoolExecutor so
+            reduction scales across cores; an Executor instance is used as-is
+            (and not shut down by us); None reduces inline on the event loop.
+            Sync methods always reduce inline. A pool created here is shut
+            down by close(), by leaving a ``with`` / ``async with`` block, or
+            when the ExtractHero is garbage collected.
+        reduction_workers : Optional[int]
+            max_workers for the executor we create. None uses the executor default.
+        reduction_cache : "memory" | cache | None
+            Cache of HtmlReducer outputs keyed by the canonical HTML fingerprint
+            (see extracthero.fingerprints), so re-crawled pages that differ only
+            in nonces, CSRF tokens, cache-busting params or tracking params skip
+            the reduction. "memory" uses an InMemoryReductionCache; any object
+            with ``get(key)`` / ``put(key, op)`` works, e.g.
+            extracthero.cache.SqliteReductionCache shared by all worker
+            processes; None (default) disables it. For the LLM calls pass a
+            cache to MyLLMService instead.
+        token_ledger : Optional[TokenLedger]
+            Memoized token counts shared with the FilterHero, so each text
+            (raw HTML, reduced corpus, filter output) is encoded at most once.
+            A new ledger is created when None.
+        near_duplicates : Optional[NearDuplicateIndex]
+            SimHash/LSH index consulted before the filter phase of extract,
+            extract_async and ExtractPipeline. A near-duplicate of an earlier
+            document reuses its filter output (and, when no line of the
+            corpus changed, its parsed content). Use a
+            SqliteNearDuplicateIndex to persist it across runs. None
+            (default) disables it.
+        chain_cache : Optional[ChainPrefixCache]
+            Passed to the FilterHero: extract_with_chain(_async) resumes after
+            the longest cached prefix of filter stages for the same input.
+        failure_cache : Optional[FailureCache]
+            Passed to the FilterHero: inputs whose filter call failed get a
+            fast failed FilterOp (and so a failed ExtractOp without a parse
+            call) until their backoff window expires.
+        """
         self.config = config or ExtractConfig()
         self.llm = llm or MyLLMService()
-        self.filter_hero = FilterHero(self.config, self.llm)
+        self.token_ledger = token_ledger or TokenLedger()
+        self.near_duplicates = near_duplicates
+        self.filter_hero = FilterHero(
+            self.config, self.llm, token_ledger=self.token_ledger,
+            chain_cache=chain_cache, failure_cache=failure_cache,
+        )
         self.parse_hero = ParseHero(self.config, self.llm)
-        self.encoding = tiktoken.encoding_for_model("gpt-4o-mini")
 
-    def _count_tokens(self, text: str | dict | None) -> int:
-        """Count tokens in text or dict content."""
-        if text is None:
-            return 0
-        
-        if isinstance(text, dict):
-            text = json.dumps(text)
-        
+        if isinstance(reduction_executor, str) and reduction_executor not in ("process", "thread"):
+            raise ValueError(f"Unknown reduction_executor: {reduction_executor!r}")
+        self.reduction_executor = reduction_executor
+        self.reduction_workers = reduction_workers
+        self._owned_executor: Optional[Executor] = None
+        self._executor_finalizer: Optional[weakref.finalize] = None
+        if isinstance(reduction_cache, str) and reduction_cache == "memory":
+            reduction_cache = InMemoryReductionCache()
+        self.reduction_cache = reduction_cache
+
+    def _get_reduction_executor(self) -> Optional[Executor]:
+        """Return the executor used for async HTML reduction, creating it on first use."""
+        if self.reduction_executor is None or isinstance(self.reduction_executor, Executor):
+            return self.reduction_executor
+        if self._owned_executor is None:
+            if self.reduction_executor == "process":
+                self._owned_executor = ProcessPoolExecutor(max_workers=self.reduction_workers)
+            else:
+                self._owned_executor = ThreadPoolExecutor(
+                    max_workers=self.reduction_workers,
+                    thread_name_prefix="extracthero-reduce",
+                )
+            # Don't leak worker processes/threads when close() is never called
+            self._executor_finalizer = weakref.finalize(self, self._owned_executor.shutdown, wait=False)
+        return self._owned_executor
+
+    def close(self) -> None:
+        """Shut down the reduction executor if this instance created it."""
+        if self._owned_executor is not None:
+            self._executor_finalizer.detach()
+            self._owned_executor.shutdown(wait=True)
+            self._owned_executor = None
+            self._executor_finalizer = None
+
+    def __enter__(self) -> "ExtractHero":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "ExtractHero":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _should_reduce(self, text: str | dict, reduce_html: bool) -> bool:
+        return reduce_html and isinstance(text, str) and "<" in text and ">" in text
+
+    def _apply_reduce_op(
+        self,
+        text: str | dict,
+        html_reduce_op: Any,
+        stage_tokens: Dict[str, Dict[str, int]],
+        cached: bool = False,
+    ) -> Tuple[str | dict, Optional[str]]:
+        """
+        Pick the filter corpus from a ReduceOperation and record its token counts.
+
+        A cached op may come from a different (equivalent) input text; see
+        _cached_input_tokens.
+        """
+        if html_reduce_op is not None and html_reduce_op.success:
+            # Use existing token counts from html_reduce_op
+            if cached:
+                input_tokens = self._cached_input_tokens(text, html_reduce_op)
+            else:
+                input_tokens = html_reduce_op.total_token
+                self.token_ledger.record(text, input_tokens)
+            self.token_ledger.record(html_reduce_op.reduced_data, html_reduce_op.reduced_total_token)
+            stage_tokens["HTML Reduction"] = {
+                "input": input_tokens,
+                "output": html_reduce_op.reduced_total_token
+            }
+            return html_reduce_op.reduced_data, html_reduce_op.reduced_data
+        return text, None
+
+    def _cached_input_tokens(self, text: str | dict, html_reduce_op: Any) -> int:
+        """
+        Input token count for a reduction-cache hit, without re-encoding the page.
+
+        The op's ``total_token`` is exact when it was reduced from this very
+        text. Otherwise the ledger may already know the count; failing that,
+        the equivalent page's count is scaled by length, since pages sharing a
+        fingerprint differ only in nonces and tracking parameters.
+        """
+        raw = getattr(html_reduce_op, "raw_data", None)
+        total = html_reduce_op.total_token
+        if raw == text:
+            self.token_ledger.record(text, total)
+            return total
+        known = self.token_ledger.peek(text)
+        if known is not None:
+            return known
+        if total and isinstance(raw, str) and raw:
+            return round(total * len(str(text)) / len(raw))
+        return self._count_tokens(text)
+
+    def _cached_reduction(self, text: str) -> Tuple[Optional[str], Any]:
+        """Return (cache_key, cached ReduceOperation or None)."""
+        if self.reduction_cache is None:
+            return None, None
+        key = reduction_cache_key(str(text))
+        try:
+            return key, self.reduction_cache.get(key)
+        except Exception as e:
+            logger.warning("Reduction cache read failed: %s", e)
+            return key, None
+
+    def _store_reduction(self, key: Optional[str], html_reduce_op: Any) -> None:
+        if key is None or html_reduce_op is None or not html_reduce_op.success:
+            return
         try:
-            return len(self.encoding.encode(str(text)))
-        except Exception:
-            return 0
+            self.reduction_cache.put(key, html_reduce_op)
+        except Exception as e:
+            logger.warning("Reduction cache write failed: %s", e)
+
+    def _reduce_html(
+        self,
+        text: str | dict,
+        reduce_html: bool,
+        stage_tokens: Dict[str, Dict[str, int]],
+    ) -> Tuple[str | dict, Optional[str], Any]:
+        """
+        Phase 0: optional HTML reduction, run inline.
+
+        Returns
+        -------
+        Tuple of (corpus_to_filter, reduced_html, html_reduce_op)
+        """
+        if not self._should_reduce(text, reduce_html):
+            return text, None, None
+        cache_key, html_reduce_op = self._cached_reduction(text)
+        cached = html_reduce_op is not None
+        if not cached:
+            try:
+                html_reduce_op = _reduce_html_worker(str(text))
+            except Exception:
+                return text, None, None
+            self._store_reduction(cache_key, html_reduce_op)
+        corpus_to_filter, reduced_html = self._apply_reduce_op(text, html_reduce_op, stage_tokens, cached)
+        return corpus_to_filter, reduced_html, html_reduce_op
+
+    async def _reduce_html_async(
+        self,
+        text: str | dict,
+        reduce_html: bool,
+        stage_tokens: Dict[str, Dict[str, int]],
+    ) -> Tuple[str | dict, Optional[str], Any]:
+        """Async Phase 0: same as _reduce_html but runs HtmlReducer on the reduction executor."""
+        if not self._should_reduce(text, reduce_html):
+            return text, None, None
+        cache_key, html_reduce_op = None, None
+        if self.reduction_cache is not None:
+            # canonical_html and a disk tier's SQLite read are blocking work
+            cache_key, html_reduce_op = await asyncio.to_thread(self._cached_reduction, text)
+        cached = html_reduce_op is not None
+        if not cached:
+            executor = self._get_reduction_executor()
+            try:
+                if executor is None:
+                    html_reduce_op = _reduce_html_worker(str(text))
+                else:
+                    loop = asyncio.get_running_loop()
+                    html_reduce_op = await loop.run_in_executor(executor, _reduce_html_worker, str(text))
+            except Exception as e:
+                logger.debug("HTML reduction failed: %s", e)
+                return text, None, None
+            if cache_key is not None:
+                await asyncio.to_thread(self._store_reduction, cache_key, html_reduce_op)
+        corpus_to_filter, reduced_html = self._apply_reduce_op(text, html_reduce_op, stage_tokens, cached)
+        return corpus_to_filter, reduced_html, html_reduce_op
+
+    @property
+    def encoding(self):
+        return self.token_ledger.encoding
+
+    def _count_tokens(self, text: str | dict | None) -> int:
+        """Count tokens in text or dict content (memoized by the token ledger)."""
+        return self.token_ledger.count(text)
 
     def _trim_if_needed(self, text: str, trim_char_length: Optional[int]) -> Tuple[str, Optional[int]]:
         """
@@ -63,6 +304,286 @@ class ExtractHero:
             return text[:trim_char_length], trim_char_length
         return text, None
 
+    def _trim_phase(
+        self,
+        text: str | dict,
+        corpus_to_filter: str | dict,
+        trim_char_length: Optional[int],
+        stage_tokens: Dict[str, Dict[str, int]],
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        extraction_spec: Optional[WhatToRetain | List[WhatToRetain]] = None,
+    ) -> Tuple[str | dict, Optional[int]]:
+        """
+        Phase 0.5: trim the (reduced) corpus and record the "Trimming" stage tokens.
+
+        Returns
+        -------
+        Tuple of (corpus_to_filter, trimmed_to or None)
+        """
+        if trim_strategy not in ("head", "best_sections"):
+            raise ValueError(f"Unknown trim_strategy: {trim_strategy!r}")
+        if (
+            trim_strategy == "best_sections"
+            and (trim_token_length or trim_char_length)
+            and isinstance(corpus_to_filter, str)
+            and extraction_spec is not None
+        ):
+            return self._trim_best_sections(
+                text, corpus_to_filter, trim_char_length, trim_token_length, extraction_spec, stage_tokens
+            )
+        if trim_token_length and isinstance(corpus_to_filter, str):
+            return self._trim_to_tokens(text, corpus_to_filter, trim_char_length, trim_token_length, stage_tokens)
+
+        trimmed_to = None
+        if trim_char_length and isinstance(corpus_to_filter, str):
+            corpus_to_filter, trimmed_to = self._trim_if_needed(corpus_to_filter, trim_char_length)
+            if trimmed_to:
+                # Add trimming info to stage tokens
+                trimmed_tokens = self._count_tokens(corpus_to_filter)
+                if "HTML Reduction" in stage_tokens:
+                    pre_trim_tokens = stage_tokens["HTML Reduction"]["output"]
+                else:
+                    pre_trim_tokens = self._count_tokens(text)
+                stage_tokens["Trimming"] = {
+                    "input": pre_trim_tokens,
+                    "output": trimmed_tokens,
+                    "trimmed_to_chars": trimmed_to
+                }
+        return corpus_to_filter, trimmed_to
+
+    async def _trim_phase_async(
+        self,
+        text: str | dict,
+        corpus_to_filter: str | dict,
+        trim_char_length: Optional[int],
+        stage_tokens: Dict[str, Dict[str, int]],
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        extraction_spec: Optional[WhatToRetain | List[WhatToRetain]] = None,
+    ) -> Tuple[str | dict, Optional[int]]:
+        """Async _trim_phase: a trim encodes the corpus, so it runs in a worker thread."""
+        args = (text, corpus_to_filter, trim_char_length, stage_tokens, trim_token_length, trim_strategy, extraction_spec)
+        if not (trim_char_length or trim_token_length):
+            return self._trim_phase(*args)
+        return await asyncio.to_thread(self._trim_phase, *args)
+
+    def _trim_to_tokens(
+        self,
+        text: str | dict,
+        corpus_to_filter: str,
+        trim_char_length: Optional[int],
+        trim_token_length: int,
+        stage_tokens: Dict[str, Dict[str, int]],
+    ) -> Tuple[str, Optional[int]]:
+        """
+        Token-budget trimming (see utils.trim_to_token_budget), applied after
+        any character trim. The corpus is encoded at most once and both counts
+        go to the token ledger, so the filter phase does not encode it again.
+        """
+        if "HTML Reduction" in stage_tokens:
+            pre_trim_tokens = stage_tokens["HTML Reduction"]["output"]
+        else:
+            pre_trim_tokens = self.token_ledger.peek(text)
+        corpus_to_filter, trimmed_to = self._trim_if_needed(corpus_to_filter, trim_char_length)
+
+        known = self.token_ledger.peek(corpus_to_filter)
+        if known is not None and known <= trim_token_length:
+            trimmed, trimmed_tokens, total = corpus_to_filter, known, known
+        else:
+            trimmed, trimmed_tokens, total = trim_to_token_budget(corpus_to_filter, trim_token_length, self.encoding)
+            self.token_ledger.record(corpus_to_filter, total)
+            self.token_ledger.record(trimmed, trimmed_tokens)
+
+        if trimmed_to is None and len(trimmed) == len(corpus_to_filter):
+            return corpus_to_filter, None
+        stage_tokens["Trimming"] = {
+            "input": pre_trim_tokens if pre_trim_tokens is not None else total,
+            "output": trimmed_tokens,
+            "trimmed_to_chars": len(trimmed),
+            "trimmed_to_tokens": trim_token_length,
+        }
+        return trimmed, len(trimmed)
+
+    def _trim_best_sections(
+        self,
+        text: str | dict,
+        corpus_to_filter: str,
+        trim_char_length: Optional[int],
+        trim_token_length: Optional[int],
+        extraction_spec: WhatToRetain | List[WhatToRetain],
+        stage_tokens: Dict[str, Dict[str, int]],
+    ) -> Tuple[str, Optional[int]]:
+        """
+        "best_sections" trimming (see section_scoring): keep the blocks that
+        score best against the spec within the token budget, or within the
+        character budget when no token budget is given. Block costs go through
+        the token ledger, and the kept and total costs are recorded there, so
+        the trimmed corpus is not encoded again.
+        """
+        if trim_token_length:
+            budget, count_cost = trim_token_length, self._count_tokens
+        else:
+            budget, count_cost = trim_char_length, len
+
+        trimmed, kept, total, kept_blocks = best_sections_trim(
+            corpus_to_filter, budget, compiled_target(extraction_spec), count_cost
+        )
+        if trim_token_length:
+            self.token_ledger.record(corpus_to_filter, total)
+            self.token_ledger.record(trimmed, kept)
+        if kept_blocks is None:
+            return corpus_to_filter, None
+
+        if "HTML Reduction" in stage_tokens:
+            pre_trim_tokens = stage_tokens["HTML Reduction"]["output"]
+        elif trim_token_length:
+            pre_trim_tokens = total
+        else:
+            pre_trim_tokens = self._count_tokens(text)
+        stage_tokens["Trimming"] = {
+            "input": pre_trim_tokens,
+            "output": kept if trim_token_length else self._count_tokens(trimmed),
+            "trimmed_to_chars": len(trimmed),
+            "kept_blocks": kept_blocks,
+        }
+        if trim_token_length:
+            stage_tokens["Trimming"]["trimmed_to_tokens"] = trim_token_length
+        return trimmed, len(trimmed)
+
+    def _record_filter_tokens(
+        self,
+        filter_input_tokens: int,
+        filter_op: FilterOp,
+        stage_tokens: Dict[str, Dict[str, int]],
+    ) -> int:
+        """Record the "Filter" stage tokens and return the filter output token count."""
+        # Use filtered_data_token_size if available, otherwise calculate
+        filter_output_tokens = filter_op.filtered_data_token_size if filter_op.filtered_data_token_size else self._count_tokens(filter_op.content if filter_op.success else None)
+        
+        stage_tokens["Filter"] = {
+            "input": filter_input_tokens,
+            "output": filter_output_tokens
+        }
+        return filter_output_tokens
+
+    def _record_parse_tokens(
+        self,
+        parse_input_tokens: int,
+        parse_op: ParseOp,
+        stage_tokens: Dict[str, Dict[str, int]],
+    ) -> None:
+        """Record the "Parse" stage tokens."""
+        parse_output_tokens = self._count_tokens(parse_op.content if parse_op.success else None)
+        stage_tokens["Parse"] = {
+            "input": parse_input_tokens,
+            "output": parse_output_tokens
+        }
+
+    def _near_duplicate_lookup(
+        self,
+        corpus: str | dict,
+        extraction_spec: WhatToRetain | List[WhatToRetain],
+        filter_strategy: str,
+        model_name: Optional[str],
+        content_output_format: str,
+    ) -> Tuple[Optional[Tuple[str, int]], Optional[NearDuplicateMatch]]:
+        """
+        Phase 0.75: look the filter corpus up in the near-duplicate index.
+
+        Returns
+        -------
+        Tuple of ((spec_key, fingerprint) or None, match or None)
+        """
+        if self.near_duplicates is None or not isinstance(corpus, str) or not corpus:
+            return None, None
+        spec_key = near_duplicate_spec_key(
+            spec_list_fingerprint(extraction_spec), filter_strategy, model_name, content_output_format
+        )
+        try:
+            fingerprint = self.near_duplicates.fingerprint(corpus)
+            return (spec_key, fingerprint), self.near_duplicates.lookup(spec_key, fingerprint, corpus)
+        except Exception as e:
+            logger.warning("Near-duplicate lookup failed: %s", e)
+            return None, None
+
+    def _filter_inputs(
+        self,
+        corpus: str | dict,
+        extraction_spec: WhatToRetain | List[WhatToRetain],
+        filter_strategy: str,
+        model_name: Optional[str],
+        content_output_format: str,
+    ) -> Tuple[Optional[Tuple[str, int]], Optional[NearDuplicateMatch], int]:
+        """
+        Near-duplicate lookup plus the filter input token count. Both are CPU
+        bound (SimHash/difflib, tiktoken), so the async paths run this in one
+        worker thread.
+
+        Returns
+        -------
+        Tuple of (near-duplicate key or None, match or None, filter_input_tokens)
+        """
+        nd_key, nd_match = self._near_duplicate_lookup(
+            corpus, extraction_spec, filter_strategy, model_name, content_output_format
+        )
+        return nd_key, nd_match, self._count_tokens(corpus)
+
+    def _near_duplicate_filter_op(self, match: NearDuplicateMatch, corpus: str, filter_strategy: str) -> FilterOp:
+        """FilterOp built from a near-duplicate's filter output instead of an LLM call."""
+        start_time = time()
+        content = match.filtered
+        return FilterOp.from_result(
+            config=self.config,
+            content=content,
+            usage={"near_duplicate_hits": 1},
+            start_time=start_time,
+            filtered_data_token_size=self._count_tokens(content),
+            source_token_size=self.token_ledger.peek(corpus),
+            filter_strategy=filter_strategy,
+            filter_mode="near_duplicate",
+        )
+
+    def _near_duplicate_parse_op(self, match: NearDuplicateMatch) -> ParseOp:
+        """ParseOp reusing a near-duplicate's parsed content."""
+        return ParseOp.from_result(
+            config=self.config,
+            content=match.entry.content,
+            usage={"near_duplicate_skips": 1},
+            start_time=time(),
+        )
+
+    def _remember_near_duplicate(
+        self,
+        nd_key: Optional[Tuple[str, int]],
+        corpus: str,
+        filter_op: FilterOp,
+        parse_op: ParseOp,
+    ) -> None:
+        """Index a successful extraction so later near-duplicates can reuse it."""
+        if nd_key is None or not filter_op.success or not parse_op.success:
+            return
+        spec_key, fingerprint = nd_key
+        try:
+            self.near_duplicates.add(
+                spec_key, fingerprint,
+                NearDuplicateEntry(corpus=corpus, filtered=str(filter_op.content), content=parse_op.content),
+            )
+        except Exception as e:
+            logger.warning("Near-duplicate index write failed: %s", e)
+
+    def _skipped_parse_op(self, error: str) -> ParseOp:
+        """Failed ParseOp used when the filter phase failed and parsing is skipped."""
+        return ParseOp.from_result(
+            config=self.config,
+            content=None,
+            usage=None,
+            start_time=time(),
+            success=False,
+            error=error,
+            generation_result=None
+        )
+
     def extract(
         self,
         text: str | dict,
@@ -71,7 +592,12 @@ class ExtractHero:
         reduce_html: bool = True,
         model_name: Optional[str] = None,
         trim_char_length: Optional[int] = None,
-        content_output_format="json"
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        content_output_format="json",
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None
     ) -> ExtractOp:
         """
         Three-phase extraction pipeline: HTML Reduction → Trimming → Filter → Parse.
@@ -90,6 +616,23 @@ class ExtractHero:
             Specific model to use for LLM operations
         trim_char_length : Optional[int]
             Maximum character length to trim to after HTML reduction. None means no trimming.
+        trim_token_length : Optional[int]
+            Token budget to trim to after HTML reduction (and any character
+            trim), cut at a block or line boundary. None means no token trimming.
+        trim_strategy : str, default "head"
+            "head" keeps the start of the corpus. "best_sections" instead keeps
+            the blocks that best match the spec within the token budget (or the
+            character budget when no token budget is given), in original order.
+        priority : int | str | None
+            Scheduling class for this extraction's LLM calls ("interactive",
+            "normal", "bulk" or an int, lower first). None inherits the caller's.
+        max_specs_per_call : Optional[int]
+            When extraction_spec is a list, fan it out into concurrent filter and
+            parse calls of at most this many specs each. None keeps one call per phase.
+        chunk_max_tokens : Optional[int]
+            Filter a corpus larger than this many tokens in concurrent chunks
+            split on paragraph/heading boundaries, so the whole page is read
+            instead of being cut at trim_char_length. None uses one filter call.
             
         Returns
         -------
@@ -104,69 +647,41 @@ class ExtractHero:
         # logger.debug(content_output_format)
         
         # Initialize tracking variables
-        reduced_html = None
-        html_reduce_op = None
-        corpus_to_filter = text
         stage_tokens = {}
-        trimmed_to = None
         
         # Phase 0: Optional HTML Reduction
-        if reduce_html and isinstance(text, str) and "<" in text and ">" in text:
-            try:
-                html_reduce_op = HtmlReducer(str(text)).reduce()
-                if html_reduce_op.success:
-                    reduced_html = html_reduce_op.reduced_data
-                    corpus_to_filter = html_reduce_op.reduced_data
-                    # Use existing token counts from html_reduce_op
-                    stage_tokens["HTML Reduction"] = {
-                        "input": html_reduce_op.total_token,
-                        "output": html_reduce_op.reduced_total_token
-                    }
-                else:
-                    corpus_to_filter = text
-            except Exception as e:
-                corpus_to_filter = text
+        corpus_to_filter, reduced_html, html_reduce_op = self._reduce_html(text, reduce_html, stage_tokens)
         
         # Phase 0.5: Trimming if needed (after HTML reduction)
-        if trim_char_length and isinstance(corpus_to_filter, str):
-            corpus_to_filter, trimmed_to = self._trim_if_needed(corpus_to_filter, trim_char_length)
-            if trimmed_to:
-                # Add trimming info to stage tokens
-                trimmed_tokens = self._count_tokens(corpus_to_filter)
-                pre_trim_tokens = stage_tokens.get("HTML Reduction", {}).get("output", self._count_tokens(text))
-                stage_tokens["Trimming"] = {
-                    "input": pre_trim_tokens,
-                    "output": trimmed_tokens,
-                    "trimmed_to_chars": trimmed_to
-                }
+        corpus_to_filter, trimmed_to = self._trim_phase(
+            text, corpus_to_filter, trim_char_length, stage_tokens, trim_token_length,
+            trim_strategy, extraction_spec
+        )
         
-        # Phase 1: Filtering
-        filter_input_tokens = self._count_tokens(corpus_to_filter)
-        filter_op: FilterOp = self.filter_hero.run(
-            corpus_to_filter,
-            extraction_spec,
-            filter_strategy=filter_strategy
+        # Phase 0.75: Near-duplicate lookup
+        nd_key, nd_match = self._near_duplicate_lookup(
+            corpus_to_filter, extraction_spec, filter_strategy, model_name, content_output_format
         )
         
-        # Use filtered_data_token_size if available, otherwise calculate
-        filter_output_tokens = filter_op.filtered_data_token_size if filter_op.filtered_data_token_size else self._count_tokens(filter_op.content if filter_op.success else None)
+        # Phase 1: Filtering
+        filter_input_tokens = self._count_tokens(corpus_to_filter)
+        if nd_match is not None:
+            filter_op = self._near_duplicate_filter_op(nd_match, corpus_to_filter, filter_strategy)
+        else:
+            filter_op: FilterOp = self.filter_hero.run(
+                corpus_to_filter,
+                extraction_spec,
+                filter_strategy=filter_strategy,
+                priority=priority,
+                max_specs_per_call=max_specs_per_call,
+                chunk_max_tokens=chunk_max_tokens
+            )
         
-        stage_tokens["Filter"] = {
-            "input": filter_input_tokens,
-            "output": filter_output_tokens
-        }
+        filter_output_tokens = self._record_filter_tokens(filter_input_tokens, filter_op, stage_tokens)
 
         # Check if filter phase failed
         if not filter_op.success:
-            parse_op = ParseOp.from_result(
-                config=self.config,
-                content=None,
-                usage=None,
-                start_time=time(),
-                success=False,
-                error="Filter phase failed - parse not attempted",
-                generation_result=None
-            )
+            parse_op = self._skipped_parse_op("Filter phase failed - parse not attempted")
             
             return ExtractOp.from_operations(
                 filter_op=filter_op,
@@ -183,17 +698,19 @@ class ExtractHero:
         parse_input_tokens = filter_output_tokens  # Use the filter output tokens
 
         
-        parse_op = self.parse_hero.run(
-            filter_op.content, 
-            extraction_spec,
-            model_name=model_name,
-            content_output_format=content_output_format
-        )
-        parse_output_tokens = self._count_tokens(parse_op.content if parse_op.success else None)
-        stage_tokens["Parse"] = {
-            "input": parse_input_tokens,
-            "output": parse_output_tokens
-        }
+        if nd_match is not None and nd_match.skip:
+            parse_op = self._near_duplicate_parse_op(nd_match)
+        else:
+            parse_op = self.parse_hero.run(
+                filter_op.content, 
+                extraction_spec,
+                model_name=model_name,
+                content_output_format=content_output_format,
+                priority=priority,
+                max_specs_per_call=max_specs_per_call
+            )
+        self._record_parse_tokens(parse_input_tokens, parse_op, stage_tokens)
+        self._remember_near_duplicate(nd_key, corpus_to_filter, filter_op, parse_op)
         
         # Create ExtractOp with all metrics
         result = ExtractOp.from_operations(
@@ -217,6 +734,9 @@ class ExtractHero:
         reduce_html: bool = True,
         model_name: Optional[str] = None,
         trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        priority: Optional[int | str] = None,
     ) -> ExtractOp:
         """
         Three-phase extraction with filter chaining.
@@ -235,6 +755,16 @@ class ExtractHero:
             Specific model to use
         trim_char_length : Optional[int]
             Maximum character length to trim to after HTML reduction. None means no trimming.
+        trim_token_length : Optional[int]
+            Token budget to trim to after HTML reduction (and any character
+            trim), cut at a block or line boundary. None means no token trimming.
+        trim_strategy : str, default "head"
+            "head" keeps the start of the corpus. "best_sections" instead keeps
+            the blocks that best match the spec within the token budget (or the
+            character budget when no token budget is given), in original order.
+        priority : int | str | None
+            Scheduling class for this extraction's LLM calls ("interactive",
+            "normal", "bulk" or an int, lower first). None inherits the caller's.
             
         Returns
         -------
@@ -244,47 +774,23 @@ class ExtractHero:
         extraction_start_time = time()
         
         # Initialize tracking variables
-        reduced_html = None
-        html_reduce_op = None
-        corpus_to_filter = text
         stage_tokens = {}
-        trimmed_to = None
         
         # Phase 0: Optional HTML Reduction
-        if reduce_html and isinstance(text, str) and "<" in text and ">" in text:
-            try:
-                html_reduce_op = HtmlReducer(str(text)).reduce()
-                if html_reduce_op.success:
-                    reduced_html = html_reduce_op.reduced_data
-                    corpus_to_filter = html_reduce_op.reduced_data
-                    # Use existing token counts from html_reduce_op
-                    stage_tokens["HTML Reduction"] = {
-                        "input": html_reduce_op.total_token,
-                        "output": html_reduce_op.reduced_total_token
-                    }
-                else:
-                    corpus_to_filter = text
-            except Exception as e:
-                corpus_to_filter = text
+        corpus_to_filter, reduced_html, html_reduce_op = self._reduce_html(text, reduce_html, stage_tokens)
         
         # Phase 0.5: Trimming if needed (after HTML reduction)
-        if trim_char_length and isinstance(corpus_to_filter, str):
-            corpus_to_filter, trimmed_to = self._trim_if_needed(corpus_to_filter, trim_char_length)
-            if trimmed_to:
-                # Add trimming info to stage tokens
-                trimmed_tokens = self._count_tokens(corpus_to_filter)
-                pre_trim_tokens = stage_tokens.get("HTML Reduction", {}).get("output", self._count_tokens(text))
-                stage_tokens["Trimming"] = {
-                    "input": pre_trim_tokens,
-                    "output": trimmed_tokens,
-                    "trimmed_to_chars": trimmed_to
-                }
+        corpus_to_filter, trimmed_to = self._trim_phase(
+            text, corpus_to_filter, trim_char_length, stage_tokens, trim_token_length,
+            trim_strategy, extraction_spec
+        )
         
         # Phase 1: Filter Chain
         filter_input_tokens = self._count_tokens(corpus_to_filter)
         filter_chain_op: FilterChainOp = self.filter_hero.chain(
             corpus_to_filter,
-            filter_stages
+            filter_stages,
+            priority=priority
         )
         
         # Use filtered_data_token_size if available
@@ -306,15 +812,7 @@ class ExtractHero:
 
         # Check if filter chain failed
         if not filter_chain_op.success:
-            parse_op = ParseOp.from_result(
-                config=self.config,
-                content=None,
-                usage=None,
-                start_time=time(),
-                success=False,
-                error="Filter chain failed - parse not attempted",
-                generation_result=None
-            )
+            parse_op = self._skipped_parse_op("Filter chain failed - parse not attempted")
             
             return ExtractOp.from_operations(
                 filter_chain_op=filter_chain_op,
@@ -332,13 +830,10 @@ class ExtractHero:
         parse_op = self.parse_hero.run(
             filter_chain_op.content, 
             extraction_spec,
-            model_name=model_name
+            model_name=model_name,
+            priority=priority
         )
-        parse_output_tokens = self._count_tokens(parse_op.content if parse_op.success else None)
-        stage_tokens["Parse"] = {
-            "input": parse_input_tokens,
-            "output": parse_output_tokens
-        }
+        self._record_parse_tokens(parse_input_tokens, parse_op, stage_tokens)
         
         # Create ExtractOp with chain results
         result = ExtractOp.from_operations(
@@ -362,6 +857,12 @@ class ExtractHero:
         reduce_html: bool = True,
         model_name: Optional[str] = None,
         trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        content_output_format="json",
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None
     ) -> ExtractOp:
         """
         Async three-phase extraction pipeline.
@@ -380,6 +881,23 @@ class ExtractHero:
             Specific model to use for LLM operations
         trim_char_length : Optional[int]
             Maximum character length to trim to after HTML reduction. None means no trimming.
+        trim_token_length : Optional[int]
+            Token budget to trim to after HTML reduction (and any character
+            trim), cut at a block or line boundary. None means no token trimming.
+        trim_strategy : str, default "head"
+            "head" keeps the start of the corpus. "best_sections" instead keeps
+            the blocks that best match the spec within the token budget (or the
+            character budget when no token budget is given), in original order.
+        priority : int | str | None
+            Scheduling class for this extraction's LLM calls ("interactive",
+            "normal", "bulk" or an int, lower first). None inherits the caller's.
+        max_specs_per_call : Optional[int]
+            When extraction_spec is a list, fan it out into concurrent filter and
+            parse calls of at most this many specs each. None keeps one call per phase.
+        chunk_max_tokens : Optional[int]
+            Filter a corpus larger than this many tokens in concurrent chunks
+            split on paragraph/heading boundaries, so the whole page is read
+            instead of being cut at trim_char_length. None uses one filter call.
             
         Returns
         -------
@@ -389,67 +907,40 @@ class ExtractHero:
         extraction_start_time = time()
         
         # Initialize tracking variables
-        reduced_html = None
-        html_reduce_op = None
-        corpus_to_filter = text
         stage_tokens = {}
-        trimmed_to = None
         
-        # Phase 0: Optional HTML Reduction
-        if reduce_html and isinstance(text, str) and "<" in text and ">" in text:
-            try:
-                html_reduce_op = HtmlReducer(str(text)).reduce()
-                if html_reduce_op.success:
-                    reduced_html = html_reduce_op.reduced_data
-                    corpus_to_filter = html_reduce_op.reduced_data
-                    # Use existing token counts
-                    stage_tokens["HTML Reduction"] = {
-                        "input": html_reduce_op.total_token,
-                        "output": html_reduce_op.reduced_total_token
-                    }
-                else:
-                    corpus_to_filter = text
-            except Exception as e:
-                corpus_to_filter = text
+        # Phase 0: Optional HTML Reduction (off the event loop)
+        corpus_to_filter, reduced_html, html_reduce_op = await self._reduce_html_async(text, reduce_html, stage_tokens)
         
-        # Phase 0.5: Trimming if needed (after HTML reduction)
-        if trim_char_length and isinstance(corpus_to_filter, str):
-            corpus_to_filter, trimmed_to = self._trim_if_needed(corpus_to_filter, trim_char_length)
-            if trimmed_to:
-                # Add trimming info to stage tokens
-                trimmed_tokens = self._count_tokens(corpus_to_filter)
-                pre_trim_tokens = stage_tokens.get("HTML Reduction", {}).get("output", self._count_tokens(text))
-                stage_tokens["Trimming"] = {
-                    "input": pre_trim_tokens,
-                    "output": trimmed_tokens,
-                    "trimmed_to_chars": trimmed_to
-                }
+        # Phase 0.5: Trimming if needed (after HTML reduction, off the event loop)
+        corpus_to_filter, trimmed_to = await self._trim_phase_async(
+            text, corpus_to_filter, trim_char_length, stage_tokens, trim_token_length,
+            trim_strategy, extraction_spec
+        )
         
-        # Phase 1: Async Filtering
-        filter_input_tokens = self._count_tokens(corpus_to_filter)
-        filter_op: FilterOp = await self.filter_hero.run_async(
-            corpus_to_filter,
-            extraction_spec,
-            filter_strategy=filter_strategy
+        # Phase 0.75: Near-duplicate lookup and filter input tokens (off the event loop)
+        nd_key, nd_match, filter_input_tokens = await asyncio.to_thread(
+            self._filter_inputs,
+            corpus_to_filter, extraction_spec, filter_strategy, model_name, content_output_format
         )
         
-        filter_output_tokens = filter_op.filtered_data_token_size if filter_op.filtered_data_token_size else self._count_tokens(filter_op.content if filter_op.success else None)
+        # Phase 1: Async Filtering
+        if nd_match is not None:
+            filter_op = self._near_duplicate_filter_op(nd_match, corpus_to_filter, filter_strategy)
+        else:
+            filter_op: FilterOp = await self.filter_hero.run_async(
+                corpus_to_filter,
+                extraction_spec,
+                filter_strategy=filter_strategy,
+                priority=priority,
+                max_specs_per_call=max_specs_per_call,
+                chunk_max_tokens=chunk_max_tokens
+            )
         
-        stage_tokens["Filter"] = {
-            "input": filter_input_tokens,
-            "output": filter_output_tokens
-        }
+        filter_output_tokens = self._record_filter_tokens(filter_input_tokens, filter_op, stage_tokens)
 
         if not filter_op.success:
-            parse_op = ParseOp.from_result(
-                config=self.config,
-                content=None,
-                usage=None,
-                start_time=time(),
-                success=False,
-                error="Filter phase failed - parse not attempted",
-                generation_result=None
-            )
+            parse_op = self._skipped_parse_op("Filter phase failed - parse not attempted")
             
             return ExtractOp.from_operations(
                 filter_op=filter_op,
@@ -464,16 +955,19 @@ class ExtractHero:
 
         # Phase 2: Async Parsing
         parse_input_tokens = filter_output_tokens
-        parse_op = await self.parse_hero.run_async(
-            filter_op.content, 
-            extraction_spec,
-            model_name=model_name
-        )
-        parse_output_tokens = self._count_tokens(parse_op.content if parse_op.success else None)
-        stage_tokens["Parse"] = {
-            "input": parse_input_tokens,
-            "output": parse_output_tokens
-        }
+        if nd_match is not None and nd_match.skip:
+            parse_op = self._near_duplicate_parse_op(nd_match)
+        else:
+            parse_op = await self.parse_hero.run_async(
+                filter_op.content, 
+                extraction_spec,
+                model_name=model_name,
+                content_output_format=content_output_format,
+                priority=priority,
+                max_specs_per_call=max_specs_per_call
+            )
+        self._record_parse_tokens(parse_input_tokens, parse_op, stage_tokens)
+        self._remember_near_duplicate(nd_key, corpus_to_filter, filter_op, parse_op)
         
         result = ExtractOp.from_operations(
             filter_op=filter_op,
@@ -496,6 +990,9 @@ class ExtractHero:
         reduce_html: bool = True,
         model_name: Optional[str] = None,
         trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        priority: Optional[int | str] = None,
     ) -> ExtractOp:
         """
         Async three-phase extraction with filter chaining.
@@ -514,6 +1011,16 @@ class ExtractHero:
             Specific model to use
         trim_char_length : Optional[int]
             Maximum character length to trim to after HTML reduction. None means no trimming.
+        trim_token_length : Optional[int]
+            Token budget to trim to after HTML reduction (and any character
+            trim), cut at a block or line boundary. None means no token trimming.
+        trim_strategy : str, default "head"
+            "head" keeps the start of the corpus. "best_sections" instead keeps
+            the blocks that best match the spec within the token budget (or the
+            character budget when no token budget is given), in original order.
+        priority : int | str | None
+            Scheduling class for this extraction's LLM calls ("interactive",
+            "normal", "bulk" or an int, lower first). None inherits the caller's.
             
         Returns
         -------
@@ -523,47 +1030,23 @@ class ExtractHero:
         extraction_start_time = time()
         
         # Initialize tracking variables
-        reduced_html = None
-        html_reduce_op = None
-        corpus_to_filter = text
         stage_tokens = {}
-        trimmed_to = None
         
-        # Phase 0: Optional HTML Reduction
-        if reduce_html and isinstance(text, str) and "<" in text and ">" in text:
-            try:
-                html_reduce_op = HtmlReducer(str(text)).reduce()
-                if html_reduce_op.success:
-                    reduced_html = html_reduce_op.reduced_data
-                    corpus_to_filter = html_reduce_op.reduced_data
-                    # Use existing token counts
-                    stage_tokens["HTML Reduction"] = {
-                        "input": html_reduce_op.total_token,
-                        "output": html_reduce_op.reduced_total_token
-                    }
-                else:
-                    corpus_to_filter = text
-            except Exception as e:
-                corpus_to_filter = text
+        # Phase 0: Optional HTML Reduction (off the event loop)
+        corpus_to_filter, reduced_html, html_reduce_op = await self._reduce_html_async(text, reduce_html, stage_tokens)
         
-        # Phase 0.5: Trimming if needed (after HTML reduction)
-        if trim_char_length and isinstance(corpus_to_filter, str):
-            corpus_to_filter, trimmed_to = self._trim_if_needed(corpus_to_filter, trim_char_length)
-            if trimmed_to:
-                # Add trimming info to stage tokens
-                trimmed_tokens = self._count_tokens(corpus_to_filter)
-                pre_trim_tokens = stage_tokens.get("HTML Reduction", {}).get("output", self._count_tokens(text))
-                stage_tokens["Trimming"] = {
-                    "input": pre_trim_tokens,
-                    "output": trimmed_tokens,
-                    "trimmed_to_chars": trimmed_to
-                }
+        # Phase 0.5: Trimming if needed (after HTML reduction, off the event loop)
+        corpus_to_filter, trimmed_to = await self._trim_phase_async(
+            text, corpus_to_filter, trim_char_length, stage_tokens, trim_token_length,
+            trim_strategy, extraction_spec
+        )
         
         # Phase 1: Async Filter Chain
-        filter_input_tokens = self._count_tokens(corpus_to_filter)
+        filter_input_tokens = await asyncio.to_thread(self._count_tokens, corpus_to_filter)
         filter_chain_op: FilterChainOp = await self.filter_hero.chain_async(
             corpus_to_filter,
-            filter_stages
+            filter_stages,
+            priority=priority
         )
         
         filter_output_tokens = filter_chain_op.filtered_data_token_size if filter_chain_op.filtered_data_token_size else self._count_tokens(filter_chain_op.content if filter_chain_op.success else None)
@@ -583,15 +1066,7 @@ class ExtractHero:
                 }
 
         if not filter_chain_op.success:
-            parse_op = ParseOp.from_result(
-                config=self.config,
-                content=None,
-                usage=None,
-                start_time=time(),
-                success=False,
-                error="Filter chain failed - parse not attempted",
-                generation_result=None
-            )
+            parse_op = self._skipped_parse_op("Filter chain failed - parse not attempted")
             
             return ExtractOp.from_operations(
                 filter_chain_op=filter_chain_op,
@@ -609,13 +1084,10 @@ class ExtractHero:
         parse_op = await self.parse_hero.run_async(
             filter_chain_op.content, 
             extraction_spec,
-            model_name=model_name
+            model_name=model_name,
+            priority=priority
         )
-        parse_output_tokens = self._count_tokens(parse_op.content if parse_op.success else None)
-        stage_tokens["Parse"] = {
-            "input": parse_input_tokens,
-            "output": parse_output_tokens
-        }
+        self._record_parse_tokens(parse_input_tokens, parse_op, stage_tokens)
         
         result = ExtractOp.from_operations(
             filter_chain_op=filter_chain_op,
@@ -631,6 +1103,220 @@ class ExtractHero:
         return result
 
 
+    # ──────────────────────── batch extraction ────────────────────────
+    def _normalize_batch_item(
+        self,
+        item: Any,
+        extraction_spec: WhatToRetain | List[WhatToRetain] | None,
+    ) -> Tuple[str | dict, WhatToRetain | List[WhatToRetain]]:
+        """Split a batch item into (text, extraction_spec)."""
+        if isinstance(item, tuple) and len(item) == 2:
+            return item[0], item[1]
+        if extraction_spec is None:
+            raise ValueError(
+                "Batch item has no extraction spec; pass (text, spec) tuples "
+                "or a shared extraction_spec"
+            )
+        return item, extraction_spec
+
+    def _failed_extract_op(self, error: str, start_time: float) -> ExtractOp:
+        """Build a failed ExtractOp for a batch item that raised."""
+        parse_op = ParseOp.from_result(
+            config=self.config,
+            content=None,
+            usage=None,
+            start_time=start_time,
+            success=False,
+            error=error,
+            generation_result=None
+        )
+        extract_op = ExtractOp.from_operations(
+            parse_op=parse_op,
+            start_time=start_time,
+            content=None
+        )
+        extract_op.error = error
+        return extract_op
+
+    async def extract_many_as_completed(
+        self,
+        documents: Iterable[Any],
+        extraction_spec: WhatToRetain | List[WhatToRetain] | None = None,
+        filter_strategy: str = "contextual",
+        reduce_html: bool = True,
+        model_name: Optional[str] = None,
+        trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        content_output_format="json",
+        max_concurrency: int = 20,
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[int, ExtractOp]]:
+        """
+        Run extract_async over many documents, yielding results as they complete.
+
+        Parameters
+        ----------
+        documents : Iterable
+            Either plain documents (str | dict) sharing ``extraction_spec``, or
+            ``(document, extraction_spec)`` tuples. Consumed lazily, so generators
+            of very large batches are fine.
+        extraction_spec : WhatToRetain | List[WhatToRetain] | None
+            Spec used for items that do not carry their own.
+        max_concurrency : int, default 20
+            Maximum number of documents in flight at once. All documents share
+            ``self.llm``, so its rpm / concurrency limits still apply on top.
+        priority : int | str | None
+            Scheduling class for the batch; pass "bulk" so interactive
+            extractions on the same service are admitted first.
+
+        Yields
+        ------
+        Tuple[int, ExtractOp]
+            Input position of the document and its ExtractOp. A document that
+            raises yields a failed ExtractOp instead of aborting the batch.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+
+        items = enumerate(documents)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker() -> None:
+            # Workers pull from one shared iterator, so at most max_concurrency
+            # documents are materialised at a time.
+            for index, item in items:
+                start_time = time()
+                try:
+                    text, spec = self._normalize_batch_item(item, extraction_spec)
+                    op = await self.extract_async(
+                        text,
+                        spec,
+                        filter_strategy=filter_strategy,
+                        reduce_html=reduce_html,
+                        model_name=model_name,
+                        trim_char_length=trim_char_length,
+                        trim_token_length=trim_token_length,
+                        trim_strategy=trim_strategy,
+                        content_output_format=content_output_format,
+                        priority=priority,
+                        max_specs_per_call=max_specs_per_call,
+                        chunk_max_tokens=chunk_max_tokens,
+                    )
+                except Exception as e:
+                    logger.warning("Batch item %d failed: %s", index, e)
+                    op = self._failed_extract_op(f"Extraction raised: {e}", start_time)
+                await results.put((index, op))
+
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+        done = asyncio.gather(*workers)
+        getter: Optional[asyncio.Future] = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                # All workers finished: drain what is left and stop.
+                await done
+                while not results.empty():
+                    yield results.get_nowait()
+                break
+        finally:
+            # Also reached when the consumer closes the generator early
+            if getter is not None:
+                getter.cancel()
+            for task in workers:
+                task.cancel()
+            # Retrieve the gather's CancelledError so it isn't logged as unhandled
+            done.add_done_callback(lambda future: future.cancelled() or future.exception())
+
+    async def extract_many_async(
+        self,
+        documents: Iterable[Any],
+        extraction_spec: WhatToRetain | List[WhatToRetain] | None = None,
+        filter_strategy: str = "contextual",
+        reduce_html: bool = True,
+        model_name: Optional[str] = None,
+        trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        content_output_format="json",
+        max_concurrency: int = 20,
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None,
+    ) -> List[ExtractOp]:
+        """
+        Async batch extraction with bounded concurrency.
+
+        Same parameters as ``extract_many_as_completed``; returns the ExtractOps
+        in input order.
+        """
+        collected: Dict[int, ExtractOp] = {}
+        async for index, op in self.extract_many_as_completed(
+            documents,
+            extraction_spec,
+            filter_strategy=filter_strategy,
+            reduce_html=reduce_html,
+            model_name=model_name,
+            trim_char_length=trim_char_length,
+            trim_token_length=trim_token_length,
+            trim_strategy=trim_strategy,
+            content_output_format=content_output_format,
+            max_concurrency=max_concurrency,
+            priority=priority,
+            max_specs_per_call=max_specs_per_call,
+            chunk_max_tokens=chunk_max_tokens,
+        ):
+            collected[index] = op
+        return [collected[i] for i in range(len(collected))]
+
+    def extract_many(
+        self,
+        documents: Iterable[Any],
+        extraction_spec: WhatToRetain | List[WhatToRetain] | None = None,
+        filter_strategy: str = "contextual",
+        reduce_html: bool = True,
+        model_name: Optional[str] = None,
+        trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        content_output_format="json",
+        max_concurrency: int = 20,
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None,
+    ) -> List[ExtractOp]:
+        """
+        Synchronous wrapper around ``extract_many_async``.
+
+        Starts its own event loop, so call ``extract_many_async`` instead when
+        already inside one.
+        """
+        return asyncio.run(
+            self.extract_many_async(
+                documents,
+                extraction_spec,
+                filter_strategy=filter_strategy,
+                reduce_html=reduce_html,
+                model_name=model_name,
+                trim_char_length=trim_char_length,
+                trim_token_length=trim_token_length,
+                trim_strategy=trim_strategy,
+                content_output_format=content_output_format,
+                max_concurrency=max_concurrency,
+                priority=priority,
+                max_specs_per_call=max_specs_per_call,
+                chunk_max_tokens=chunk_max_tokens,
+            )
+        )
+
+
 # ─────────────────────────── Demo ───────────────────────────
 def main() -> None:
     """Demo showing different extraction methods."""
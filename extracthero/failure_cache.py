@@ -0,0 +1,123 @@
+# extracthero/failure_cache.py
+"""
+Negative-result cache for FilterHero.
+
+• failure_key  — key of one (input, spec, model, settings) attempt.
+• FailureCache — inputs whose filter call failed are answered with a fast
+  failed FilterOp until an exponential backoff window expires, used by
+  FilterHero(failure_cache=...).
+"""
+
+from __future__ import annotations
+
+import copy
+import dataclasses
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from extracthero.schemas import spec_list_fingerprint
+
+
+def failure_key(text: Any, extraction_spec: Any, model_name: Optional[str], *settings: Any) -> str:
+    """Key of one (input, spec, model, settings) attempt in a FailureCache."""
+    if isinstance(text, str):
+        data = text
+    else:
+        data = json.dumps(text, sort_keys=True, default=str)
+    digest = hashlib.sha256(data.encode("utf-8", "surrogatepass"))
+    for part in (spec_list_fingerprint(extraction_spec), model_name or "", *map(str, settings)):
+        digest.update(b"\x00")
+        digest.update(part.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+@dataclasses.dataclass
+class FailureRecord:
+    """Consecutive failures of one key."""
+    failure_class: str   # e.g. "llm_filter", "toc_output", "subtractive"
+    message: str         # error of the latest failure
+    count: int
+    retry_at: float      # time.monotonic() after which the key may be retried
+
+    def retry_in(self) -> float:
+        return max(0.0, self.retry_at - time.monotonic())
+
+
+class FailureCache:
+    """
+    Process-local negative-result cache with exponential backoff.
+
+    After the n-th consecutive failure of a key, attempts are refused for
+    ``min(max_seconds, base_seconds * factor ** (n - 1))`` seconds. Once the
+    window expires one attempt goes through; another failure doubles the
+    window, a success forgets the key.
+
+    Parameters
+    ----------
+    base_seconds : float, default 60
+        Backoff after the first failure.
+    max_seconds : float, default 3600
+        Upper bound of the backoff window.
+    factor : float, default 2
+        Growth of the window per consecutive failure.
+    max_entries : int, default 10_000
+        Keys remembered (LRU).
+    """
+
+    def __init__(
+        self,
+        base_seconds: float = 60.0,
+        max_seconds: float = 3600.0,
+        factor: float = 2.0,
+        max_entries: int = 10_000,
+    ):
+        if base_seconds <= 0 or max_seconds < base_seconds or factor < 1:
+            raise ValueError("expected 0 < base_seconds <= max_seconds and factor >= 1")
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.factor = factor
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, FailureRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.short_circuits = 0
+        self.failures = 0
+
+    def check(self, key: str) -> Optional[FailureRecord]:
+        """The key's failure record while its backoff window is open, else None."""
+        with self._lock:
+            record = self._entries.get(key)
+            if record is None or time.monotonic() >= record.retry_at:
+                return None
+            self.short_circuits += 1
+            return copy.copy(record)
+
+    def record_failure(self, key: str, failure_class: str, message: str) -> FailureRecord:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            count = previous.count + 1 if previous is not None else 1
+            backoff = min(self.max_seconds, self.base_seconds * self.factor ** (count - 1))
+            record = FailureRecord(failure_class, message, count, time.monotonic() + backoff)
+            self._entries[key] = record
+            self.failures += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return copy.copy(record)
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            blocked = sum(1 for record in self._entries.values() if record.retry_at > now)
+            return {"entries": len(self._entries), "blocked": blocked,
+                    "failures": self.failures, "short_circuits": self.short_circuits}
@@ -0,0 +1,130 @@
+# extracthero/fanout.py
+"""
+Spec fan-out helpers shared by FilterEngine and ParseEngine.
+
+A list of WhatToRetain specs is normally compiled into one prompt, so the
+LLM writes the output for every spec in a single (long, slow) response.
+With ``max_specs_per_call`` the list is split into groups that are sent as
+concurrent calls; the GenerationResults are then merged back into one, so
+FilterHero / ParseHero / ExtractOp see a single result whose usage is the
+sum of all calls.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from llmservice import GenerationResult
+
+from extracthero.myllmservice import TocOutput
+from extracthero.schemas import WhatToRetain
+
+
+SpecInput = Union[WhatToRetain, List[WhatToRetain], str]
+
+
+def spec_groups(extraction_spec: SpecInput, max_specs_per_call: Optional[int]) -> List[SpecInput]:
+    """
+    Split a spec list into groups of at most ``max_specs_per_call``.
+
+    A single spec, a raw string, or a list that already fits is returned
+    unchanged as the only group.
+    """
+    if max_specs_per_call is None or not isinstance(extraction_spec, list):
+        return [extraction_spec]
+    if max_specs_per_call < 1:
+        raise ValueError("max_specs_per_call must be >= 1")
+    if len(extraction_spec) <= max_specs_per_call:
+        return [extraction_spec]
+    return [
+        extraction_spec[i:i + max_specs_per_call]
+        for i in range(0, len(extraction_spec), max_specs_per_call)
+    ]
+
+
+DEFAULT_MAX_FANOUT_WORKERS = 8
+
+
+def run_in_threads(
+    calls: Sequence[Callable[[], Any]],
+    max_workers: int = DEFAULT_MAX_FANOUT_WORKERS,
+) -> List[Any]:
+    """
+    Run blocking calls concurrently and return their results in order.
+
+    At most ``max_workers`` threads are used, so nested fan-outs (chunks or
+    windows, each fanned out by spec group) stay bounded at every level.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be >= 1")
+    workers = min(len(calls), max_workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extracthero-fanout") as pool:
+        # Copy the context per call so priority_scope() reaches every thread
+        futures = [pool.submit(contextvars.copy_context().run, call) for call in calls]
+        return [future.result() for future in futures]
+
+
+# ──────────────────────── content mergers ────────────────────────
+def join_text(contents: List[Any]) -> str:
+    """Merge extractive filter outputs by concatenating them in spec (or chunk) order."""
+    return "\n\n".join(str(c) for c in contents if c)
+
+
+def merge_parsed(contents: List[Any]) -> Any:
+    """Merge parse outputs: dicts are combined key-wise, anything else is joined as text."""
+    if all(isinstance(c, dict) or c is None for c in contents):
+        merged: Dict[str, Any] = {}
+        for content in contents:
+            merged.update(content or {})
+        return merged
+    return join_text(contents)
+
+
+def merge_toc(contents: List[Any]) -> Any:
+    """
+    Merge ToC outputs: a line is kept if any group's ToC keeps it.
+
+    Sections of different groups may overlap; FilterHero computes deletions
+    from the union of kept lines, so a line one group keeps is never
+    reported as deleted by another.
+    """
+    return TocOutput(sections=[section for toc in contents for section in toc.sections])
+
+
+def merge_generation_results(
+    results: List[GenerationResult],
+    merge_content: Callable[[List[Any]], Any],
+    label: str = "spec group",
+) -> GenerationResult:
+    """
+    Combine the GenerationResults of a fan-out into one.
+
+    The merged result succeeds only if every call succeeded; usage is summed
+    key-wise and the number of calls is reported as ``fanout_calls``.
+    """
+    merged = copy.copy(results[0])
+
+    usage: Dict[str, Any] = {}
+    for result in results:
+        for key, value in (result.usage or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                usage[key] = usage.get(key, 0) + value
+            else:
+                usage.setdefault(key, value)
+    usage["fanout_calls"] = len(results)
+    merged.usage = usage
+
+    failed = [r for r in results if not r.success]
+    if failed:
+        merged.success = False
+        merged.content = None
+        merged.error_message = "; ".join(
+            f"{label} {results.index(r) + 1}: {r.error_message or 'unknown error'}" for r in failed
+        )
+    else:
+        merged.success = True
+        merged.content = merge_content([r.content for r in results])
+    return merged
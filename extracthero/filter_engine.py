@@ -9,13 +9,16 @@ python -m extracthero.filter_engine
 from __future__ import annotations
 
 import json as _json
+from functools import partial
 from typing import Any, Dict, List, Optional, Tuple, Union
 import asyncio
 
 from llmservice import GenerationResult
+from extracthero.fanout import join_text, merge_generation_results, merge_toc, run_in_threads, spec_groups
 from extracthero.myllmservice import MyLLMService
-from extracthero.schemas import WhatToRetain
+from extracthero.schemas import FrozenWhatToRetain, WhatToRetain
 from extracthero.utils import load_html
+from extracthero.windowing import line_windows, stitch_toc, window_ownership
 
 
 
@@ -29,25 +32,42 @@ class FilterEngine:
     def __init__(self, llm_service: Optional[MyLLMService] = None):
         self.llm = llm_service or MyLLMService()
     
- 
+    def _compile_target_desc(
+        self,
+        extraction_spec: Union[WhatToRetain, List[WhatToRetain], str],
+    ) -> str:
+        """Compile a spec (or list of specs) into the text handed to the LLM."""
+        if isinstance(extraction_spec, (WhatToRetain, FrozenWhatToRetain)):
+            # Use the compile method from WhatToRetain
+            return extraction_spec.compile()
+        elif isinstance(extraction_spec, str):
+            return extraction_spec
+        else:
+            # Handle list of WhatToRetain specs - compile each one
+            compiled_specs = [spec.compile() for spec in extraction_spec]
+            return "\n\n".join(compiled_specs)
+
 
     def execute_filtering(
         self,
         corpus: str,
         extraction_spec: Union[WhatToRetain, List[WhatToRetain], str],
         strategy: str,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None
     ) -> GenerationResult:
+        """
+        Extractive filtering. With ``max_specs_per_call`` a spec list is fanned
+        out into concurrent calls and their outputs are concatenated.
+        """
+        groups = spec_groups(extraction_spec, max_specs_per_call)
+        if len(groups) > 1:
+            results = run_in_threads([
+                partial(self.execute_filtering, corpus, group, strategy, model_name) for group in groups
+            ], self.llm.max_fanout_workers)
+            return merge_generation_results(results, join_text)
         
-        if isinstance(extraction_spec, WhatToRetain):
-            # Use the compile method from WhatToRetain
-            target_desc = extraction_spec.compile()
-        elif isinstance(extraction_spec, str):
-            target_desc = extraction_spec
-        else:
-            # Handle list of WhatToRetain specs - compile each one
-            compiled_specs = [spec.compile() for spec in extraction_spec]
-            target_desc = "\n\n".join(compiled_specs)
+        target_desc = self._compile_target_desc(extraction_spec)
         
         gen_results = self.llm.filter_via_llm(
                 corpus, 
@@ -58,32 +78,59 @@ class FilterEngine:
         
         return gen_results
     
+    def execute_chunked_filtering(
+        self,
+        chunks: List[str],
+        extraction_spec: Union[WhatToRetain, List[WhatToRetain], str],
+        strategy: str,
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None
+    ) -> GenerationResult:
+        """
+        Extractive filtering of a corpus split into chunks (see
+        utils.split_structural_chunks): every chunk is filtered concurrently
+        and the retained content is concatenated in chunk order.
+        """
+        if len(chunks) == 1:
+            return self.execute_filtering(chunks[0], extraction_spec, strategy, model_name, max_specs_per_call)
+        results = run_in_threads([
+            partial(self.execute_filtering, chunk, extraction_spec, strategy, model_name, max_specs_per_call)
+            for chunk in chunks
+        ], self.llm.max_fanout_workers)
+        return merge_generation_results(results, join_text, label="chunk")
+    
     def execute_subtractive_filtering(
         self,
         numbered_corpus: str,
         extraction_spec: Union[WhatToRetain, List[WhatToRetain]],
         strategy: str,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None,
+        max_line: Optional[int] = None
     ) -> GenerationResult:
         """
         Execute subtractive filtering using ToC approach.
         
         This uses Semantic Section Mapping to identify document sections
-        and determine which to keep based on extraction spec.
+        and determine which to keep based on extraction spec. With
+        ``max_specs_per_call`` each spec group gets its own ToC call and the
+        sections are merged, so a line survives if any group keeps it.
+        ``max_line`` overrides the last line number when ``numbered_corpus``
+        only holds a subset of the document's lines.
         """
+        groups = spec_groups(extraction_spec, max_specs_per_call)
+        if len(groups) > 1:
+            results = run_in_threads([
+                partial(self.execute_subtractive_filtering, numbered_corpus, group, strategy, model_name, max_line=max_line)
+                for group in groups
+            ], self.llm.max_fanout_workers)
+            return merge_generation_results(results, merge_toc)
         
-        if isinstance(extraction_spec, WhatToRetain):
-            # Use the compile method from WhatToRetain
-            target_desc = extraction_spec.compile()
-        elif isinstance(extraction_spec, str):
-            target_desc=extraction_spec
-        else:
-            # Handle list of WhatToRetain specs - compile each one
-            compiled_specs = [spec.compile() for spec in extraction_spec]
-            target_desc = "\n\n".join(compiled_specs)
+        target_desc = self._compile_target_desc(extraction_spec)
         
         # Count lines in numbered_corpus
-        max_line = len(numbered_corpus.split('\n'))
+        if max_line is None:
+            max_line = len(numbered_corpus.split('\n'))
         
         # Use ToC-based content identification via LLM
         gen_results = self.llm.get_content_toc(
@@ -95,24 +142,52 @@ class FilterEngine:
         
         return gen_results
     
+
+    def execute_windowed_subtractive_filtering(
+        self,
+        numbered_lines: List[str],
+        line_numbers: List[int],
+        extraction_spec: Union[WhatToRetain, List[WhatToRetain]],
+        strategy: str,
+        window_lines: int,
+        window_overlap: int,
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None
+    ) -> GenerationResult:
+        """
+        Subtractive filtering with one ToC call per window of numbered lines
+        (see extracthero.windowing). ``line_numbers[i]`` is the document line
+        of ``numbered_lines[i]``; the stitched ToC uses those global numbers.
+        """
+        windows = line_windows(len(numbered_lines), window_lines, window_overlap)
+        owned = window_ownership(windows, line_numbers)
+        results = run_in_threads([
+            partial(
+                self.execute_subtractive_filtering, "\n".join(numbered_lines[start:end]), extraction_spec,
+                strategy, model_name, max_specs_per_call=max_specs_per_call, max_line=line_numbers[end - 1],
+            )
+            for start, end in windows
+        ], self.llm.max_fanout_workers)
+        return merge_generation_results(results, partial(stitch_toc, owned=owned), label="window")
+    
     
     async def execute_filtering_async(
         self,
         corpus: str,
         extraction_spec: Union[WhatToRetain, List[WhatToRetain], str],
         strategy: str,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None
     ) -> GenerationResult:
+        """Async version of execute_filtering."""
+        groups = spec_groups(extraction_spec, max_specs_per_call)
+        if len(groups) > 1:
+            results = await asyncio.gather(*(
+                self.execute_filtering_async(corpus, group, strategy, model_name) for group in groups
+            ))
+            return merge_generation_results(list(results), join_text)
         
-        if isinstance(extraction_spec, WhatToRetain):
-            # Use the compile method from WhatToRetain
-            target_desc = extraction_spec.compile()
-        elif isinstance(extraction_spec, str):
-            target_desc = extraction_spec
-        else:
-            # Handle list of WhatToRetain specs - compile each one
-            compiled_specs = [spec.compile() for spec in extraction_spec]
-            target_desc = "\n\n".join(compiled_specs)
+        target_desc = self._compile_target_desc(extraction_spec)
         
         gen_results = await self.llm.filter_via_llm_async(
                 corpus, 
@@ -122,6 +197,79 @@ class FilterEngine:
             )
         
         return gen_results
+
+    async def execute_chunked_filtering_async(
+        self,
+        chunks: List[str],
+        extraction_spec: Union[WhatToRetain, List[WhatToRetain], str],
+        strategy: str,
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None
+    ) -> GenerationResult:
+        """Async version of execute_chunked_filtering."""
+        if len(chunks) == 1:
+            return await self.execute_filtering_async(chunks[0], extraction_spec, strategy, model_name, max_specs_per_call)
+        results = await asyncio.gather(*(
+            self.execute_filtering_async(chunk, extraction_spec, strategy, model_name, max_specs_per_call)
+            for chunk in chunks
+        ))
+        return merge_generation_results(list(results), join_text, label="chunk")
+
+    async def execute_subtractive_filtering_async(
+        self,
+        numbered_corpus: str,
+        extraction_spec: Union[WhatToRetain, List[WhatToRetain]],
+        strategy: str,
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None,
+        max_line: Optional[int] = None
+    ) -> GenerationResult:
+        """Async version of execute_subtractive_filtering."""
+        groups = spec_groups(extraction_spec, max_specs_per_call)
+        if len(groups) > 1:
+            results = await asyncio.gather(*(
+                self.execute_subtractive_filtering_async(numbered_corpus, group, strategy, model_name, max_line=max_line)
+                for group in groups
+            ))
+            return merge_generation_results(list(results), merge_toc)
+        
+        target_desc = self._compile_target_desc(extraction_spec)
+        
+        # Count lines in numbered_corpus
+        if max_line is None:
+            max_line = len(numbered_corpus.split('\n'))
+        
+        gen_results = await self.llm.get_content_toc_async(
+            numbered_corpus=numbered_corpus,
+            max_line=max_line,
+            what_to_retain=target_desc,
+            model=model_name
+        )
+        
+        return gen_results
+
+    async def execute_windowed_subtractive_filtering_async(
+        self,
+        numbered_lines: List[str],
+        line_numbers: List[int],
+        extraction_spec: Union[WhatToRetain, List[WhatToRetain]],
+        strategy: str,
+        window_lines: int,
+        window_overlap: int,
+        model_name: Optional[str] = None,
+        max_specs_per_call: Optional[int] = None
+    ) -> GenerationResult:
+        """Async version of execute_windowed_subtractive_filtering."""
+        windows = line_windows(len(numbered_lines), window_lines, window_overlap)
+        owned = window_ownership(windows, line_numbers)
+        results = await asyncio.gather(*(
+            self.execute_subtractive_filtering_async(
+                "\n".join(numbered_lines[start:end]), extraction_spec, strategy, model_name,
+                max_specs_per_call=max_specs_per_call, max_line=line_numbers[end - 1],
+            )
+            for start, end in windows
+        ))
+        return merge_generation_results(list(results), partial(stitch_toc, owned=owned), label="window")
         
        
     
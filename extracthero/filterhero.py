@@ -8,11 +8,13 @@ FilterHero — the "filter" phase of ExtractHero.
 """
 
 from __future__ import annotations
-import tiktoken
+import copy
 import json as _json
+import logging
 from dataclasses import dataclass
+from functools import partial
 from time import time
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from llmservice import GenerationResult
 from extracthero.myllmservice import MyLLMService, TocOutput
@@ -22,18 +24,30 @@ from extracthero.schemas import (
     CorpusPayload,   
     WhatToRetain, 
     ProcessResult,
-    FilterChainOp
+    FilterChainOp,
+    spec_list_fingerprint,
 
 )
 
-from extracthero.utils import load_html
+from extracthero.utils import load_html, split_structural_chunks
 from extracthero.sample_dicts import sample_page_dict
 import asyncio
 
 from extracthero.filter_engine import FilterEngine
+from extracthero.chain_cache import ChainPrefixCache, chain_prefix_keys
+from extracthero.failure_cache import FailureCache, failure_key
+from extracthero.fanout import run_in_threads
+from extracthero.rate_limits import priority_scope
+from extracthero.ssm_cache import SectionDecisionMemo, SSMPlan, SSMTemplateCache, ssm_spec_key
+from extracthero.streaming import StreamedSubtraction, batched, line_sink, open_lines
+from extracthero.token_ledger import TokenLedger
+from extracthero.windowing import iter_line_windows
 
 
 
+logger = logging.getLogger(__name__)
+
+
 import warnings
 warnings.filterwarnings(
     "ignore",
@@ -42,9 +56,30 @@ warnings.filterwarnings(
 )
 
 
-encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+
+def _merge_runs(runs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorted, non-overlapping union of inclusive line runs."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(runs):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
 
 
+def _uncovered_runs(start: int, end: int, covered: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Parts of the run start..end outside the merged runs ``covered``."""
+    runs = []
+    for lo, hi in covered:
+        if hi < start or lo > end:
+            continue
+        if lo > start:
+            runs.append((start, lo - 1))
+        start = max(start, hi + 1)
+    if start <= end:
+        runs.append((start, end))
+    return runs
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -53,9 +88,43 @@ class FilterHero:
         self,
         config: Optional[ExtractConfig] = None,
         llm: Optional[MyLLMService] = None,
+        token_ledger: Optional[TokenLedger] = None,
+        ssm_cache: Optional[SSMTemplateCache] = None,
+        section_memo: Optional[SectionDecisionMemo] = None,
+        chain_cache: Optional[ChainPrefixCache] = None,
+        failure_cache: Optional[FailureCache] = None,
     ):
+        """
+        Parameters
+        ----------
+        token_ledger : Optional[TokenLedger]
+            Memoized token counts, usually shared with an ExtractHero.
+        ssm_cache : Optional[SSMTemplateCache]
+            Template cache for subtractive mode: pages that share a site
+            template reuse the cached Semantic Section Map and only the lines
+            that differ are sent to the LLM. None (default) disables it.
+        section_memo : Optional[SectionDecisionMemo]
+            Memo of keep/delete decisions for repeated blocks (cookie banners,
+            menus, legal footers) in subtractive mode; known blocks are left
+            out of the numbered corpus. None (default) disables it.
+        chain_cache : Optional[ChainPrefixCache]
+            Cache of chain-stage outputs keyed by (input hash, stage prefix):
+            chain / chain_async resume after the longest cached prefix, so
+            chains sharing their first stages on the same input run those
+            stages once. None (default) disables it.
+        failure_cache : Optional[FailureCache]
+            Negative-result cache keyed by input + spec + model + mode/strategy.
+            While a failed input's backoff window is open, run / run_async
+            return a failed FilterOp without calling the LLM. None (default)
+            disables it.
+        """
         self.config = config or ExtractConfig()
         self.llm = llm or MyLLMService()
+        self.token_ledger = token_ledger or TokenLedger()
+        self.ssm_cache = ssm_cache
+        self.section_memo = section_memo
+        self.chain_cache = chain_cache
+        self.failure_cache = failure_cache
 
         self.engine= FilterEngine(llm_service=self.llm)
 
@@ -68,7 +137,12 @@ class FilterHero:
         filter_mode: str = "extractive",  # New parameter: "extractive" or "subtractive"
         max_line_length_for_indexing: Optional[int] = 200,  # New parameter for line truncation in indexed content
         line_format: str = "[{n}]",  # New parameter for line number format
-        model_name: Optional[str] = None  # Model to use (e.g., "gpt-4.1-mini", "gpt-5")
+        model_name: Optional[str] = None,  # Model to use (e.g., "gpt-4.1-mini", "gpt-5")
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None,
+        window_lines: Optional[int] = None,
+        window_overlap: int = 20
     ) -> FilterOp:
         """
         End-to-end filter phase with support for both extractive and subtractive modes.
@@ -87,15 +161,115 @@ class FilterHero:
             Format for line numbers in subtractive mode. Use {n} for number.
             Examples: "[{n}]" → "[1]", "L{n}:" → "L1:", "{n:04d}|" → "0001|"
             Default: "[{n}]"
+        priority : int | str | None
+            Scheduling class for the LLM calls: "interactive", "normal", "bulk"
+            or an int (lower is admitted first). None inherits the caller's.
+        max_specs_per_call : int or None
+            Fan a list of specs out into concurrent LLM calls of at most this
+            many specs each and merge the results. None sends all specs in one call.
+        chunk_max_tokens : int or None
+            Extractive mode: split a corpus larger than this many tokens into
+            chunks on paragraph/heading boundaries, filter the chunks
+            concurrently and concatenate what they retain in order, instead
+            of trimming the input. None sends the whole corpus in one call.
+        window_lines : int or None
+            Subtractive mode: number the document in windows of this many
+            lines, get one ToC per window in parallel and stitch the sections
+            on global line numbers (see extracthero.windowing). None sends the
+            whole numbered document in one call.
+        window_overlap : int
+            Lines shared by consecutive windows as context. Default 20.
         """
        
-        
-        if filter_mode == "subtractive":
-            return self._run_subtractive(text, extraction_spec, filter_strategy, max_line_length_for_indexing, line_format, model_name)
-        else:
-            return self._run_extractive(text, extraction_spec, filter_strategy, model_name)
+        fail_key = self._failure_key(
+            text, extraction_spec, model_name, filter_mode, filter_strategy,
+            chunk_max_tokens, window_lines, window_overlap,
+        )
+        failed_op = self._cached_failure_op(fail_key, filter_strategy, filter_mode)
+        if failed_op is not None:
+            return failed_op
+
+        with priority_scope(priority):
+            if filter_mode == "subtractive":
+                filter_op = self._run_subtractive(
+                    text, extraction_spec, filter_strategy, max_line_length_for_indexing, line_format,
+                    model_name=model_name, max_specs_per_call=max_specs_per_call,
+                    window_lines=window_lines, window_overlap=window_overlap,
+                )
+            else:
+                filter_op = self._run_extractive(text, extraction_spec, filter_strategy, model_name, max_specs_per_call=max_specs_per_call, chunk_max_tokens=chunk_max_tokens)
+        self._record_filter_outcome(fail_key, filter_op)
+        # Only reported when a caller already counted the input; never encodes
+        filter_op.source_token_size = self.token_ledger.peek(text)
+        return filter_op
     
-    def _run_extractive(self, text, extraction_spec, filter_strategy, model_name=None):
+    def _failure_key(self, text, extraction_spec, model_name, *settings) -> Optional[str]:
+        if self.failure_cache is None:
+            return None
+        try:
+            return failure_key(text, extraction_spec, model_name, *settings)
+        except Exception as e:
+            logger.warning("Failure cache key failed: %s", e)
+            return None
+
+    def _cached_failure_op(self, key: Optional[str], filter_strategy: str, filter_mode: str) -> Optional[FilterOp]:
+        """Fast failed FilterOp while the key's backoff window is open, else None."""
+        if key is None:
+            return None
+        record = self.failure_cache.check(key)
+        if record is None:
+            return None
+        return FilterOp.from_result(
+            config=self.config,
+            content=None,
+            usage={"failure_cache_hits": 1},
+            start_time=time(),
+            success=False,
+            error=(
+                f"Skipped: failed {record.count} time(s) before ({record.failure_class}), "
+                f"retry in {record.retry_in():.0f}s. Last error: {record.message}"
+            ),
+            filter_strategy=filter_strategy,
+            filter_mode=filter_mode,
+        )
+
+    def _record_filter_outcome(self, key: Optional[str], filter_op: FilterOp) -> None:
+        if key is None:
+            return
+        if filter_op.success:
+            self.failure_cache.record_success(key)
+        else:
+            self.failure_cache.record_failure(key, self._failure_class(filter_op.error), filter_op.error or "")
+
+    @staticmethod
+    def _failure_class(error: Optional[str]) -> str:
+        """Coarse class of a FilterOp error, as recorded in the FailureCache."""
+        error = error or ""
+        if error.startswith("Expected TocOutput"):
+            return "toc_output"
+        if error.startswith("Subtractive filtering failed"):
+            return "subtractive"
+        if error.startswith("LLM filter failed"):
+            return "llm_filter"
+        return "other"
+
+    def _extractive_chunks(self, text, chunk_max_tokens: Optional[int]) -> Optional[List[str]]:
+        """
+        Token-bounded chunks of the corpus, or None when it fits in one call.
+
+        Counts go through the token ledger: the whole corpus is usually
+        already known from an earlier phase, and boilerplate blocks repeat
+        across pages.
+        """
+        if chunk_max_tokens is None:
+            return None
+        text = _json.dumps(text, indent=2) if isinstance(text, dict) else str(text)
+        if self.token_ledger.count(text) <= chunk_max_tokens:
+            return None
+        chunks = split_structural_chunks(text, chunk_max_tokens, count_tokens=self.token_ledger.count)
+        return chunks if len(chunks) > 1 else None
+
+    def _run_extractive(self, text, extraction_spec, filter_strategy, model_name=None, max_specs_per_call=None, chunk_max_tokens=None):
 
         ts = time()
         """Existing extractive filtering logic"""
@@ -112,12 +286,19 @@ class FilterHero:
         
         original_line_count = len(original_lines)
 
-        gen_result = self.engine.execute_filtering(
-            text, 
-            extraction_spec, 
-            filter_strategy,
-            model_name
-        )
+        chunks = self._extractive_chunks(text, chunk_max_tokens)
+        if chunks is not None:
+            gen_result = self.engine.execute_chunked_filtering(
+                chunks, extraction_spec, filter_strategy, model_name, max_specs_per_call=max_specs_per_call
+            )
+        else:
+            gen_result = self.engine.execute_filtering(
+                text, 
+                extraction_spec, 
+                filter_strategy,
+                model_name,
+                max_specs_per_call=max_specs_per_call
+            )
 
         # Calculate retained line count and other metrics
         retained_line_count = None
@@ -125,13 +306,9 @@ class FilterHero:
         if gen_result.success:
             content = gen_result.content
             if content is not None:
-                try:
-                    filtered_data_token_size = len(encoding.encode(content))
-                    # Calculate retained line count
-                    filtered_lines = content.split('\n')
-                    retained_line_count = len(filtered_lines)
-                except Exception:
-                    filtered_data_token_size = None
+                filtered_data_token_size = self.token_ledger.count(content) or None
+                # Calculate retained line count
+                retained_line_count = len(str(content).split('\n'))
 
         return FilterOp.from_result(
             config=self.config,
@@ -155,7 +332,10 @@ class FilterHero:
                         max_line_length_for_indexing=200,
                         line_format="[{n}]",
                         approach="semantic-section-mapping",
-                        model_name=None):
+                        model_name=None,
+                        max_specs_per_call=None,
+                        window_lines=None,
+                        window_overlap=20):
         
         """
         New subtractive filtering logic using line-based deletion.
@@ -169,9 +349,124 @@ class FilterHero:
             Set to None for no truncation.
         line_format : str
             Format for line numbers. Default "[{n}]" gives [1], [2], etc.
+        window_lines, window_overlap : int or None, int
+            Windowed Semantic Section Mapping; see run().
+        """
+        start_time = time()
+        
+        original_lines, numbered_content, plan = self._prepare_subtractive_input(
+            text, max_line_length_for_indexing, line_format,
+            extraction_spec, filter_strategy, model_name
+        )
+        
+        if plan is not None and plan.complete:
+            gen_result = plan.result()
+        else:
+            # Step 2: Get ToC sections from LLM
+            windows = self._subtractive_windows(numbered_content, plan, len(original_lines), window_lines)
+            if windows is not None:
+                gen_result = self.engine.execute_windowed_subtractive_filtering(
+                    *windows, extraction_spec, filter_strategy, window_lines, window_overlap,
+                    model_name, max_specs_per_call=max_specs_per_call
+                )
+            else:
+                gen_result = self.engine.execute_subtractive_filtering(
+                    numbered_content,
+                    extraction_spec,
+                    filter_strategy,
+                    model_name,
+                    max_specs_per_call=max_specs_per_call,
+                    max_line=len(original_lines)
+                )
+            gen_result = self._apply_ssm_plan(plan, gen_result)
+        
+        return self._build_subtractive_filter_op(gen_result, original_lines, filter_strategy, start_time)
+
+    async def _run_subtractive_async(self,
+                        text,
+                        extraction_spec,
+                        filter_strategy,
+                        max_line_length_for_indexing=200,
+                        line_format="[{n}]",
+                        approach="semantic-section-mapping",
+                        model_name=None,
+                        max_specs_per_call=None,
+                        window_lines=None,
+                        window_overlap=20):
+        """
+        Async version of _run_subtractive; the ToC call does not block the event loop.
+
+        Line numbering and the SSM template/memo lookup (a scan of cached
+        templates plus a difflib remap) run in a worker thread.
         """
         start_time = time()
         
+        original_lines, numbered_content, plan = await asyncio.to_thread(
+            self._prepare_subtractive_input,
+            text, max_line_length_for_indexing, line_format,
+            extraction_spec, filter_strategy, model_name
+        )
+        
+        if plan is not None and plan.complete:
+            gen_result = plan.result()
+        else:
+            windows = self._subtractive_windows(numbered_content, plan, len(original_lines), window_lines)
+            if windows is not None:
+                gen_result = await self.engine.execute_windowed_subtractive_filtering_async(
+                    *windows, extraction_spec, filter_strategy, window_lines, window_overlap,
+                    model_name, max_specs_per_call=max_specs_per_call
+                )
+            else:
+                gen_result = await self.engine.execute_subtractive_filtering_async(
+                    numbered_content,
+                    extraction_spec,
+                    filter_strategy,
+                    model_name,
+                    max_specs_per_call=max_specs_per_call,
+                    max_line=len(original_lines)
+                )
+            gen_result = self._apply_ssm_plan(plan, gen_result)
+        
+        return self._build_subtractive_filter_op(gen_result, original_lines, filter_strategy, start_time)
+
+    @staticmethod
+    def _subtractive_windows(
+        numbered_content: str,
+        plan: Optional[SSMPlan],
+        line_count: int,
+        window_lines: Optional[int],
+    ) -> Optional[Tuple[List[str], List[int]]]:
+        """(numbered lines, their document line numbers) when the view needs more than one window."""
+        if window_lines is None:
+            return None
+        numbered_lines = numbered_content.split('\n')
+        if len(numbered_lines) <= window_lines:
+            return None
+        line_numbers = plan.line_numbers if plan is not None and plan.line_numbers else list(range(1, line_count + 1))
+        return numbered_lines, line_numbers
+
+    def _prepare_subtractive_input(
+        self,
+        text,
+        max_line_length_for_indexing=200,
+        line_format="[{n}]",
+        extraction_spec=None,
+        filter_strategy=None,
+        model_name=None,
+    ):
+        """
+        Split the input into lines and build the numbered view shown to the LLM.
+        
+        With an ssm_cache or section_memo, lines resolved from a cached
+        template or a known block are left out of the numbered view (the
+        others keep their real line numbers).
+        
+        Returns
+        -------
+        Tuple[List[str], Optional[str], Optional[SSMPlan]]
+            (original_lines, numbered_content, plan). numbered_content is None
+            when the plan resolves every line.
+        """
         # Convert dict to string if needed
         if isinstance(text, dict):
             text = _json.dumps(text, indent=2)
@@ -179,21 +474,47 @@ class FilterHero:
         # Split into lines for processing
         original_lines = text.split('\n')
         
+        plan = None
+        if (self.ssm_cache is not None or self.section_memo is not None) and extraction_spec is not None:
+            spec_key = ssm_spec_key(spec_list_fingerprint(extraction_spec), filter_strategy, model_name)
+            if self.ssm_cache is not None:
+                plan = self.ssm_cache.plan(spec_key, original_lines)
+            else:
+                plan = SSMPlan.for_lines(spec_key, original_lines)
+            if self.section_memo is not None and plan.unresolved:
+                self.section_memo.resolve(plan)
+            if plan.complete:
+                return original_lines, None, plan
+        
         # Step 1: Create numbered content for LLM
         numbered_content = self._prepare_numbered_content(
             original_lines, 
             max_line_length=max_line_length_for_indexing,
-            line_format=line_format
-        )
-        
-        # Step 2: Get ToC sections from LLM
-        gen_result = self.engine.execute_subtractive_filtering(
-            numbered_content,
-            extraction_spec,
-            filter_strategy,
-            model_name
+            line_format=line_format,
+            line_numbers=plan.line_numbers if plan is not None else None
         )
         
+        return original_lines, numbered_content, plan
+
+    def _apply_ssm_plan(self, plan: Optional[SSMPlan], gen_result: GenerationResult) -> GenerationResult:
+        """Merge the LLM's ToC with the plan's cached sections and remember the page."""
+        if plan is None or not gen_result.success or not isinstance(gen_result.content, TocOutput):
+            return gen_result
+        merged = copy.copy(gen_result)
+        merged.content = plan.merge(gen_result.content)
+        if plan.sections:
+            usage = {**(gen_result.usage or {}), "ssm_lines_reused": plan.reused_lines}
+            if plan.matched:
+                usage["ssm_template_partial_hits"] = 1
+            merged.usage = usage
+        if self.ssm_cache is not None:
+            self.ssm_cache.store(plan, merged.content)
+        if self.section_memo is not None:
+            self.section_memo.record(plan.spec_key, plan.line_hashes, merged.content, self._should_keep_section)
+        return merged
+
+    def _build_subtractive_filter_op(self, gen_result, original_lines, filter_strategy, start_time) -> FilterOp:
+        """Apply the ToC returned by the LLM to the original lines and wrap it in a FilterOp."""
         # Step 3: Parse ToC result and apply filtering
         if gen_result.success and gen_result.content:
             # The content should be a TocOutput object from get_content_toc()
@@ -223,10 +544,7 @@ class FilterHero:
             lines_removed = len(original_lines) - len(lines_to_keep)
             filtered_data_token_size = None
             if filtered_text:
-                try:
-                    filtered_data_token_size = len(encoding.encode(filtered_text))
-                except Exception:
-                    filtered_data_token_size = None
+                filtered_data_token_size = self.token_ledger.count(filtered_text) or None
             
             # Build deletion ranges for metadata
             deletions_applied = self._build_deletion_ranges(lines_to_keep, len(original_lines), SSM_output)
@@ -262,7 +580,7 @@ class FilterHero:
                 filter_mode="subtractive"
             )
     
-    def _prepare_numbered_content(self, lines, max_line_length=None, line_format="[{n}]"):
+    def _prepare_numbered_content(self, lines, max_line_length=None, line_format="[{n}]", line_numbers=None, start=1):
         """
         Convert lines to numbered content for LLM processing.
         
@@ -278,6 +596,10 @@ class FilterHero:
             Format string for line numbers. Use {n} for the line number.
             Examples: "[{n}]" → "[1]", "L{n}:" → "L1:", "{n:04d}|" → "0001|"
             Default: "[{n}]"
+        line_numbers : list or None
+            1-based numbers of the lines to include. None includes every line.
+        start : int
+            Number of the first line when line_numbers is None. Default 1.
         
         Returns
         -------
@@ -286,7 +608,12 @@ class FilterHero:
         """
         numbered_lines = []
         
-        for i, line in enumerate(lines, 1):
+        if line_numbers is None:
+            selected = enumerate(lines, start)
+        else:
+            selected = ((n, lines[n - 1]) for n in line_numbers)
+        
+        for i, line in selected:
             # Optionally truncate long lines
             if max_line_length and len(line) > max_line_length:
                 display_line = f"{line[:max_line_length]}..."
@@ -420,17 +747,27 @@ class FilterHero:
         
         # If we have SSM data, use it to get section names for deleted ranges
         if ssm_output:
+            # A merged SSM (spec-group fan-out, cached template) can hold
+            # overlapping sections; a line kept by any of them, or already
+            # reported, is not reported as deleted again
+            covered = _merge_runs(
+                (section.start_line, section.end_line)
+                for section in ssm_output.sections
+                if self._should_keep_section(section)
+            )
             for section in ssm_output.sections:
-                # Check if this section should be deleted (not in lines_to_keep)
-                if not self._should_keep_section(section):
+                if self._should_keep_section(section):
+                    continue
+                for start, end in _uncovered_runs(section.start_line, section.end_line, covered):
                     deletions_applied.append({
-                        "start_line": section.start_line,
-                        "end_line": section.end_line,
+                        "start_line": start,
+                        "end_line": end,
                         "name": section.name,
                         "category": section.category,
                         "is_content": section.is_content,
                         "is_navigation": section.is_navigation
                     })
+                    covered = _merge_runs(covered + [(start, end)])
         else:
             # Fallback to the old method if no SSM data
             current_deletion_start = None
@@ -497,35 +834,80 @@ class FilterHero:
         filter_mode: str = "extractive",  # New parameter
         max_line_length_for_indexing: Optional[int] = 200,
         line_format: str = "[{n}]",
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None,
+        window_lines: Optional[int] = None,
+        window_overlap: int = 20
     ) -> FilterOp:
         """Async end-to-end filter phase with support for both modes."""
+        fail_key = self._failure_key(
+            text, extraction_spec, model_name, filter_mode, filter_strategy,
+            chunk_max_tokens, window_lines, window_overlap,
+        )
+        failed_op = self._cached_failure_op(fail_key, filter_strategy, filter_mode)
+        if failed_op is not None:
+            return failed_op
+
+        with priority_scope(priority):
+            filter_op = await self._run_async(
+                text, extraction_spec, filter_strategy, filter_mode,
+                max_line_length_for_indexing, line_format, model_name,
+                max_specs_per_call, chunk_max_tokens, window_lines, window_overlap
+            )
+        self._record_filter_outcome(fail_key, filter_op)
+        filter_op.source_token_size = self.token_ledger.peek(text)
+        return filter_op
+
+    async def _run_async(
+        self,
+        text,
+        extraction_spec,
+        filter_strategy,
+        filter_mode,
+        max_line_length_for_indexing,
+        line_format,
+        model_name,
+        max_specs_per_call=None,
+        chunk_max_tokens=None,
+        window_lines=None,
+        window_overlap=20
+    ) -> FilterOp:
         ts = time()
         
         if filter_mode == "subtractive":
-            # Subtractive mode doesn't have async implementation yet in engine
-            # For now, we'll use sync version in async wrapper
-            # TODO: Implement async subtractive filtering in engine
-            return self._run_subtractive(text, extraction_spec, filter_strategy, max_line_length_for_indexing, line_format)
+            return await self._run_subtractive_async(
+                text, extraction_spec, filter_strategy, max_line_length_for_indexing, line_format,
+                model_name=model_name, max_specs_per_call=max_specs_per_call,
+                window_lines=window_lines, window_overlap=window_overlap,
+            )
         else:
             # Extractive mode (existing async implementation)
             content = None
             filtered_data_token_size = None
             
-            gen_result = await self.engine.execute_filtering_async(
-                text, 
-                extraction_spec, 
-                filter_strategy,
-                model_name  
-            )
+            chunks = None
+            if chunk_max_tokens is not None:
+                # Encoding a large corpus is CPU-bound; keep it off the event loop
+                chunks = await asyncio.to_thread(self._extractive_chunks, text, chunk_max_tokens)
+            if chunks is not None:
+                gen_result = await self.engine.execute_chunked_filtering_async(
+                    chunks, extraction_spec, filter_strategy, model_name, max_specs_per_call=max_specs_per_call
+                )
+            else:
+                gen_result = await self.engine.execute_filtering_async(
+                    text, 
+                    extraction_spec, 
+                    filter_strategy,
+                    model_name,
+                    max_specs_per_call=max_specs_per_call
+                )
 
             if gen_result.success:
                 content = gen_result.content
                 if content is not None:
-                    try:
-                        filtered_data_token_size = len(encoding.encode(content))
-                    except Exception:
-                        filtered_data_token_size = None
+                    filtered_data_token_size = self.token_ledger.count(content) or None
 
             return FilterOp.from_result(
                 config=self.config,
@@ -541,6 +923,143 @@ class FilterHero:
             )
     
 
+    # ──────────────────────── streaming subtractive ────────────────────────
+    def run_stream(
+        self,
+        source: Any,
+        extraction_spec: WhatToRetain | List[WhatToRetain],
+        sink: Any,
+        filter_strategy: str = "relaxed",
+        window_lines: int = 500,
+        window_overlap: int = 20,
+        max_concurrent_windows: int = 4,
+        max_line_length_for_indexing: Optional[int] = 200,
+        line_format: str = "[{n}]",
+        model_name: Optional[str] = None,
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+    ) -> FilterOp:
+        """
+        Subtractive filtering of a stream of lines (see extracthero.streaming).
+
+        Lines are read lazily from ``source`` (a path, an open text file or
+        any iterable of lines) and numbered in windows; each window's kept
+        lines are written to ``sink`` (a file-like object or a callable taking
+        a string) as soon as its ToC arrives. Memory stays bounded by
+        ``max_concurrent_windows`` windows instead of the document size.
+
+        The sink receives what run(filter_mode="subtractive",
+        window_lines=...) would return as content; the returned FilterOp
+        carries the stitched SSM, line counts and usage, with content None.
+        If a window's ToC call fails, the lines written before it stay in the
+        sink and a failed FilterOp names the window.
+
+        The ssm_cache, section_memo and failure_cache need the whole document
+        and are not used here.
+        """
+        start_time = time()
+        stream = StreamedSubtraction(line_sink(sink), self._should_keep_section)
+        with priority_scope(priority), open_lines(source) as lines:
+            for batch in batched(iter_line_windows(lines, window_lines, window_overlap), max_concurrent_windows):
+                results = run_in_threads([
+                    partial(
+                        self._stream_window_toc, window, extraction_spec, filter_strategy,
+                        max_line_length_for_indexing, line_format, model_name, max_specs_per_call,
+                    )
+                    for window in batch
+                ], self.llm.max_fanout_workers)
+                if not all(stream.apply(window, result) for window, result in zip(batch, results)):
+                    break
+        return self._build_stream_filter_op(stream, filter_strategy, start_time)
+
+    async def run_stream_async(
+        self,
+        source: Any,
+        extraction_spec: WhatToRetain | List[WhatToRetain],
+        sink: Any,
+        filter_strategy: str = "contextual",
+        window_lines: int = 500,
+        window_overlap: int = 20,
+        max_concurrent_windows: int = 4,
+        max_line_length_for_indexing: Optional[int] = 200,
+        line_format: str = "[{n}]",
+        model_name: Optional[str] = None,
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None,
+    ) -> FilterOp:
+        """Async version of run_stream; the ToC calls of a batch run concurrently."""
+        start_time = time()
+        stream = StreamedSubtraction(line_sink(sink), self._should_keep_section)
+        with priority_scope(priority), open_lines(source) as lines:
+            for batch in batched(iter_line_windows(lines, window_lines, window_overlap), max_concurrent_windows):
+                results = await asyncio.gather(*(
+                    self._stream_window_toc_async(
+                        window, extraction_spec, filter_strategy, max_line_length_for_indexing,
+                        line_format, model_name, max_specs_per_call,
+                    )
+                    for window in batch
+                ))
+                if not all(stream.apply(window, result) for window, result in zip(batch, results)):
+                    break
+        return self._build_stream_filter_op(stream, filter_strategy, start_time)
+
+    def _stream_window_prompt(self, window, max_line_length_for_indexing, line_format) -> Tuple[str, int]:
+        """(numbered window, its last line number) for one streamed window."""
+        first, lines, _ = window
+        numbered = self._prepare_numbered_content(
+            lines, max_line_length=max_line_length_for_indexing, line_format=line_format, start=first
+        )
+        return numbered, first + len(lines) - 1
+
+    def _stream_window_toc(
+        self, window, extraction_spec, filter_strategy, max_line_length_for_indexing,
+        line_format, model_name, max_specs_per_call,
+    ) -> GenerationResult:
+        numbered, max_line = self._stream_window_prompt(window, max_line_length_for_indexing, line_format)
+        return self.engine.execute_subtractive_filtering(
+            numbered, extraction_spec, filter_strategy, model_name,
+            max_specs_per_call=max_specs_per_call, max_line=max_line,
+        )
+
+    async def _stream_window_toc_async(
+        self, window, extraction_spec, filter_strategy, max_line_length_for_indexing,
+        line_format, model_name, max_specs_per_call,
+    ) -> GenerationResult:
+        numbered, max_line = self._stream_window_prompt(window, max_line_length_for_indexing, line_format)
+        return await self.engine.execute_subtractive_filtering_async(
+            numbered, extraction_spec, filter_strategy, model_name,
+            max_specs_per_call=max_specs_per_call, max_line=max_line,
+        )
+
+    def _build_stream_filter_op(self, stream: StreamedSubtraction, filter_strategy: str, start_time: float) -> FilterOp:
+        if stream.error is not None:
+            return FilterOp.from_result(
+                config=self.config,
+                content=None,
+                usage=stream.usage_summary(),
+                start_time=start_time,
+                success=False,
+                error=f"Subtractive filtering failed: {stream.error}",
+                filter_strategy=filter_strategy,
+                filter_mode="subtractive"
+            )
+        SSM_output = TocOutput(sections=stream.sections)
+        return FilterOp.from_result(
+            config=self.config,
+            content=None,
+            usage=stream.usage_summary(),
+            start_time=start_time,
+            success=True,
+            error=None,
+            SSM=SSM_output,
+            filter_strategy=filter_strategy,
+            filter_mode="subtractive",
+            deletions_applied=self._build_deletion_ranges(set(), stream.line_count, SSM_output),
+            original_line_count=stream.line_count,
+            retained_line_count=stream.retained,
+            lines_removed=stream.line_count - stream.retained
+        )
+
     def _combine_usage(self, usage_list: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Combine usage dictionaries from multiple stages."""
         if not usage_list:
@@ -565,42 +1084,87 @@ class FilterHero:
         filter_ops: List[FilterOp], 
         initial_content: str
     ) -> List[Dict[str, int]]:
-        """Calculate token reduction details for each stage."""
+        """
+        Calculate token reduction details for each stage.
+
+        Each stage's source is the previous stage's output, so the counts the
+        FilterOps already carry are reused; only the initial content may need
+        an encode (and usually hits the ledger).
+        """
         reduction_details = []
-        encoding = tiktoken.encoding_for_model("gpt-4o-mini")
-        
-        try:
-            # Calculate initial token size
-            current_content = initial_content
-            current_token_size = len(encoding.encode(current_content))
-            
-            for op in filter_ops:
-                if op.success and op.content:
-                    new_token_size = len(encoding.encode(op.content))
-                    reduction_details.append({
-                        "source_token_size": current_token_size,
-                        "filtered_token_size": new_token_size
-                    })
-                    current_content = op.content
-                    current_token_size = new_token_size
-                else:
-                    # Failed operation - no reduction
-                    reduction_details.append({
-                        "source_token_size": current_token_size,
-                        "filtered_token_size": current_token_size
-                    })
-        
-        except Exception:
-            # If token calculation fails, return empty list
-            reduction_details = []
+        current_token_size = self.token_ledger.count(initial_content)
+
+        for op in filter_ops:
+            if op.success and op.content:
+                new_token_size = op.filtered_data_token_size or self.token_ledger.count(op.content)
+                reduction_details.append({
+                    "source_token_size": current_token_size,
+                    "filtered_token_size": new_token_size
+                })
+                current_token_size = new_token_size
+            else:
+                # Failed operation - no reduction
+                reduction_details.append({
+                    "source_token_size": current_token_size,
+                    "filtered_token_size": current_token_size
+                })
         
         return reduction_details
     
 
+    def _cached_chain_prefix(
+        self,
+        text: str | Dict[str, Any],
+        stages: List[Tuple[List[WhatToRetain], str]],
+    ) -> Tuple[List[str], List[FilterOp]]:
+        """
+        Look up the longest run of leading stages already in the chain cache.
+        
+        Returns
+        -------
+        Tuple[List[str], List[FilterOp]]
+            (per-stage cache keys, FilterOps of the cached prefix). Cached ops
+            report zero usage plus ``chain_prefix_hits: 1``.
+        """
+        if self.chain_cache is None:
+            return [], []
+        try:
+            prefix_keys = chain_prefix_keys(text, stages)
+        except Exception as e:
+            logger.warning("Chain prefix key failed: %s", e)
+            return [], []
+        
+        ops = []
+        for key in prefix_keys:
+            op = self.chain_cache.get(key)
+            if op is None:
+                break
+            op.usage = self._cached_stage_usage(op.usage)
+            ops.append(op)
+        return prefix_keys, ops
+
+    @staticmethod
+    def _cached_stage_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        cached = {
+            key: (0 if isinstance(value, (int, float)) and not isinstance(value, bool) else value)
+            for key, value in (usage or {}).items()
+        }
+        cached["chain_prefix_hits"] = 1
+        return cached
+
+    def _store_chain_stage(self, prefix_keys: List[str], index: int, filter_op: FilterOp) -> None:
+        if self.chain_cache is None or index >= len(prefix_keys):
+            return
+        try:
+            self.chain_cache.put(prefix_keys[index], filter_op)
+        except Exception as e:
+            logger.warning("Chain cache write failed: %s", e)
+
     def chain(
         self,
         text: str | Dict[str, Any],
         stages: List[Tuple[List[WhatToRetain], str]],
+        priority: Optional[int | str] = None,
     ) -> FilterChainOp:
         """
         Chain multiple filter operations synchronously.
@@ -611,6 +1175,8 @@ class FilterHero:
             Initial input
         stages : List[Tuple[List[WhatToRetain], str]]
             List of (extraction_spec, filter_strategy) tuples
+        priority : int | str | None
+            Scheduling class applied to every stage's LLM call
             
         Returns
         -------
@@ -626,15 +1192,23 @@ class FilterHero:
             initial_content = str(text)  # You might want to JSON serialize this
         else:
             initial_content = text
+        self.token_ledger.count(initial_content)
         
-        # Execute each stage
-        for extraction_spec, filter_strategy in stages:
-            filter_op = self.run(current_input, extraction_spec, filter_strategy)
+        # Reuse the longest cached prefix of stages
+        prefix_keys, filter_ops = self._cached_chain_prefix(text, stages)
+        if filter_ops:
+            current_input = filter_ops[-1].content
+        
+        # Execute each remaining stage
+        for index in range(len(filter_ops), len(stages)):
+            extraction_spec, filter_strategy = stages[index]
+            filter_op = self.run(current_input, extraction_spec, filter_strategy, priority=priority)
             filter_ops.append(filter_op)
             
             if not filter_op.success:
                 break  # Stop on first failure
                 
+            self._store_chain_stage(prefix_keys, index, filter_op)
             current_input = filter_op.content
         
         # Build the result
@@ -663,14 +1237,10 @@ class FilterHero:
                 final_content = op.content
                 break
         
-        # Calculate final token size
-        encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+        # Final token size: already counted by the stage that produced it
         final_token_size = None
         if final_content:
-            try:
-                final_token_size = len(encoding.encode(final_content))
-            except Exception:
-                final_token_size = None
+            final_token_size = self.token_ledger.count(final_content) or None
         
         # Combine usage from all stages
         combined_usage = self._combine_usage([op.usage for op in filter_ops if op.usage])
@@ -711,6 +1281,7 @@ class FilterHero:
         self,
         text: str | Dict[str, Any],
         stages: List[Tuple[List[WhatToRetain], str]],
+        priority: Optional[int | str] = None,
     ) -> FilterChainOp:
         """
         Chain multiple filter operations asynchronously.
@@ -721,6 +1292,8 @@ class FilterHero:
             Initial input
         stages : List[Tuple[List[WhatToRetain], str]]
             List of (extraction_spec, filter_strategy) tuples
+        priority : int | str | None
+            Scheduling class applied to every stage's LLM call
             
         Returns
         -------
@@ -736,15 +1309,23 @@ class FilterHero:
             initial_content = str(text)  # You might want to JSON serialize this
         else:
             initial_content = text
+        self.token_ledger.count(initial_content)
+        
+        # Reuse the longest cached prefix of stages
+        prefix_keys, filter_ops = self._cached_chain_prefix(text, stages)
+        if filter_ops:
+            current_input = filter_ops[-1].content
         
-        # Execute each stage
-        for extraction_spec, filter_strategy in stages:
-            filter_op = await self.run_async(current_input, extraction_spec, filter_strategy)
+        # Execute each remaining stage
+        for index in range(len(filter_ops), len(stages)):
+            extraction_spec, filter_strategy = stages[index]
+            filter_op = await self.run_async(current_input, extraction_spec, filter_strategy, priority=priority)
             filter_ops.append(filter_op)
             
             if not filter_op.success:
                 break  # Stop on first failure
                 
+            self._store_chain_stage(prefix_keys, index, filter_op)
             current_input = filter_op.content
         
         # Build the result (same logic as sync version)
@@ -773,14 +1354,10 @@ class FilterHero:
                 final_content = op.content
                 break
         
-        # Calculate final token size
-        encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+        # Final token size: already counted by the stage that produced it
         final_token_size = None
         if final_content:
-            try:
-                final_token_size = len(encoding.encode(final_content))
-            except Exception:
-                final_token_size = None
+            final_token_size = self.token_ledger.count(final_content) or None
         
         # Combine usage and build results
         combined_usage = self._combine_usage([op.usage for op in filter_ops if op.usage])
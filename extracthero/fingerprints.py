@@ -0,0 +1,86 @@
+# extracthero/fingerprints.py
+"""
+Canonical HTML fingerprints.
+
+Re-crawled pages are often byte-different only because of per-request noise:
+CSP nonces, CSRF tokens, cache-busting timestamps, tracking parameters and
+inline analytics scripts. ``canonical_html`` strips that noise so the same
+page hashes to the same ``html_fingerprint``, which ExtractHero uses as the
+key of its reduction cache.
+
+Only noise that is known to be volatile is removed: named query parameters,
+nonce/token attributes and token form fields. Numbers in paths, ids and
+other attribute values are kept even when they look like timestamps, since
+HtmlReducer keeps them (href, src, id, ...) and two pages differing there
+must not share a reduction.
+
+The canonical form is only used for hashing; it is never reduced or shown
+to the LLM.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+
+# Inline <script>/<style> bodies and comments: analytics snippets, hydration
+# state, build ids. External scripts keep their tag (and src) so a real
+# asset change still changes the fingerprint.
+_INLINE_BLOCK_RE = re.compile(
+    r"<(script|style|noscript)\b([^>]*)>.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+# Attributes whose value changes per request.
+_VOLATILE_ATTR_RE = re.compile(
+    r"""\s(?:nonce|integrity|data-nonce|data-csrf[\w-]*|data-request-id|data-timestamp|data-ts)"""
+    r"""\s*=\s*(?:"[^"]*"|'[^']*'|[^\s>]+)""",
+    re.IGNORECASE,
+)
+
+# <meta name="csrf-token" content="..."> and hidden form tokens.
+_TOKEN_NAMES = (
+    r"csrf[\w-]*|xsrf[\w-]*|_token|authenticity_token|__RequestVerificationToken"
+    r"|__VIEWSTATE\w*|__EVENTVALIDATION|form_build_id|nonce"
+)
+_TOKEN_TAG_RE = re.compile(
+    r"<(?:meta|input)\b[^>]*\b(?:name|id)\s*=\s*[\"']?(?:" + _TOKEN_NAMES + r")[\"'\s>][^>]*>",
+    re.IGNORECASE,
+)
+
+# Tracking and cache-busting query parameters inside URLs.
+_TRACKING_PARAM_RE = re.compile(
+    r"([?&](?:amp;)?)(?:utm_\w+|gclid|dclid|fbclid|msclkid|yclid|igshid|mc_cid|mc_eid|_ga|_gl|_hs\w+"
+    r"|_|_ts|ts|_dc|cb|cachebust(?:er)?|cache_bust|nocache|rnd)"
+    r"=[^&\"'\s>#]*",
+    re.IGNORECASE,
+)
+_SESSION_ID_RE = re.compile(r";jsessionid=[^?\"'\s>#]*", re.IGNORECASE)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EMPTY_QUERY_RE = re.compile(r"\?(?:&(?:amp;)?)+")
+
+
+def _strip_inline_block(match: re.Match) -> str:
+    tag, attrs = match.group(1), match.group(2)
+    return f"<{tag}{attrs}></{tag}>"
+
+
+def canonical_html(html: str) -> str:
+    """Return ``html`` with volatile, per-request noise removed."""
+    text = _COMMENT_RE.sub("", html)
+    text = _INLINE_BLOCK_RE.sub(_strip_inline_block, text)
+    text = _TOKEN_TAG_RE.sub("", text)
+    text = _VOLATILE_ATTR_RE.sub("", text)
+    text = _SESSION_ID_RE.sub("", text)
+    text = _TRACKING_PARAM_RE.sub(r"\1", text)
+    text = _EMPTY_QUERY_RE.sub("?", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def html_fingerprint(html: str) -> str:
+    """sha256 of the canonical form of ``html``."""
+    return hashlib.sha256(
+        canonical_html(html).encode("utf-8", "surrogatepass")
+    ).hexdigest()
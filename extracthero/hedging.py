@@ -0,0 +1,145 @@
+# extracthero/hedging.py
+"""
+Hedged requests for MyLLMService.
+
+A hedge is a duplicate of a slow LLM call: once the original has been running
+longer than the pXX latency observed for the same (model, operation, prompt
+size) it is re-sent, and whichever copy answers first wins. This trims the
+long tail of filter/parse calls at the price of a few duplicate prompts,
+which are reported in ``usage`` ("hedged_requests", "hedge_overhead_tokens",
+"hedge_overhead_cost").
+
+Async hedges cancel the losing copy. A sync call can't be interrupted, so
+the losing thread runs to completion: it keeps its admission slot, a hedge
+executor worker and the provider's full output cost. Sync hedges are
+therefore only fired while MyLLMService has idle admission capacity (see
+SlotLimiter.has_spare_slot); a saturated service simply waits on the
+original call.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+
+LatencyKey = Tuple[str, str, int]  # (model, operation, prompt-size bucket)
+
+
+@dataclass
+class HedgePolicy:
+    """
+    Opt-in hedging configuration.
+
+    Parameters
+    ----------
+    quantile : float, default 0.95
+        Latency quantile after which a duplicate is fired.
+    min_samples : int, default 20
+        Completed calls needed for a (model, operation, size) bucket before it
+        is hedged; cold buckets never hedge.
+    window : int, default 200
+        Number of recent latencies kept per bucket.
+    min_delay_s : float, default 1.0
+        Never hedge earlier than this, however fast the bucket usually is.
+    max_hedge_ratio : float, default 0.1
+        Upper bound on hedges / eligible calls, so a provider-wide slowdown
+        doesn't double the traffic.
+    operations : tuple of str
+        Operation names eligible for hedging ("_async" suffixes are ignored).
+    """
+    quantile: float = 0.95
+    min_samples: int = 20
+    window: int = 200
+    min_delay_s: float = 1.0
+    max_hedge_ratio: float = 0.1
+    operations: Tuple[str, ...] = ("filter_via_llm", "get_content_toc", "parse_via_llm")
+
+    def __post_init__(self):
+        if not 0 < self.quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        if self.min_samples < 1 or self.window < self.min_samples:
+            raise ValueError("need 1 <= min_samples <= window")
+
+    def applies_to(self, operation_name: Optional[str]) -> bool:
+        return normalize_operation(operation_name) in self.operations
+
+
+def normalize_operation(operation_name: Optional[str]) -> str:
+    """Sync and async variants of a prompt share latency statistics."""
+    name = operation_name or ""
+    return name[:-len("_async")] if name.endswith("_async") else name
+
+
+def size_bucket(prompt_tokens: int) -> int:
+    """Power-of-two prompt-size bucket: <1k, 1-2k, 2-4k, 4-8k ... tokens."""
+    return max(0, int(prompt_tokens).bit_length() - 10)
+
+
+class LatencyTracker:
+    """
+    Rolling latency samples per (model, operation, size bucket), plus the
+    hedge budget bookkeeping. Thread-safe.
+    """
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self._samples: Dict[LatencyKey, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self.eligible = 0
+        self.hedged = 0
+
+    def record(self, key: LatencyKey, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.policy.window)
+            samples.append(seconds)
+
+    def threshold(self, key: LatencyKey) -> Optional[float]:
+        """Hedge delay for ``key`` in seconds, or None while the bucket is cold."""
+        with self._lock:
+            samples = self._samples.get(key)
+            if not samples or len(samples) < self.policy.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(self.policy.quantile * len(ordered)))
+        return max(self.policy.min_delay_s, ordered[index])
+
+    def admit_call(self) -> None:
+        with self._lock:
+            self.eligible += 1
+
+    def try_spend_hedge(self) -> bool:
+        """Reserve one hedge if the budget allows it."""
+        with self._lock:
+            # Always allow one hedge so a small batch can still be rescued
+            if self.hedged >= max(1.0, self.policy.max_hedge_ratio * self.eligible):
+                return False
+            self.hedged += 1
+            return True
+
+
+def add_hedge_usage(winner_usage: Optional[dict], loser_usage: Optional[dict]) -> dict:
+    """
+    Fold the cost of the losing copy into the winner's usage.
+
+    When the loser was cancelled its usage is unknown; the provider has still
+    received (and bills) the prompt, so the winner's input side is used as the
+    estimate.
+    """
+    usage = dict(winner_usage or {})
+    if loser_usage:
+        overhead_tokens = loser_usage.get("total_tokens", 0) or 0
+        overhead_cost = loser_usage.get("total_cost", 0.0) or 0.0
+    else:
+        overhead_tokens = usage.get("input_tokens", 0) or 0
+        overhead_cost = usage.get("input_cost", 0.0) or 0.0
+
+    usage["hedged_requests"] = usage.get("hedged_requests", 0) + 1
+    usage["hedge_overhead_tokens"] = usage.get("hedge_overhead_tokens", 0) + overhead_tokens
+    usage["hedge_overhead_cost"] = usage.get("hedge_overhead_cost", 0.0) + overhead_cost
+    usage["total_cost"] = (usage.get("total_cost", 0.0) or 0.0) + overhead_cost
+    return usage
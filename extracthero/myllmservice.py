@@ -2,11 +2,19 @@
 
 import logging
 import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait as wait_futures
 from llmservice.base_service import BaseLLMService
 from llmservice.generation_engine import GenerationRequest, GenerationResult
 from typing import Optional, Union, List, Dict, Any
 import json
 from extracthero import prompts
+from extracthero.cache import ResponseCache, cache_key
+from extracthero.coalescing import SingleFlight, request_fingerprint, shared_copy
+from extracthero.hedging import HedgePolicy, LatencyKey, LatencyTracker, add_hedge_usage, normalize_operation, size_bucket
+from extracthero.rate_limits import ModelLane, SlotLimiter, priority_scope
 from pydantic import BaseModel, Field
 
 
@@ -123,13 +131,470 @@ class AnalysisResult(BaseModel):
 # ============================================================
 
 class MyLLMService(BaseLLMService):
-    def __init__(self, logger=None, max_concurrent_requests=200):
+    def __init__(
+        self,
+        logger=None,
+        max_concurrent_requests=200,
+        max_tpm: Optional[int] = None,
+        tpm_limits: Optional[Dict[str, int]] = None,
+        model_limits: Optional[Dict[str, Dict[str, int]]] = None,
+        max_rpm: int = 500,
+        hedge_policy: Optional[HedgePolicy] = None,
+        coalesce_requests: bool = True,
+        cache: Optional[ResponseCache] = None,
+        max_fanout_workers: int = 8,
+    ):
+        """
+        Parameters
+        ----------
+        max_concurrent_requests : int
+            Async concurrency cap shared by all models.
+        max_tpm : Optional[int]
+            Tokens-per-minute budget applied to every model without its own
+            TPM limit. None disables TPM admission for those models.
+        tpm_limits : Optional[Dict[str, int]]
+            Per-model tokens-per-minute budgets, e.g. {"gpt-4.1-mini": 2_000_000}.
+            Shorthand for model_limits={model: {"tpm": ...}}.
+        model_limits : Optional[Dict[str, Dict[str, int]]]
+            Per-model lanes with any of "rpm", "tpm" and "max_concurrent", e.g.
+            {"gpt-4.1-mini": {"rpm": 5000, "tpm": 2_000_000, "max_concurrent": 64}}.
+            Each model waits only on its own lane, so saturating one model's
+            quota doesn't starve calls routed to another.
+        max_rpm : int
+            Service-wide requests-per-minute ceiling enforced by BaseLLMService
+            across all models.
+        hedge_policy : Optional[HedgePolicy]
+            Opt-in hedging of slow filter / ToC / parse calls; see extracthero.hedging.
+            Sync calls only hedge while admission slots are idle, since the
+            losing copy can't be cancelled.
+        coalesce_requests : bool, default True
+            Let concurrent identical requests (same model, prompts and schema)
+            share one provider call; see extracthero.coalescing.
+        cache : Optional[ResponseCache]
+            Response cache for the operations in ``cached_operations``
+            (filter, ToC and parse calls), e.g. extracthero.cache.InMemoryLRUCache().
+            Hits and misses are reported in usage as cache_hits / cache_misses.
+        max_fanout_workers : int, default 8
+            Thread cap for each sync fan-out (spec groups, chunks, windows; see
+            extracthero.fanout). Nested fan-outs are capped at every level.
+
+        Requests are admitted through a priority queue sized by
+        max_concurrent_requests: calls issued inside ``priority_scope("interactive")``
+        (see FilterHero.run / ParseHero.run ``priority``) jump ahead of queued
+        "normal" and "bulk" calls. The same order applies inside each model
+        lane, for its concurrency slots and its RPM / TPM budget.
+        """
         super().__init__(
             logger=logging.getLogger(__name__),
             default_model_name="gpt-4o-mini",  # Updated from gpt-4.1-nano
-            max_rpm=500,
+            max_rpm=max_rpm,
             max_concurrent_requests=max_concurrent_requests,
         )
+        self.max_tpm = max_tpm
+        self.model_limits: Dict[str, Dict[str, int]] = {
+            model: dict(limits) for model, limits in (model_limits or {}).items()
+        }
+        for model, tpm in (tpm_limits or {}).items():
+            self.model_limits.setdefault(model, {})["tpm"] = tpm
+        self._lanes: Dict[str, ModelLane] = {}
+        self._lanes_lock = threading.Lock()
+        self._admission = SlotLimiter(max_concurrent_requests)
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self.set_hedge_policy(hedge_policy)
+        self._single_flight = SingleFlight() if coalesce_requests else None
+        self.cache = cache
+        if max_fanout_workers < 1:
+            raise ValueError("max_fanout_workers must be >= 1")
+        self.max_fanout_workers = max_fanout_workers
+
+    # Operations whose results depend only on the request and are worth caching
+    cached_operations = ("filter_via_llm", "get_content_toc", "parse_via_llm")
+
+    # Re-exported so callers can write ``with llm.priority_scope("bulk"):``
+    priority_scope = staticmethod(priority_scope)
+
+    def set_concurrency(self, max_concurrent_requests: int) -> None:
+        """Adjust service-wide parallelism (admission queue and async semaphore)."""
+        super().set_concurrency(max_concurrent_requests)
+        self._admission = SlotLimiter(max_concurrent_requests)
+
+    # ============================================================
+    # PER-MODEL RATE-LIMIT LANES
+    # ============================================================
+
+    def _lane_for(self, model: Optional[str]) -> Optional[ModelLane]:
+        """Return the lane for ``model``, or None when it has no limits configured."""
+        model = model or "gpt-4o-mini"
+        with self._lanes_lock:
+            lane = self._lanes.get(model)
+            if lane is None:
+                limits = self.model_limits.get(model, {})
+                lane = ModelLane(
+                    rpm=limits.get("rpm"),
+                    tpm=limits.get("tpm", self.max_tpm),
+                    max_concurrent=limits.get("max_concurrent"),
+                )
+                self._lanes[model] = lane
+        return lane if lane.is_active else None
+
+    def set_model_limits(
+        self,
+        model: str,
+        *,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+    ) -> None:
+        """Configure (or replace) the lane for one model at runtime."""
+        self.model_limits[model] = {
+            key: value
+            for key, value in (("rpm", rpm), ("tpm", tpm), ("max_concurrent", max_concurrent))
+            if value is not None
+        }
+        with self._lanes_lock:
+            self._lanes.pop(model, None)
+
+    def _estimate_prompt_tokens(self, generation_request: GenerationRequest) -> int:
+        """
+        Estimate the prompt size of a request before it is sent.
+
+        ~4 UTF-8 bytes per token: close to tiktoken for Latin text, on the
+        safe side for other scripts, and cheap enough to run on the event
+        loop for every call. Lanes reconcile it with reported usage.
+        """
+        size = sum(
+            len(prompt.encode("utf-8", "surrogatepass"))
+            for prompt in (generation_request.system_prompt, generation_request.user_prompt)
+            if prompt
+        )
+        return size // 4 + 1
+
+    def _settle_lane(
+        self,
+        lane: ModelLane,
+        estimated_tokens: int,
+        waits: tuple,
+        result: GenerationResult,
+    ) -> None:
+        """Reconcile the prompt estimate with reported usage and record lane waits."""
+        usage = result.usage or {}
+        actual = usage.get("total_tokens") or (
+            usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+        )
+        lane.settle(estimated_tokens, actual)
+
+        rpm_ms, tpm_ms = waits
+        if rpm_ms:
+            result.rpm_waited = True
+            result.rpm_waited_ms = (result.rpm_waited_ms or 0) + rpm_ms
+        if tpm_ms:
+            result.tpm_waited = True
+            result.tpm_waited_ms = (result.tpm_waited_ms or 0) + tpm_ms
+
+    # ============================================================
+    # HEDGED REQUESTS
+    # ============================================================
+
+    def set_hedge_policy(self, policy: Optional[HedgePolicy]) -> None:
+        """Enable (or with None disable) hedging. Resets collected latencies."""
+        self.hedge_policy = policy
+        self._latency = LatencyTracker(policy) if policy else None
+
+    def _hedge_key(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str]
+    ) -> Optional[LatencyKey]:
+        """Latency bucket of a request, or None when it is not eligible for hedging."""
+        operation = operation_name or generation_request.operation_name
+        if self._latency is None or not self.hedge_policy.applies_to(operation):
+            return None
+        return (
+            generation_request.model or "gpt-4o-mini",
+            normalize_operation(operation),
+            size_bucket(self._estimate_prompt_tokens(generation_request)),
+        )
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        if self._hedge_executor is None:
+            with self._lanes_lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=self._admission.slots,
+                        thread_name_prefix="extracthero-hedge",
+                    )
+        return self._hedge_executor
+
+    def _timed_attempt(self, generation_request, operation_name):
+        start = time.monotonic()
+        result = self._execute_admitted(generation_request, operation_name)
+        return result, time.monotonic() - start
+
+    async def _timed_attempt_async(self, generation_request, operation_name):
+        start = time.monotonic()
+        result = await self._execute_admitted_async(generation_request, operation_name)
+        return result, time.monotonic() - start
+
+    def _record_latency(self, key: LatencyKey, attempt) -> GenerationResult:
+        result, elapsed = attempt
+        if result.success:
+            self._latency.record(key, elapsed)
+        return result
+
+    def _finish_hedge(self, key: LatencyKey, winner, loser) -> GenerationResult:
+        """Record the winning copy's latency and charge the duplicate to its usage."""
+        result = self._record_latency(key, winner)
+        loser_usage = loser[0].usage if loser is not None else None
+        result.usage = add_hedge_usage(result.usage, loser_usage)
+        return result
+
+    def _submit_attempt(self, generation_request, operation_name):
+        # Each thread needs its own copy of the context (priority_scope etc.)
+        context = contextvars.copy_context()
+        return self._get_hedge_executor().submit(
+            context.run, self._timed_attempt, generation_request, operation_name
+        )
+
+    def _has_spare_capacity(self, generation_request: GenerationRequest) -> bool:
+        """
+        Whether a sync hedge can start without queueing. The losing copy of a
+        sync hedge runs to completion, so it must only use idle admission
+        slots, never take one from a queued request.
+        """
+        if not self._admission.has_spare_slot():
+            return False
+        lane = self._lane_for(generation_request.model)
+        return lane is None or lane.slots is None or lane.slots.has_spare_slot()
+
+    def _execute_hedged(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str],
+        key: LatencyKey
+    ) -> GenerationResult:
+        self._latency.admit_call()
+        delay = self._latency.threshold(key)
+        if delay is None:
+            return self._record_latency(key, self._timed_attempt(generation_request, operation_name))
+
+        primary = self._submit_attempt(generation_request, operation_name)
+        try:
+            return self._record_latency(key, primary.result(timeout=delay))
+        except FuturesTimeout:
+            pass
+        if not self._has_spare_capacity(generation_request) or not self._latency.try_spend_hedge():
+            return self._record_latency(key, primary.result())
+
+        backup = self._submit_attempt(generation_request, operation_name)
+        done, _ = wait_futures([primary, backup], return_when=FIRST_COMPLETED)
+        winner, loser = (primary, backup) if primary in done else (backup, primary)
+        if not winner.result()[0].success:
+            # A fast failure is no reason to drop the other copy
+            winner, loser = loser, winner
+        # A sync call can't be cancelled once started; the loser finishes in
+        # the background, holding its admission slot, and is charged at the
+        # estimated prompt cost.
+        return self._finish_hedge(key, winner.result(), loser.result() if loser.done() else None)
+
+    async def _execute_hedged_async(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str],
+        key: LatencyKey
+    ) -> GenerationResult:
+        self._latency.admit_call()
+        delay = self._latency.threshold(key)
+        if delay is None:
+            return self._record_latency(key, await self._timed_attempt_async(generation_request, operation_name))
+
+        primary = asyncio.ensure_future(self._timed_attempt_async(generation_request, operation_name))
+        backup = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if primary in done or not self._latency.try_spend_hedge():
+                return self._record_latency(key, await primary)
+
+            backup = asyncio.ensure_future(self._timed_attempt_async(generation_request, operation_name))
+            done, _ = await asyncio.wait({primary, backup}, return_when=asyncio.FIRST_COMPLETED)
+            winner, loser = (primary, backup) if primary in done else (backup, primary)
+            if not winner.result()[0].success:
+                await loser
+                winner, loser = loser, winner
+            return self._finish_hedge(key, winner.result(), loser.result() if loser.done() else None)
+        finally:
+            for task in (primary, backup):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    # ============================================================
+    # EXECUTION
+    # ============================================================
+
+    def _cache_key(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str]
+    ) -> Optional[str]:
+        if self.cache is None:
+            return None
+        operation = normalize_operation(operation_name or generation_request.operation_name)
+        if operation not in self.cached_operations:
+            return None
+        return cache_key(generation_request, operation)
+
+    def _cache_get(self, key: str) -> Optional[GenerationResult]:
+        # A broken or locked cache must never fail the call itself
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            self.logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def _store_in_cache(self, key: Optional[str], result: GenerationResult) -> GenerationResult:
+        """Cache a fresh result (followers of a coalesced call are already stored by their leader)."""
+        if key is None:
+            return result
+        usage = dict(result.usage or {})
+        if result.success and not usage.get("coalesced_requests"):
+            try:
+                self.cache.put(key, result)
+            except Exception as e:
+                self.logger.warning(f"Response cache write failed: {e}")
+        usage["cache_misses"] = 1
+        result.usage = usage
+        return result
+
+    def execute_generation(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        key = self._cache_key(generation_request, operation_name)
+        if key is not None:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return shared_copy(cached, counter="cache_hits")
+        return self._store_in_cache(key, self._execute_coalesced(generation_request, operation_name))
+
+    async def execute_generation_async(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        key = self._cache_key(generation_request, operation_name)
+        if key is not None:
+            # Disk tiers do blocking SQLite I/O (up to busy_timeout); keep it off the loop
+            cached = await asyncio.to_thread(self._cache_get, key)
+            if cached is not None:
+                return shared_copy(cached, counter="cache_hits")
+        result = await self._execute_coalesced_async(generation_request, operation_name)
+        if key is None:
+            return result
+        return await asyncio.to_thread(self._store_in_cache, key, result)
+
+    def _execute_coalesced(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        if self._single_flight is None:
+            return self._execute_uncoalesced(generation_request, operation_name)
+        return self._single_flight.do(
+            request_fingerprint(generation_request),
+            lambda: self._execute_uncoalesced(generation_request, operation_name),
+        )
+
+    async def _execute_coalesced_async(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        if self._single_flight is None:
+            return await self._execute_uncoalesced_async(generation_request, operation_name)
+        return await self._single_flight.do_async(
+            request_fingerprint(generation_request),
+            lambda: self._execute_uncoalesced_async(generation_request, operation_name),
+        )
+
+    def _execute_uncoalesced(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        key = self._hedge_key(generation_request, operation_name)
+        if key is not None:
+            return self._execute_hedged(generation_request, operation_name, key)
+        return self._execute_admitted(generation_request, operation_name)
+
+    async def _execute_uncoalesced_async(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        key = self._hedge_key(generation_request, operation_name)
+        if key is not None:
+            return await self._execute_hedged_async(generation_request, operation_name, key)
+        return await self._execute_admitted_async(generation_request, operation_name)
+
+    def _execute_admitted(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        admission = self._admission
+        admission.acquire_sync()
+        try:
+            return self._execute_in_lane(generation_request, operation_name)
+        finally:
+            admission.release()
+
+    async def _execute_admitted_async(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        admission = self._admission
+        await admission.acquire()
+        try:
+            return await self._execute_in_lane_async(generation_request, operation_name)
+        finally:
+            admission.release()
+
+    def _execute_in_lane(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        lane = self._lane_for(generation_request.model)
+        if lane is None:
+            return super().execute_generation(generation_request, operation_name)
+
+        estimated_tokens = self._estimate_prompt_tokens(generation_request) if lane.tpm_bucket else 0
+        waits = lane.enter_sync(estimated_tokens)
+        try:
+            result = super().execute_generation(generation_request, operation_name)
+        finally:
+            lane.leave()
+        self._settle_lane(lane, estimated_tokens, waits, result)
+        return result
+
+    async def _execute_in_lane_async(
+        self,
+        generation_request: GenerationRequest,
+        operation_name: Optional[str] = None
+    ) -> GenerationResult:
+        lane = self._lane_for(generation_request.model)
+        if lane is None:
+            return await super().execute_generation_async(generation_request, operation_name)
+
+        estimated_tokens = self._estimate_prompt_tokens(generation_request) if lane.tpm_bucket else 0
+        waits = await lane.enter(estimated_tokens)
+        try:
+            result = await super().execute_generation_async(generation_request, operation_name)
+        finally:
+            lane.leave()
+        self._settle_lane(lane, estimated_tokens, waits, result)
+        return result
 
     def parse_via_llm(
         self,
@@ -313,39 +778,33 @@ class MyLLMService(BaseLLMService):
 
 
 
-    def get_content_toc(
+    def _build_toc_request(
         self,
         numbered_corpus,
-        max_line, 
+        max_line,
         what_to_retain,
         model: Optional[str] = None,
-    ) -> GenerationResult:
-       
-        
+        operation_name: str = "get_content_toc",
+    ) -> GenerationRequest:
+        """Build the structured-output request shared by the sync and async ToC calls."""
         if model is None:
             model = "gpt-4.1-mini"
 
-        
         user_prompt = prompts.TOC.format( numbered_corpus=numbered_corpus,
                                           max_line=max_line,
                                           what_to_retain=what_to_retain)
-        
-        # len(original_lines)
-        
+
         # Use structured output for ToC
-        generation_request = GenerationRequest(
+        return GenerationRequest(
             user_prompt=user_prompt,
             model=model,
             response_schema=TocOutput,  # Use TocOutput schema
-            operation_name="get_content_toc",
+            operation_name=operation_name,
             verbosity="medium"
         )
 
-       
-        
-        result = self.execute_generation(generation_request)
-        
-        # Parse structured output and keep as TocOutput for proper handling
+    def _parse_toc_result(self, result: GenerationResult) -> GenerationResult:
+        """Turn a successful ToC generation into a TocOutput, or mark it failed."""
         if result.success:
             try:
                 # The content should already be parsed by the generation engine
@@ -359,9 +818,22 @@ class MyLLMService(BaseLLMService):
                 # Try to recover if possible
                 result.success = False
                 result.error_message = f"Failed to parse structured output: {e}"
-        
+
         return result
 
+    def get_content_toc(
+        self,
+        numbered_corpus,
+        max_line, 
+        what_to_retain,
+        model: Optional[str] = None,
+    ) -> GenerationResult:
+        generation_request = self._build_toc_request(
+            numbered_corpus, max_line, what_to_retain, model=model
+        )
+        result = self.execute_generation(generation_request)
+        return self._parse_toc_result(result)
+
     def get_deletions_via_llm(
         self,
         numbered_corpus: str,
@@ -579,6 +1051,26 @@ class MyLLMService(BaseLLMService):
         result = await self.execute_generation_async(generation_request)
         return result
 
+    async def get_content_toc_async(
+        self,
+        numbered_corpus,
+        max_line,
+        what_to_retain,
+        model: Optional[str] = None,
+    ) -> GenerationResult:
+        """
+        Async version of get_content_toc.
+        """
+        generation_request = self._build_toc_request(
+            numbered_corpus,
+            max_line,
+            what_to_retain,
+            model=model,
+            operation_name="get_content_toc_async",
+        )
+        result = await self.execute_generation_async(generation_request)
+        return self._parse_toc_result(result)
+
     async def parse_via_llm_async(
         self,
         corpus: str,
@@ -0,0 +1,330 @@
+# extracthero/near_duplicates.py
+"""
+Near-duplicate detection in front of ExtractHero's filter phase.
+
+Product-variant pages (size/colour variants, regional copies) reduce to
+almost the same text, yet each pays a full filter + parse. A
+NearDuplicateIndex fingerprints the reduced corpus with a 64-bit SimHash
+over word shingles and keeps an LSH index of earlier documents (per spec):
+
+• similarity ≥ reuse_threshold → reuse the earlier filter output, patched
+  with the lines that differ, and re-run only the parse call.
+• no line was added, deleted or changed (blank lines aside) → also reuse
+  the parsed content; no LLM call at all. A 64-bit SimHash cannot see a
+  single changed price, so similarity alone never skips the parse.
+• otherwise                    → normal extraction, then the document is indexed.
+
+Similarity is the SimHash agreement ``1 - hamming / 64``. The LSH index
+splits fingerprints into ``bands`` bands; any two fingerprints within
+``bands - 1`` bits share a band, so candidates are found without a scan.
+
+• NearDuplicateIndex       — in-memory, shared by a batch (extract_many,
+  ExtractPipeline).
+• SqliteNearDuplicateIndex — the same index persisted with
+  extracthero.sqlite_store.SqliteStore, shared across runs and processes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from extracthero.sqlite_store import SqliteStore
+
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_BITS = 64
+
+
+def simhash(text: str, shingle_size: int = 4) -> int:
+    """64-bit SimHash of the word ``shingle_size``-grams of ``text``."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = Counter([" ".join(words)])
+    else:
+        shingles = Counter(
+            " ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)
+        )
+    # Per-byte histograms: 8 additions per shingle instead of 64 bit tests
+    histograms = [[0] * 256 for _ in range(8)]
+    total = 0
+    for shingle, count in shingles.items():
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for position, byte in enumerate(digest):
+            histograms[position][byte] += count
+        total += count
+
+    fingerprint = 0
+    for position, histogram in enumerate(histograms):
+        shift = (7 - position) * 8  # big-endian, as int.from_bytes(digest, "big")
+        for bit in range(8):
+            ones = sum(count for value, count in enumerate(histogram) if value >> bit & 1)
+            if 2 * ones > total:
+                fingerprint |= 1 << (shift + bit)
+    return fingerprint
+
+
+def simhash_similarity(a: int, b: int) -> float:
+    return 1.0 - bin(a ^ b).count("1") / _BITS
+
+
+def near_duplicate_spec_key(*parts: Any) -> str:
+    """Key of the extraction settings a stored result is valid for."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8", "surrogatepass"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def patch_filtered(filtered: str, old_corpus: str, new_corpus: str) -> Tuple[str, bool]:
+    """
+    Carry an earlier filter output over to a near-identical corpus.
+
+    The output is rebuilt line by line: kept lines that were deleted from
+    the corpus are dropped, lines that changed one-for-one are substituted,
+    and any other new or changed lines are appended, so the parse call sees
+    every value that differs from the earlier page and none that is gone.
+    Lines are matched whole; a line that still occurs unchanged elsewhere in
+    the new corpus is kept as is.
+
+    Returns
+    -------
+    Tuple[str, bool]
+        (patched filter output, whether any non-blank corpus line was
+        added, deleted or changed).
+    """
+    old_lines, new_lines = old_corpus.split("\n"), new_corpus.split("\n")
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    opcodes = matcher.get_opcodes()
+    unchanged = {line for tag, i1, i2, _, _ in opcodes if tag == "equal" for line in old_lines[i1:i2]}
+
+    kept = set(filtered.split("\n"))
+    substitutes: Dict[str, str] = {}
+    removed: Set[str] = set()
+    extra: List[str] = []
+    changed = False
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        old_block, new_block = old_lines[i1:i2], new_lines[j1:j2]
+        changed |= any(line.strip() for line in old_block + new_block)
+        if tag == "replace" and len(old_block) == len(new_block):
+            pairs = list(zip(old_block, new_block))
+        else:
+            pairs = [(old, None) for old in old_block] + [(None, new) for new in new_block]
+        for old, new in pairs:
+            stale = old is not None and old.strip() and old not in unchanged
+            if stale and new is not None and old in kept:
+                # The same old line replaced differently elsewhere: append it
+                if substitutes.setdefault(old, new) != new and new.strip():
+                    extra.append(new)
+                continue
+            if stale:
+                removed.add(old)
+            if new is not None and new.strip():
+                extra.append(new)
+
+    output = [
+        substitutes.get(line, line)
+        for line in filtered.split("\n")
+        if line not in removed
+    ]
+    patched = "\n".join(output)
+    if extra:
+        patched = patched + "\n\n" + "\n".join(extra)
+    return patched, changed
+
+
+def _entry_id(spec_key: str, corpus: str) -> str:
+    return hashlib.sha256(f"{spec_key}\x00{corpus}".encode("utf-8", "surrogatepass")).hexdigest()
+
+
+@dataclass
+class NearDuplicateEntry:
+    """What is kept per indexed document."""
+    corpus: str       # filter input (reduced / trimmed text)
+    filtered: str     # filter output
+    content: Any      # parsed content
+
+
+@dataclass
+class NearDuplicateMatch:
+    entry: NearDuplicateEntry
+    similarity: float
+    filtered: str     # the entry's filter output patched for the new corpus
+    skip: bool        # True: reuse everything; False: reuse the filter output only
+
+
+class NearDuplicateIndex:
+    """
+    In-memory SimHash + LSH index of extracted documents.
+
+    Parameters
+    ----------
+    reuse_threshold : float, default 0.88
+        At or above this similarity the earlier filter output is reused and
+        only the parse call runs. Must be reachable by the LSH bands
+        (``reuse_threshold > 1 - bands / 64``).
+    bands : int, default 8
+        LSH bands the 64-bit fingerprint is split into.
+    bucket_size : int, default 64
+        Most recent documents remembered per band bucket.
+    max_entries : int, default 10_000
+        Documents kept (LRU); ignored by the SQLite index, which trims by bytes.
+    """
+
+    def __init__(
+        self,
+        reuse_threshold: float = 0.88,
+        bands: int = 8,
+        bucket_size: int = 64,
+        max_entries: int = 10_000,
+    ):
+        if _BITS % bands:
+            raise ValueError("bands must divide 64")
+        if not 0 < reuse_threshold <= 1:
+            raise ValueError("expected 0 < reuse_threshold <= 1")
+        self.reuse_threshold = reuse_threshold
+        self.bands = bands
+        self.bucket_size = bucket_size
+        self.max_entries = max_entries
+        self._band_bits = _BITS // bands
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, NearDuplicateEntry]" = OrderedDict()
+        self._buckets: Dict[str, List[Tuple[str, int]]] = {}
+        self.skips = 0
+        self.reuses = 0
+        self.misses = 0
+
+    # ──────────────────────── storage (overridden by the SQLite index) ────────────────────────
+    def _get_bucket(self, key: str) -> List[Tuple[str, int]]:
+        return self._buckets.get(key, [])
+
+    def _put_bucket(self, key: str, bucket: List[Tuple[str, int]]) -> None:
+        self._buckets[key] = bucket
+
+    def _get_entry(self, entry_id: str) -> Optional[NearDuplicateEntry]:
+        entry = self._entries.get(entry_id)
+        if entry is not None:
+            self._entries.move_to_end(entry_id)
+        return entry
+
+    def _put_entry(self, entry_id: str, entry: NearDuplicateEntry) -> None:
+        self._entries[entry_id] = entry
+        self._entries.move_to_end(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)  # stale bucket ids are skipped on lookup
+
+    # ──────────────────────── index ────────────────────────
+    def fingerprint(self, text: str) -> int:
+        return simhash(text)
+
+    def _band_keys(self, spec_key: str, fingerprint: int) -> List[str]:
+        mask = (1 << self._band_bits) - 1
+        return [
+            f"{spec_key}:{band}:{fingerprint >> (band * self._band_bits) & mask:x}"
+            for band in range(self.bands)
+        ]
+
+    def lookup(self, spec_key: str, fingerprint: int, corpus: str) -> Optional[NearDuplicateMatch]:
+        """Closest indexed document above reuse_threshold, or None."""
+        with self._lock:
+            candidates: Dict[str, float] = {}
+            for band_key in self._band_keys(spec_key, fingerprint):
+                for entry_id, other in self._get_bucket(band_key):
+                    if entry_id not in candidates:
+                        candidates[entry_id] = simhash_similarity(fingerprint, other)
+            # The same corpus seen before first, then closest first;
+            # ids whose entry was evicted are skipped
+            exact_id = _entry_id(spec_key, corpus)
+            ranked = sorted(candidates.items(), key=lambda item: (item[0] != exact_id, -item[1]))
+            for entry_id, similarity in ranked:
+                if similarity < self.reuse_threshold:
+                    break
+                entry = self._get_entry(entry_id)
+                if entry is None:
+                    continue
+                filtered, changed = patch_filtered(entry.filtered, entry.corpus, corpus)
+                # Only an unchanged corpus reuses the parsed content
+                skip = not changed
+                if skip:
+                    self.skips += 1
+                else:
+                    self.reuses += 1
+                return NearDuplicateMatch(entry, similarity, filtered, skip)
+            self.misses += 1
+            return None
+
+    def add(self, spec_key: str, fingerprint: int, entry: NearDuplicateEntry) -> None:
+        entry_id = _entry_id(spec_key, entry.corpus)
+        with self._lock:
+            self._put_entry(entry_id, entry)
+            for band_key in self._band_keys(spec_key, fingerprint):
+                bucket = [item for item in self._get_bucket(band_key) if item[0] != entry_id]
+                bucket.append((entry_id, fingerprint))
+                self._put_bucket(band_key, bucket[-self.bucket_size:])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "skips": self.skips, "reuses": self.reuses, "misses": self.misses}
+
+
+class SqliteNearDuplicateIndex(NearDuplicateIndex):
+    """
+    NearDuplicateIndex persisted in a SqliteStore, so later runs (and other
+    worker processes) find near-duplicates of documents extracted before.
+
+    Bucket updates are read-modify-write; concurrent writers may drop each
+    other's newest entries, which only costs a missed reuse. Values are
+    pickled; only point it at a database written by your own workers.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600,
+        table: str = "near_duplicates",
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.store = SqliteStore(path, table=table, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    def _load(self, key: str) -> Any:
+        data = self.store.get_bytes(key)
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception:
+            return None
+
+    def _get_bucket(self, key: str) -> List[Tuple[str, int]]:
+        return self._load(f"band:{key}") or []
+
+    def _put_bucket(self, key: str, bucket: List[Tuple[str, int]]) -> None:
+        self.store.put_bytes(f"band:{key}", pickle.dumps(bucket, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _get_entry(self, entry_id: str) -> Optional[NearDuplicateEntry]:
+        return self._load(f"doc:{entry_id}")
+
+    def _put_entry(self, entry_id: str, entry: NearDuplicateEntry) -> None:
+        self.store.put_bytes(f"doc:{entry_id}", pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def clear(self) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.store.stats(), "skips": self.skips, "reuses": self.reuses, "misses": self.misses}
@@ -2,10 +2,13 @@
 
 # to run python -m extracthero.parse_engine
 
+import asyncio
+from functools import partial
 from typing import Any, Dict, List, Optional, Union
 from llmservice.generation_engine import GenerationResult
+from extracthero.fanout import merge_generation_results, merge_parsed, run_in_threads, spec_groups
 from extracthero.myllmservice import MyLLMService
-from extracthero.schemas import WhatToRetain
+from extracthero.schemas import FrozenWhatToRetain, WhatToRetain
 
 
 class ParseEngine:
@@ -23,13 +26,22 @@ class ParseEngine:
         items: WhatToRetain | List[WhatToRetain],
         enforce_llm_based_parse: bool = False,
         model_name: Optional[str] = None, 
-        content_output_format="json"
+        content_output_format="json",
+        max_specs_per_call: Optional[int] = None
     ) -> GenerationResult:
         """
         Execute parsing using LLM.
         
-        Always uses LLM parsing for all inputs.
+        Always uses LLM parsing for all inputs. With ``max_specs_per_call``
+        the items are parsed by concurrent calls and the outputs merged.
         """
+        groups = spec_groups(items, max_specs_per_call)
+        if len(groups) > 1:
+            results = run_in_threads([
+                partial(self._parse_via_llm, corpus, group, model_name, content_output_format=content_output_format)
+                for group in groups
+            ], self.llm.max_fanout_workers)
+            return merge_generation_results(results, merge_parsed)
         return self._parse_via_llm(corpus, items, model_name, content_output_format=content_output_format)
 
     async def execute_parsing_async(
@@ -37,10 +49,19 @@ class ParseEngine:
         corpus: str | Dict[str, Any],
         items: WhatToRetain | List[WhatToRetain],
         enforce_llm_based_parse: bool = False,
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        content_output_format="json",
+        max_specs_per_call: Optional[int] = None
     ) -> GenerationResult:
         """Async version of execute_parsing."""
-        return await self._parse_via_llm_async(corpus, items, model_name)
+        groups = spec_groups(items, max_specs_per_call)
+        if len(groups) > 1:
+            results = await asyncio.gather(*(
+                self._parse_via_llm_async(corpus, group, model_name, content_output_format=content_output_format)
+                for group in groups
+            ))
+            return merge_generation_results(list(results), merge_parsed)
+        return await self._parse_via_llm_async(corpus, items, model_name, content_output_format=content_output_format)
 
     # ──────────────────────── Private Methods ────────────────────────
 
@@ -79,7 +100,8 @@ class ParseEngine:
         self, 
         corpus: str | Dict[str, Any], 
         items: WhatToRetain | List[WhatToRetain],
-        model_name: Optional[str] = None
+        model_name: Optional[str] = None,
+        content_output_format="json"
     ) -> GenerationResult:
         """Async LLM parsing."""
         try:
@@ -93,7 +115,7 @@ class ParseEngine:
             model = model_name or "gpt-4o-mini"
             
             # Call async LLM
-            return await self.llm.parse_via_llm_async(corpus_str, prompt, model=model)
+            return await self.llm.parse_via_llm_async(corpus_str, prompt, model=model, content_output_format=content_output_format)
             
         except Exception as e:
             return GenerationResult(
@@ -123,7 +145,7 @@ class ParseEngine:
 
     def _build_parsing_prompt(self, items: WhatToRetain | List[WhatToRetain]) -> str:
         """Build the parsing prompt from WhatToRetain specifications."""
-        if isinstance(items, WhatToRetain):
+        if isinstance(items, (WhatToRetain, FrozenWhatToRetain)):
             return items.compile_parser()
         else:
             return "\n\n".join(item.compile_parser() for item in items)
@@ -16,6 +16,7 @@ from typing import Any, Dict, List, Optional, Union
 from extracthero.myllmservice import MyLLMService
 from extracthero.schemas import ExtractConfig, ParseOp, WhatToRetain
 from extracthero.parse_engine import ParseEngine
+from extracthero.rate_limits import priority_scope
 
 import warnings
 warnings.filterwarnings(
@@ -46,7 +47,9 @@ class ParseHero:
         items: WhatToRetain | List[WhatToRetain],
         enforce_llm_based_parse: bool = False,
         model_name: Optional[str] = None,
-        content_output_format="json"
+        content_output_format="json",
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None
     ) -> ParseOp:
         """
         Parse the corpus into structured data using the WhatToRetain specifications.
@@ -61,6 +64,12 @@ class ParseHero:
             Kept for compatibility (always uses LLM now)
         model_name : Optional[str]
             Specific model to use (default: gpt-4o-mini)
+        priority : int | str | None
+            Scheduling class for the LLM call: "interactive", "normal", "bulk"
+            or an int (lower is admitted first). None inherits the caller's.
+        max_specs_per_call : Optional[int]
+            Parse a list of items with concurrent LLM calls of at most this
+            many items each; the outputs are merged into one result.
             
         Returns
         -------
@@ -75,13 +84,15 @@ class ParseHero:
         # logger.debug(content_output_format)
 
         # Use ParseEngine for core logic
-        generation_result = self.engine.execute_parsing(
-            corpus=corpus,
-            items=items,
-            enforce_llm_based_parse=enforce_llm_based_parse,
-            model_name=model_name,
-            content_output_format=content_output_format
-        )
+        with priority_scope(priority):
+            generation_result = self.engine.execute_parsing(
+                corpus=corpus,
+                items=items,
+                enforce_llm_based_parse=enforce_llm_based_parse,
+                model_name=model_name,
+                content_output_format=content_output_format,
+                max_specs_per_call=max_specs_per_call
+            )
 
         # Build ParseOp result
         return ParseOp.from_result(
@@ -100,6 +111,9 @@ class ParseHero:
         items: WhatToRetain | List[WhatToRetain],
         enforce_llm_based_parse: bool = False,
         model_name: Optional[str] = None,
+        content_output_format="json",
+        priority: Optional[int | str] = None,
+        max_specs_per_call: Optional[int] = None
     ) -> ParseOp:
         """
         Async version of run method.
@@ -114,6 +128,12 @@ class ParseHero:
             Kept for compatibility (always uses LLM now)
         model_name : Optional[str]
             Specific model to use (default: gpt-4o-mini)
+        priority : int | str | None
+            Scheduling class for the LLM call: "interactive", "normal", "bulk"
+            or an int (lower is admitted first). None inherits the caller's.
+        max_specs_per_call : Optional[int]
+            Parse a list of items with concurrent LLM calls of at most this
+            many items each; the outputs are merged into one result.
             
         Returns
         -------
@@ -123,12 +143,15 @@ class ParseHero:
         start_ts = time()
 
         # Use ParseEngine for core async logic
-        generation_result = await self.engine.execute_parsing_async(
-            corpus=corpus,
-            items=items,
-            enforce_llm_based_parse=enforce_llm_based_parse,
-            model_name=model_name
-        )
+        with priority_scope(priority):
+            generation_result = await self.engine.execute_parsing_async(
+                corpus=corpus,
+                items=items,
+                enforce_llm_based_parse=enforce_llm_based_parse,
+                model_name=model_name,
+                content_output_format=content_output_format,
+                max_specs_per_call=max_specs_per_call
+            )
 
         # Build ParseOp result
         return ParseOp.from_result(
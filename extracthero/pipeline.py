@@ -0,0 +1,306 @@
+# extracthero/pipeline.py
+# run with: python -m extracthero.pipeline
+"""
+ExtractPipeline — streaming, stage-parallel runner for ExtractHero.
+
+• Each page flows through Reduce → Trim → Filter → Parse.
+• Every stage has its own worker pool and a bounded input queue, so page N+1
+  can be reduced while page N waits on the filter LLM call.
+• Backpressure: a full queue blocks the stage before it, so memory stays
+  bounded by queue_size × number of stages regardless of batch size.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from time import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from extracthero.extracthero import ExtractHero
+from extracthero.schemas import ExtractOp, FilterOp, ParseOp, WhatToRetain
+from extracthero.utils import load_html
+
+logger = logging.getLogger(__name__)
+
+
+_DONE = object()  # end-of-stream marker passed between stage queues
+
+
+@dataclass
+class PipelineJob:
+    """State of one document as it moves through the pipeline stages."""
+    index: int
+    text: Any
+    extraction_spec: WhatToRetain | List[WhatToRetain]
+    start_time: float
+    stage_tokens: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    corpus: Any = None
+    reduced_html: Optional[str] = None
+    html_reduce_op: Optional[Any] = None
+    trimmed_to: Optional[int] = None
+    near_duplicate_key: Optional[Tuple[str, int]] = None
+    near_duplicate_match: Optional[Any] = None
+    filter_op: Optional[FilterOp] = None
+    filter_output_tokens: int = 0
+    parse_op: Optional[ParseOp] = None
+
+    result: Optional[ExtractOp] = None  # set once the job is finished (or failed early)
+
+
+class ExtractPipeline:
+    """
+    Stage-parallel version of ``ExtractHero.extract_async`` for large batches.
+
+    Parameters
+    ----------
+    extract_hero : ExtractHero
+        Supplies the LLM service, reduction executor and phase helpers.
+    queue_size : int, default 8
+        Capacity of each stage's input queue.
+    reduce_workers : int, default 2
+        Concurrent HTML reductions (they run on ``extract_hero``'s reduction executor).
+    filter_workers : int, default 16
+        Concurrent filter-phase LLM calls.
+    parse_workers : int, default 16
+        Concurrent parse-phase LLM calls.
+    """
+
+    def __init__(
+        self,
+        extract_hero: Optional[ExtractHero] = None,
+        queue_size: int = 8,
+        reduce_workers: int = 2,
+        filter_workers: int = 16,
+        parse_workers: int = 16,
+    ):
+        if min(queue_size, reduce_workers, filter_workers, parse_workers) < 1:
+            raise ValueError("queue_size and worker counts must be >= 1")
+        self.extract_hero = extract_hero or ExtractHero()
+        self.queue_size = queue_size
+        self.reduce_workers = reduce_workers
+        self.filter_workers = filter_workers
+        self.parse_workers = parse_workers
+
+    # ──────────────────────── stages ────────────────────────
+    async def _reduce_stage(self, job: PipelineJob, opts: Dict[str, Any]) -> None:
+        job.corpus, job.reduced_html, job.html_reduce_op = await self.extract_hero._reduce_html_async(
+            job.text, opts["reduce_html"], job.stage_tokens
+        )
+
+    async def _trim_stage(self, job: PipelineJob, opts: Dict[str, Any]) -> None:
+        job.corpus, job.trimmed_to = await self.extract_hero._trim_phase_async(
+            job.text, job.corpus, opts["trim_char_length"], job.stage_tokens, opts["trim_token_length"],
+            opts["trim_strategy"], job.extraction_spec
+        )
+
+    async def _filter_stage(self, job: PipelineJob, opts: Dict[str, Any]) -> None:
+        hero = self.extract_hero
+        job.near_duplicate_key, job.near_duplicate_match, filter_input_tokens = await asyncio.to_thread(
+            hero._filter_inputs,
+            job.corpus, job.extraction_spec, opts["filter_strategy"], opts["model_name"], opts["content_output_format"]
+        )
+        if job.near_duplicate_match is not None:
+            job.filter_op = hero._near_duplicate_filter_op(job.near_duplicate_match, job.corpus, opts["filter_strategy"])
+        else:
+            job.filter_op = await hero.filter_hero.run_async(
+                job.corpus,
+                job.extraction_spec,
+                filter_strategy=opts["filter_strategy"],
+                priority=opts["priority"],
+                max_specs_per_call=opts["max_specs_per_call"],
+                chunk_max_tokens=opts["chunk_max_tokens"]
+            )
+        job.filter_output_tokens = hero._record_filter_tokens(filter_input_tokens, job.filter_op, job.stage_tokens)
+
+        if not job.filter_op.success:
+            job.result = ExtractOp.from_operations(
+                filter_op=job.filter_op,
+                parse_op=hero._skipped_parse_op("Filter phase failed - parse not attempted"),
+                start_time=job.start_time,
+                content=None,
+                reduced_html=job.reduced_html,
+                html_reduce_op=job.html_reduce_op,
+                stage_tokens=job.stage_tokens,
+                trimmed_to=job.trimmed_to
+            )
+
+    async def _parse_stage(self, job: PipelineJob, opts: Dict[str, Any]) -> None:
+        hero = self.extract_hero
+        if job.near_duplicate_match is not None and job.near_duplicate_match.skip:
+            job.parse_op = hero._near_duplicate_parse_op(job.near_duplicate_match)
+        else:
+            job.parse_op = await hero.parse_hero.run_async(
+                job.filter_op.content,
+                job.extraction_spec,
+                model_name=opts["model_name"],
+                content_output_format=opts["content_output_format"],
+                priority=opts["priority"],
+                max_specs_per_call=opts["max_specs_per_call"]
+            )
+        hero._record_parse_tokens(job.filter_output_tokens, job.parse_op, job.stage_tokens)
+        hero._remember_near_duplicate(job.near_duplicate_key, job.corpus, job.filter_op, job.parse_op)
+
+        job.result = ExtractOp.from_operations(
+            filter_op=job.filter_op,
+            parse_op=job.parse_op,
+            start_time=job.start_time,
+            content=job.parse_op.content if job.parse_op.success else None,
+            reduced_html=job.reduced_html,
+            html_reduce_op=job.html_reduce_op,
+            stage_tokens=job.stage_tokens,
+            trimmed_to=job.trimmed_to
+        )
+
+    # ──────────────────────── plumbing ────────────────────────
+    async def _run_stage(
+        self,
+        name: str,
+        step: Callable[[PipelineJob, Dict[str, Any]], Awaitable[None]],
+        workers: int,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue,
+        opts: Dict[str, Any],
+    ) -> None:
+        """Run ``workers`` consumers of ``inbox`` and forward every job to ``outbox``."""
+
+        async def worker() -> None:
+            while True:
+                job = await inbox.get()
+                if job is _DONE:
+                    # Put the marker back so sibling workers also see it.
+                    await inbox.put(_DONE)
+                    return
+                if job.result is None:
+                    try:
+                        await step(job, opts)
+                    except Exception as e:
+                        logger.warning("Pipeline stage %s failed for item %d: %s", name, job.index, e)
+                        job.result = self.extract_hero._failed_extract_op(
+                            f"{name} stage raised: {e}", job.start_time
+                        )
+                await outbox.put(job)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            await outbox.put(_DONE)
+
+    async def run(
+        self,
+        documents: Iterable[Any],
+        extraction_spec: WhatToRetain | List[WhatToRetain] | None = None,
+        filter_strategy: str = "contextual",
+        reduce_html: bool = True,
+        model_name: Optional[str] = None,
+        trim_char_length: Optional[int] = None,
+        trim_token_length: Optional[int] = None,
+        trim_strategy: str = "head",
+        content_output_format="json",
+        priority: Optional[int | str] = "bulk",
+        max_specs_per_call: Optional[int] = None,
+        chunk_max_tokens: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[int, ExtractOp]]:
+        """
+        Stream documents through the pipeline, yielding results as they complete.
+
+        ``documents`` takes the same items as ``ExtractHero.extract_many_async``:
+        plain documents sharing ``extraction_spec`` or ``(document, spec)`` tuples.
+        Pipeline work defaults to the "bulk" priority class so interactive
+        extractions sharing the same LLM service are admitted ahead of it.
+
+        Yields
+        ------
+        Tuple[int, ExtractOp]
+            Input position of the document and its ExtractOp.
+
+        Raises
+        ------
+        Exception
+            Whatever iterating ``documents`` raised, after the documents read
+            before the error have been yielded.
+        """
+        opts = {
+            "filter_strategy": filter_strategy,
+            "reduce_html": reduce_html,
+            "model_name": model_name,
+            "trim_char_length": trim_char_length,
+            "trim_token_length": trim_token_length,
+            "trim_strategy": trim_strategy,
+            "content_output_format": content_output_format,
+            "priority": priority,
+            "max_specs_per_call": max_specs_per_call,
+            "chunk_max_tokens": chunk_max_tokens,
+        }
+        stages = [
+            ("reduce", self._reduce_stage, self.reduce_workers),
+            ("trim", self._trim_stage, 1),
+            ("filter", self._filter_stage, self.filter_workers),
+            ("parse", self._parse_stage, self.parse_workers),
+        ]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in stages]
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def feed() -> None:
+            # The marker goes out even if ``documents`` raises, so the stages
+            # drain and the error reaches the caller instead of a hang.
+            try:
+                for index, item in enumerate(documents):
+                    start_time = time()
+                    try:
+                        text, spec = self.extract_hero._normalize_batch_item(item, extraction_spec)
+                        job = PipelineJob(index=index, text=text, extraction_spec=spec, start_time=start_time)
+                    except ValueError as e:
+                        job = PipelineJob(index=index, text=item, extraction_spec=extraction_spec, start_time=start_time)
+                        job.result = self.extract_hero._failed_extract_op(str(e), start_time)
+                    await queues[0].put(job)
+            finally:
+                await queues[0].put(_DONE)
+
+        tasks = [asyncio.create_task(feed())]
+        for i, (name, step, workers) in enumerate(stages):
+            outbox = queues[i + 1] if i + 1 < len(queues) else results
+            tasks.append(asyncio.create_task(self._run_stage(name, step, workers, queues[i], outbox, opts)))
+
+        try:
+            while True:
+                job = await results.get()
+                if job is _DONE:
+                    break
+                yield job.index, job.result
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_all(
+        self,
+        documents: Iterable[Any],
+        extraction_spec: WhatToRetain | List[WhatToRetain] | None = None,
+        **kwargs: Any,
+    ) -> List[ExtractOp]:
+        """Run the pipeline and return the ExtractOps in input order."""
+        collected: Dict[int, ExtractOp] = {}
+        async for index, op in self.run(documents, extraction_spec, **kwargs):
+            collected[index] = op
+        return [collected[i] for i in range(len(collected))]
+
+
+# ─────────────────────────────── demo ───────────────────────────────
+async def main() -> None:
+    pipeline = ExtractPipeline(queue_size=4)
+    specs = [WhatToRetain(name="reverse_voltage_value", desc="reverse voltage value in units of V")]
+
+    html_doc = load_html("extracthero/real_life_samples/1/nexperia-aa4afebbd10348ec91358f07facf06f1.html")
+
+    async for index, op in pipeline.run([html_doc] * 3, specs):
+        status = "✅" if op.success else "❌"
+        print(f"{status} doc {index}: {op.content if op.success else op.error} ({op.elapsed_time:.2f}s)")
+
+    pipeline.extract_hero.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
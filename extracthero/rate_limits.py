@@ -0,0 +1,404 @@
+# extracthero/rate_limits.py
+"""
+Client-side admission control used by MyLLMService.
+
+• TokenBucket — queueing bucket for tokens-per-minute style limits. A
+  request queues its estimated size and is admitted in priority order as
+  the bucket refills, so large prompts queue fairly behind earlier ones
+  instead of being starved by a stream of small requests.
+• SlotLimiter — priority-ordered counting semaphore that threads and event
+  loops can share.
+• ModelLane   — the RPM / TPM / concurrency limits of a single model.
+• Priority classes — "interactive" requests are admitted ahead of queued
+  "bulk" work, both for concurrency slots and for RPM / TPM budget. The
+  active priority travels in a context variable set by priority_scope(),
+  so it reaches MyLLMService without every prompt method taking an extra
+  argument.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple, Union
+
+
+# Lower value = admitted first
+PRIORITY_CLASSES = {
+    "interactive": 0,
+    "normal": 5,
+    "bulk": 10,
+}
+DEFAULT_PRIORITY = PRIORITY_CLASSES["normal"]
+
+_current_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "extracthero_priority", default=DEFAULT_PRIORITY
+)
+
+
+def resolve_priority(priority: Union[int, str, None]) -> int:
+    """Map a priority class name (or raw int) to its numeric priority."""
+    if priority is None:
+        return DEFAULT_PRIORITY
+    if isinstance(priority, str):
+        try:
+            return PRIORITY_CLASSES[priority]
+        except KeyError:
+            raise ValueError(
+                f"Unknown priority class {priority!r}; expected one of {sorted(PRIORITY_CLASSES)}"
+            ) from None
+    return int(priority)
+
+
+def current_priority() -> int:
+    """Priority of the request being issued from the current context."""
+    return _current_priority.get()
+
+
+@contextmanager
+def priority_scope(priority: Union[int, str, None]) -> Iterator[None]:
+    """
+    Run LLM calls issued inside the block at ``priority``.
+    None leaves the surrounding priority unchanged.
+    """
+    if priority is None:
+        yield
+        return
+    token = _current_priority.set(resolve_priority(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class _Reservation:
+    """A queued TokenBucket acquirer."""
+    __slots__ = ("amount", "priority", "seq", "granted", "cancelled")
+
+    def __init__(self, amount: float, priority: int, seq: int):
+        self.amount = amount
+        self.priority = priority
+        self.seq = seq
+        self.granted = False
+        self.cancelled = False
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket usable from both sync and async code.
+
+    Callers queue their amount and are admitted in priority order (lowest
+    value first, then arrival order) as the bucket refills. A queued request
+    is never overtaken by a later one of the same class, so large prompts
+    aren't starved by a stream of small ones, while an interactive request
+    only waits for budget already promised to other interactive requests.
+
+    Parameters
+    ----------
+    capacity : float
+        Maximum burst size (e.g. the TPM limit).
+    refill_per_second : float
+        Refill rate (e.g. TPM / 60).
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill_per_second must be positive")
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiters: list = []  # heap of (priority, seq, _Reservation)
+        self._seq = itertools.count()
+
+    @classmethod
+    def per_minute(cls, limit: float) -> "TokenBucket":
+        """Bucket for a per-minute limit (TPM / RPM)."""
+        return cls(limit, limit / 60.0)
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (negative after charges beyond the budget)."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, r in self._waiters if not r.cancelled)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def _grant_ready(self) -> None:
+        """Admit queued reservations from the head while the bucket covers them."""
+        self._refill()
+        while self._waiters:
+            reservation = self._waiters[0][2]
+            if not reservation.cancelled:
+                if self._tokens < reservation.amount:
+                    return
+                self._tokens -= reservation.amount
+                reservation.granted = True
+            heapq.heappop(self._waiters)
+
+    def _enqueue(self, amount: float, priority: Optional[int]) -> _Reservation:
+        # A single request larger than the bucket can never fit; let it through
+        # once the bucket is full rather than blocking forever.
+        amount = min(float(amount), self.capacity)
+        if priority is None:
+            priority = current_priority()
+        with self._lock:
+            reservation = _Reservation(amount, priority, next(self._seq))
+            heapq.heappush(self._waiters, (priority, reservation.seq, reservation))
+            self._grant_ready()
+        return reservation
+
+    def _poll(self, reservation: _Reservation) -> float:
+        """Seconds until ``reservation`` may be admitted; 0 once it has been."""
+        with self._lock:
+            self._grant_ready()
+            if reservation.granted:
+                return 0.0
+            position = (reservation.priority, reservation.seq)
+            ahead = sum(
+                r.amount for priority, seq, r in self._waiters
+                if not r.cancelled and (priority, seq) <= position
+            )
+            # Re-checked on waking: a more urgent request may have queued in front
+            return max(0.001, (ahead - self._tokens) / self.refill_per_second)
+
+    def _abandon(self, reservation: _Reservation) -> None:
+        with self._lock:
+            if reservation.granted:
+                # Give the tokens back so cancelled requests don't eat budget.
+                self._refill()
+                self._tokens = min(self.capacity, self._tokens + reservation.amount)
+            reservation.cancelled = True
+            self._grant_ready()
+
+    def acquire_sync(self, amount: float, priority: Optional[int] = None) -> int:
+        """Block until ``amount`` tokens are admitted. Returns milliseconds waited."""
+        reservation = self._enqueue(amount, priority)
+        if reservation.granted:
+            return 0
+        start = time.monotonic()
+        try:
+            while True:
+                wait_s = self._poll(reservation)
+                if not wait_s:
+                    break
+                time.sleep(wait_s)
+        except BaseException:
+            self._abandon(reservation)
+            raise
+        return int((time.monotonic() - start) * 1000)
+
+    async def acquire(self, amount: float, priority: Optional[int] = None) -> int:
+        """Async version of acquire_sync. Returns milliseconds waited."""
+        reservation = self._enqueue(amount, priority)
+        if reservation.granted:
+            return 0
+        start = time.monotonic()
+        try:
+            while True:
+                wait_s = self._poll(reservation)
+                if not wait_s:
+                    break
+                await asyncio.sleep(wait_s)
+        except BaseException:
+            self._abandon(reservation)
+            raise
+        return int((time.monotonic() - start) * 1000)
+
+    def adjust(self, delta: float) -> None:
+        """
+        Charge (positive) or refund (negative) tokens after the fact,
+        e.g. to reconcile an estimate with the provider's reported usage.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class _Waiter:
+    """A queued SlotLimiter acquirer: a threading.Event or an asyncio future."""
+    __slots__ = ("event", "future", "loop", "granted", "cancelled")
+
+    def __init__(self, event=None, future=None, loop=None):
+        self.event = event
+        self.future = future
+        self.loop = loop
+        self.granted = False
+        self.cancelled = False
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class SlotLimiter:
+    """
+    Priority-ordered counting semaphore shared by threads and event loops.
+
+    asyncio.Semaphore is bound to one event loop, which breaks as soon as the
+    same service is used from ``asyncio.run`` twice or from worker threads.
+    Released slots are handed directly to the best waiter (lowest priority
+    value, then arrival order), so an interactive request never waits behind
+    queued bulk requests, only behind requests already holding a slot.
+    """
+
+    def __init__(self, slots: int):
+        if slots < 1:
+            raise ValueError("slots must be >= 1")
+        self.slots = slots
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._waiters: list = []  # heap of (priority, seq, _Waiter)
+        self._seq = itertools.count()
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, w in self._waiters if not w.cancelled)
+
+    def has_spare_slot(self) -> bool:
+        """True when a slot is free and nobody is queued for one."""
+        with self._lock:
+            return self._in_use < self.slots and not self._waiters
+
+    def _try_fast_path(self) -> bool:
+        if self._in_use < self.slots and not self._waiters:
+            self._in_use += 1
+            return True
+        return False
+
+    def _enqueue(self, waiter: _Waiter, priority: Optional[int]) -> None:
+        if priority is None:
+            priority = current_priority()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+
+    def acquire_sync(self, priority: Optional[int] = None) -> int:
+        """Block until a slot is free. Returns milliseconds waited."""
+        with self._lock:
+            if self._try_fast_path():
+                return 0
+            waiter = _Waiter(event=threading.Event())
+            self._enqueue(waiter, priority)
+        start = time.monotonic()
+        waiter.event.wait()
+        return int((time.monotonic() - start) * 1000)
+
+    async def acquire(self, priority: Optional[int] = None) -> int:
+        """Async version of acquire_sync. Returns milliseconds waited."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_fast_path():
+                return 0
+            waiter = _Waiter(future=loop.create_future(), loop=loop)
+            self._enqueue(waiter, priority)
+        start = time.monotonic()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                waiter.cancelled = True
+            if granted:
+                # The slot was handed to us just before the cancellation landed.
+                self.release()
+            raise
+        return int((time.monotonic() - start) * 1000)
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                _, _, waiter = heapq.heappop(self._waiters)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                waiter.wake()
+                return  # slot handed over, _in_use unchanged
+            self._in_use -= 1
+
+
+class ModelLane:
+    """
+    Rate-limit lane for one model: RPM bucket, TPM bucket and concurrency slots.
+    Any limit left as None is not enforced.
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        max_concurrent: Optional[int] = None,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrent = max_concurrent
+        self.rpm_bucket = TokenBucket.per_minute(rpm) if rpm else None
+        self.tpm_bucket = TokenBucket.per_minute(tpm) if tpm else None
+        self.slots = SlotLimiter(max_concurrent) if max_concurrent else None
+
+    @property
+    def is_active(self) -> bool:
+        return bool(self.rpm_bucket or self.tpm_bucket or self.slots)
+
+    def enter_sync(self, estimated_tokens: int) -> Tuple[int, int]:
+        """
+        Wait for a concurrency slot, then for RPM and TPM budget.
+
+        Returns
+        -------
+        Tuple of (rpm_waited_ms, tpm_waited_ms)
+        """
+        if self.slots:
+            self.slots.acquire_sync()
+        try:
+            rpm_ms = self.rpm_bucket.acquire_sync(1) if self.rpm_bucket else 0
+            tpm_ms = self.tpm_bucket.acquire_sync(estimated_tokens) if self.tpm_bucket else 0
+        except BaseException:
+            self.leave()
+            raise
+        return rpm_ms, tpm_ms
+
+    async def enter(self, estimated_tokens: int) -> Tuple[int, int]:
+        """Async version of enter_sync."""
+        if self.slots:
+            await self.slots.acquire()
+        try:
+            rpm_ms = await self.rpm_bucket.acquire(1) if self.rpm_bucket else 0
+            tpm_ms = await self.tpm_bucket.acquire(estimated_tokens) if self.tpm_bucket else 0
+        except BaseException:
+            self.leave()
+            raise
+        return rpm_ms, tpm_ms
+
+    def leave(self) -> None:
+        """Release the concurrency slot taken by enter / enter_sync."""
+        if self.slots:
+            self.slots.release()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Reconcile the TPM reservation with the provider-reported token count."""
+        if self.tpm_bucket and actual_tokens:
+            self.tpm_bucket.adjust(actual_tokens - estimated_tokens)
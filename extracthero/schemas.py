@@ -1,8 +1,11 @@
 #extracthero/schemes.py
 
 import re
-from typing import List, Union, Dict, Any, Optional, Tuple, Literal
-from dataclasses import dataclass
+import hashlib
+import json
+from functools import cached_property, lru_cache
+from typing import List, Union, Dict, Any, Optional, Tuple, Literal, get_args, get_origin
+from dataclasses import dataclass, field, fields as dataclass_fields, make_dataclass
 from typing import Any, Optional
 import time
 
@@ -90,6 +93,58 @@ class WhatToRetain:
 
     # ─────── prompt builder ────────
     def compile(self) -> str:
+        return self.freeze().compile()
+
+    def compile_parser(self) -> str:
+        return self.freeze().compile_parser()
+
+    # ─────── cache keys ────────
+    def freeze(self) -> "FrozenWhatToRetain":
+        """
+        Immutable, hashable snapshot of this spec.
+
+        Snapshots are memoized by field values, so freezing (and compiling)
+        an unchanged spec is a dict lookup; mutating the spec simply yields
+        a different snapshot. A spec holding an unhashable value (e.g. a dict
+        ``example``) gets a fresh, unmemoized snapshot that can't be hashed.
+        """
+        items = tuple(
+            (name, tuple(value) if name in _LIST_FIELDS and isinstance(value, list) else value)
+            for name, value in ((name, getattr(self, name)) for name in _SPEC_FIELDS)
+        )
+        try:
+            return _freeze(items)
+        except TypeError:
+            return FrozenWhatToRetain(**dict(items))
+
+    def fingerprint(self) -> str:
+        """Stable content hash of the spec (see FrozenWhatToRetain.fingerprint)."""
+        return self.freeze().fingerprint
+
+
+class _FrozenSpecMethods:
+    """Behaviour of FrozenWhatToRetain; its fields come from WhatToRetain."""
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """
+        SHA-256 of the canonical JSON of the fields. Stable across processes
+        and Python versions (unlike ``hash()``), so it can key persistent caches.
+        """
+        fields = {name: getattr(self, name) for name in _SPEC_FIELDS}
+        data = json.dumps(fields, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"WhatToRetain:{data}".encode("utf-8", "surrogatepass")).hexdigest()
+
+    def thaw(self) -> WhatToRetain:
+        """Mutable WhatToRetain with the same fields."""
+        return WhatToRetain(**{
+            name: list(value) if name in _LIST_FIELDS and isinstance(value, tuple) else value
+            for name, value in ((name, getattr(self, name)) for name in _SPEC_FIELDS)
+        })
+
+    # ─────── prompt builder ────────
+    @cached_property
+    def _compiled(self) -> str:
         parts: List[str] = [f"INTERESTED Target INFORMATION: {self.name}"]
         
         if self.desc:
@@ -123,11 +178,14 @@ class WhatToRetain:
             parts.append("    Additional rules: " + "; ".join(self.text_rules))
 
         return "\n".join(parts)
+
+    def compile(self) -> str:
+        return self._compiled
     
 
 
-    # ─────── prompt builder ────────
-    def compile_parser(self) -> str:
+    @cached_property
+    def _compiled_parser(self) -> str:
         parts: List[str] = [f"keyword: {self.name}"]
 
         if self.desc:
@@ -145,7 +203,71 @@ class WhatToRetain:
             parts.append("Additional rules: " + "; ".join(self.text_rules))
 
         return "\n".join(parts)
-    
+
+    def compile_parser(self) -> str:
+        return self._compiled_parser
+
+    def freeze(self) -> "FrozenWhatToRetain":
+        return self
+
+
+_SPEC_FIELDS = tuple(f.name for f in dataclass_fields(WhatToRetain))
+# List-typed fields (text_rules) are stored as tuples in a snapshot
+_LIST_FIELDS = frozenset(
+    f.name for f in dataclass_fields(WhatToRetain)
+    if list in (get_origin(f.type), *map(get_origin, get_args(f.type)))
+)
+
+
+def _hashable_type(tp: Any) -> Any:
+    """Annotation of a frozen field: lists become variable-length tuples."""
+    if get_origin(tp) is list:
+        return Tuple[(get_args(tp)[0], ...)]
+    if get_origin(tp) is Union:
+        return Union[tuple(_hashable_type(arg) for arg in get_args(tp))]
+    return tp
+
+
+# Built from WhatToRetain's fields so the two can't drift apart
+FrozenWhatToRetain = make_dataclass(
+    "FrozenWhatToRetain",
+    [(f.name, _hashable_type(f.type), field(default=f.default)) for f in dataclass_fields(WhatToRetain)],
+    bases=(_FrozenSpecMethods,),
+    namespace={
+        "__module__": __name__,
+        "__doc__": """
+    Frozen counterpart of WhatToRetain, produced by ``WhatToRetain.freeze()``.
+
+    Usable as a dict key and anywhere a WhatToRetain is accepted. The
+    fingerprint and compiled prompt texts are computed once per snapshot.
+    """,
+    },
+    frozen=True,
+)
+
+
+@lru_cache(maxsize=4096)
+def _freeze(items: tuple) -> FrozenWhatToRetain:
+    return FrozenWhatToRetain(**dict(items))
+
+
+def spec_list_fingerprint(
+    extraction_spec: Union[WhatToRetain, FrozenWhatToRetain, List[Union[WhatToRetain, FrozenWhatToRetain]], str, None],
+) -> str:
+    """
+    Stable fingerprint of a spec argument as FilterHero / ParseHero accept
+    it: a single spec, a list of specs (order matters, as it does in the
+    prompt) or a raw description string.
+    """
+    if extraction_spec is None:
+        parts = ["none"]
+    elif isinstance(extraction_spec, (WhatToRetain, FrozenWhatToRetain)):
+        return extraction_spec.freeze().fingerprint
+    elif isinstance(extraction_spec, str):
+        parts = ["str", extraction_spec]
+    else:
+        parts = ["list"] + [spec.freeze().fingerprint for spec in extraction_spec]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8", "surrogatepass")).hexdigest()
 
 
 
@@ -197,6 +319,7 @@ class FilterOp:
     error: Optional[str] = None  
     start_time: Any = None
     filtered_data_token_size: Optional[Any] = None  # Add this parameter
+    source_token_size: Optional[int] = None  # Token size of the input, when already known
     filter_strategy: Optional[Any] = None
     
     SSM: Optional[Any] = None # semantic section mapping
@@ -222,6 +345,7 @@ class FilterOp:
         error: Optional[str] = None, 
         SSM: Optional[str] = None, 
         filtered_data_token_size = None, 
+        source_token_size: Optional[int] = None,
         filter_strategy: Optional[Any] = None,
         filter_mode: Optional[str] = None,
         deletions_applied: Optional[List[Dict]] = None,
@@ -241,6 +365,7 @@ class FilterOp:
             SSM=SSM, 
             start_time=start_time,
             filtered_data_token_size=filtered_data_token_size,
+            source_token_size=source_token_size,
             filter_strategy=filter_strategy,
             filter_mode=filter_mode,
             deletions_applied=deletions_applied,
@@ -572,12 +697,17 @@ class ExtractOp:
         # Collect usage from filter operations
         if self.filter_op and self.filter_op.generation_result:
             usage_sources.append(self.filter_op.generation_result.usage)
+        elif self.filter_op and self.filter_op.usage:
+            # Ops served without an LLM call (e.g. near-duplicate reuse)
+            usage_sources.append(self.filter_op.usage)
         elif self.filter_chain_op and self.filter_chain_op.usage:
             usage_sources.append(self.filter_chain_op.usage)
             
         # Collect usage from parse operation
         if self.parse_op.generation_result:
             usage_sources.append(self.parse_op.generation_result.usage)
+        elif self.parse_op.usage:
+            usage_sources.append(self.parse_op.usage)
         
         # Filter out None values
         usage_sources = [u for u in usage_sources if u]
@@ -0,0 +1,145 @@
+# extracthero/section_scoring.py
+"""
+"Keep the best sections" trimming.
+
+Head-only trimming keeps whatever comes first: on most pages that is the
+navigation, while the content the spec asks for sits further down. This
+module scores the corpus's blocks locally (no LLM call) and keeps the set
+of blocks with the highest total score that fits the budget, in original
+order:
+
+• relevance — share of the compiled WhatToRetain keywords found in the
+  block (the dominant term);
+• density   — share of the block that is prose rather than links, URLs,
+  markup or punctuation;
+• position  — a mild preference for earlier blocks, as a tie-breaker.
+
+Selection is a 0/1 knapsack over the block costs (tokens or characters),
+solved by dynamic programming on a budget quantized to ``resolution``
+units. Costs are rounded up, so the kept blocks never exceed the budget.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+from extracthero.utils import structural_blocks
+
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_LINK_RE = re.compile(r"\[[^\]]*\]\([^)]*\)|https?://\S+|<[^>]+>")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in include information interested "
+    "is it its of on or that the this to was were which with target description "
+    "context guidance entire semantic block represents item example relevance hint "
+    "page source additional rules info keyword".split()
+)
+
+
+def compiled_target(extraction_spec: Any) -> str:
+    """Compiled prompt text of a spec, a spec list or a raw description."""
+    if isinstance(extraction_spec, str):
+        return extraction_spec
+    if isinstance(extraction_spec, list):
+        return "\n\n".join(spec.compile() for spec in extraction_spec)
+    return extraction_spec.compile()
+
+
+def keywords(target_text: str) -> Set[str]:
+    """Lower-cased content words of a compiled spec (see WhatToRetain.compile)."""
+    return {
+        word for word in _WORD_RE.findall(target_text.lower())
+        if word not in _STOPWORDS and (len(word) > 2 or not word.isascii())
+    }
+
+
+@dataclass
+class ScoredBlock:
+    index: int
+    text: str
+    cost: int
+    score: float
+
+
+def score_block(text: str, terms: Set[str], position: float) -> float:
+    """Score of one block; ``position`` is its offset in the document in [0, 1]."""
+    stripped = text.strip()
+    if not stripped:
+        return 0.0
+    words = set(_WORD_RE.findall(stripped.lower()))
+    relevance = len(words & terms) / len(terms) if terms else 0.0
+    prose = _LINK_RE.sub("", stripped)
+    density = sum(ch.isalnum() or ch.isspace() for ch in prose) / len(stripped)
+    return 3.0 * relevance + 1.0 * density + 0.25 * (1.0 - position)
+
+
+def score_blocks(
+    text: str,
+    target_text: str,
+    count_cost: Callable[[str], int],
+) -> List[ScoredBlock]:
+    """Split ``text`` into structural blocks and score each against ``target_text``."""
+    terms = keywords(target_text)
+    blocks = ["\n".join(block) for block in structural_blocks(text.split("\n"))]
+    total = max(1, len(text))
+    scored, offset = [], 0
+    for index, block in enumerate(blocks):
+        scored.append(ScoredBlock(index, block, count_cost(block), score_block(block, terms, offset / total)))
+        offset += len(block) + 1
+    return scored
+
+
+def select_blocks(blocks: Sequence[ScoredBlock], budget: int, resolution: int = 1000) -> List[ScoredBlock]:
+    """
+    Highest-scoring subset of ``blocks`` whose costs (plus one separator per
+    block) fit ``budget``, in original order.
+    """
+    unit = max(1, -(-budget // resolution))  # ceil
+    capacity = budget // unit
+    candidates = [b for b in blocks if b.score > 0 and b.cost + 1 <= budget]
+    weights = [-(-(b.cost + 1) // unit) for b in candidates]
+
+    best = [0.0] * (capacity + 1)
+    taken: List[bytearray] = []
+    for block, weight in zip(candidates, weights):
+        row = bytearray(capacity + 1)
+        for c in range(capacity, weight - 1, -1):
+            value = best[c - weight] + block.score
+            if value > best[c]:
+                best[c] = value
+                row[c] = 1
+        taken.append(row)
+
+    chosen, c = [], capacity
+    for i in range(len(candidates) - 1, -1, -1):
+        if taken[i][c]:
+            chosen.append(candidates[i])
+            c -= weights[i]
+    return sorted(chosen, key=lambda b: b.index)
+
+
+def best_sections_trim(
+    text: str,
+    budget: int,
+    target_text: str,
+    count_cost: Callable[[str], int],
+    resolution: int = 1000,
+) -> Tuple[str, int, int, Optional[int]]:
+    """
+    Keep the best-scoring blocks of ``text`` within ``budget``.
+
+    Returns
+    -------
+    Tuple[str, int, int, Optional[int]]
+        (trimmed_text, kept_cost, total_cost, kept_blocks). kept_blocks is
+        None when the text already fits and is returned unchanged.
+    """
+    blocks = score_blocks(text, target_text, count_cost)
+    total = sum(b.cost for b in blocks) + max(0, len(blocks) - 1)
+    if total <= budget:
+        return text, total, total, None
+    chosen = select_blocks(blocks, budget, resolution)
+    kept = sum(b.cost for b in chosen) + max(0, len(chosen) - 1)
+    return "\n".join(b.text for b in chosen), kept, total, len(chosen)
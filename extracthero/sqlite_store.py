@@ -0,0 +1,158 @@
+# extracthero/sqlite_store.py
+"""
+Shared on-disk key/value storage for the persistent cache tiers.
+
+• SqliteStore — byte-valued table in a WAL-mode SQLite file with TTL expiry
+  and LRU trimming to a byte budget. Backs SqliteCache and
+  SqliteReductionCache (extracthero.cache) and SqliteNearDuplicateIndex
+  (extracthero.near_duplicates).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SqliteStore:
+    """
+    Byte-valued key/value table in a WAL-mode SQLite file.
+
+    Safe for many threads and processes: every thread of every process opens
+    its own connection, WAL lets readers run alongside the single writer and
+    ``busy_timeout`` serialises concurrent writers.
+
+    Parameters
+    ----------
+    path : str
+        Database file; created (with parent directories) if missing.
+    table : str
+        Table name, so several stores can share one file.
+    max_bytes : int, default 1 GiB
+        Byte budget; least-recently-read rows are trimmed beyond it.
+    ttl_seconds : float or None, default 7 days
+        Rows older than this are treated as missing and purged on trim.
+        None keeps rows until they are trimmed.
+    trim_every : int, default 200
+        Each process checks the budget every ``trim_every`` writes.
+    """
+
+    # Reads only refresh a row's LRU timestamp when it is older than this,
+    # so hot keys don't turn every read into a write.
+    TOUCH_INTERVAL_S = 60.0
+
+    def __init__(
+        self,
+        path: str,
+        table: str = "entries",
+        max_bytes: int = 1024 * 1024 * 1024,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        trim_every: int = 200,
+    ):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.trim_every = max(1, trim_every)
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross threads, nor survive a fork.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        conn = self._connection()
+        row = conn.execute(
+            f"SELECT value, created, accessed FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created, accessed = row
+        now = time.time()
+        if self._expired(created, now):
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        if now - accessed > self.TOUCH_INTERVAL_S:
+            conn.execute(f"UPDATE {self.table} SET accessed = ? WHERE key = ?", (now, key))
+        return value
+
+    def put_bytes(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        self._connection().execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, size, created, accessed)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (key, sqlite3.Binary(value), len(value), now, now),
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.trim_every == 0
+        if due:
+            self.trim()
+
+    def trim(self) -> int:
+        """Purge expired rows, then least-recently-read rows until within budget. Returns rows removed."""
+        conn = self._connection()
+        removed = 0
+        if self.ttl_seconds is not None:
+            removed += conn.execute(
+                f"DELETE FROM {self.table} WHERE created < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+            excess = total - self.max_bytes
+            victims = []
+            for key, size in rows:
+                victims.append((key,))
+                excess -= size
+                total -= size
+                if excess <= 0:
+                    break
+            conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+            removed += len(victims)
+        return removed
+
+    def clear(self) -> None:
+        self._connection().execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict[str, Any]:
+        entries, size = self._connection().execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+        ).fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "path": self.path}
@@ -0,0 +1,395 @@
+# extracthero/ssm_cache.py
+"""
+Template cache for Semantic Section Maps (subtractive filtering).
+
+Pages rendered from the same site template get nearly identical ToCs from
+``get_content_toc``: the same header, navigation and footer sections at the
+same relative positions. SSMTemplateCache remembers each page's line
+skeleton (one short hash per normalized line) together with its final
+TocOutput. For a new page it
+
+- picks the most similar cached skeleton for the same spec,
+- aligns the two skeletons (difflib) and carries over every cached section
+  whose first and last lines are found again, at their new line numbers,
+- leaves the remaining lines *unresolved*.
+
+Only unresolved lines are sent to the LLM (numbered with their real line
+numbers); when none remain the call is skipped entirely. The sections the
+LLM returns are clipped to the unresolved runs and merged with the
+carried-over ones.
+
+SectionDecisionMemo works below the template level: blocks such as cookie
+banners, mega-menus and legal footers repeat across pages of unrelated
+layouts, so it remembers the decision for each (block hash, spec) and
+pre-resolves those blocks wherever they appear.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from llmservice import GenerationResult
+
+from extracthero.myllmservice import TocOutput, TocSection
+
+
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def line_hash(line: str) -> str:
+    """Short hash of a line with whitespace collapsed and digits masked."""
+    normalized = _DIGITS_RE.sub("0", " ".join(line.split()))
+    return hashlib.blake2b(normalized.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+
+
+def ssm_spec_key(spec_fingerprint: str, filter_strategy: Optional[str], model_name: Optional[str]) -> str:
+    """
+    Key of everything besides the page that decides a ToC;
+    ``spec_fingerprint`` is ``schemas.spec_list_fingerprint`` of the spec.
+    """
+    digest = hashlib.sha256()
+    for part in (spec_fingerprint or "", filter_strategy or "", model_name or ""):
+        digest.update(part.encode("utf-8", "surrogatepass"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def line_runs(line_numbers: Sequence[int]) -> List[Tuple[int, int]]:
+    """Collapse sorted line numbers into inclusive (start, end) runs."""
+    runs: List[Tuple[int, int]] = []
+    for n in line_numbers:
+        if runs and n == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], n)
+        else:
+            runs.append((n, n))
+    return runs
+
+
+def clip_sections(sections: Sequence[TocSection], runs: Sequence[Tuple[int, int]]) -> List[TocSection]:
+    """Intersect sections with the given runs; parts outside every run are dropped."""
+    clipped = []
+    for section in sections:
+        for start, end in runs:
+            lo, hi = max(section.start_line, start), min(section.end_line, end)
+            if lo <= hi:
+                clipped.append(section.model_copy(update={"start_line": lo, "end_line": hi}))
+    return clipped
+
+
+def remap_sections(
+    old_hashes: Sequence[str],
+    new_hashes: Sequence[str],
+    sections: Sequence[TocSection],
+) -> List[TocSection]:
+    """
+    Move sections of the old page onto the new one.
+
+    A section is carried over when both its first and last lines align with
+    lines of the new page; lines in between inherit its decision even if
+    they changed. Sections that would overlap an earlier one are dropped.
+    """
+    matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    mapping: Dict[int, int] = {}
+    for i, j, size in matcher.get_matching_blocks():
+        for k in range(size):
+            mapping[i + k] = j + k
+
+    remapped = []
+    last_end = 0
+    for section in sorted(sections, key=lambda s: s.start_line):
+        start = mapping.get(section.start_line - 1)
+        end = mapping.get(section.end_line - 1)
+        if start is None or end is None:
+            continue
+        start, end = start + 1, end + 1
+        if start > end or start <= last_end:
+            continue
+        remapped.append(section.model_copy(update={"start_line": start, "end_line": end}))
+        last_end = end
+    return remapped
+
+
+@dataclass
+class SSMPlan:
+    """What a page can reuse from the cache, and which lines still need the LLM."""
+    spec_key: str
+    line_hashes: List[str]
+    sections: List[TocSection] = field(default_factory=list)  # carried over from the template
+    unresolved: List[int] = field(default_factory=list)        # 1-based lines the LLM must classify
+    template_id: Optional[int] = None
+
+    @classmethod
+    def for_lines(cls, spec_key: str, lines: Sequence[str]) -> "SSMPlan":
+        """Plan with nothing resolved yet."""
+        return cls(spec_key, [line_hash(line) for line in lines], unresolved=list(range(1, len(lines) + 1)))
+
+    @property
+    def matched(self) -> bool:
+        """A cached template was used."""
+        return self.template_id is not None
+
+    @property
+    def complete(self) -> bool:
+        """Every line is resolved; no LLM call is needed."""
+        return bool(self.sections) and not self.unresolved
+
+    @property
+    def line_numbers(self) -> Optional[List[int]]:
+        """Lines to number for the LLM, or None for the whole document."""
+        return self.unresolved if self.sections else None
+
+    def resolve(self, sections: Sequence[TocSection]) -> None:
+        """Add pre-resolved sections; they must only cover unresolved lines."""
+        covered = set()
+        for section in sections:
+            covered.update(range(section.start_line, section.end_line + 1))
+        self.sections = sorted(self.sections + list(sections), key=lambda s: s.start_line)
+        self.unresolved = [n for n in self.unresolved if n not in covered]
+
+    @property
+    def reused_lines(self) -> int:
+        return len(self.line_hashes) - len(self.unresolved)
+
+    def merge(self, toc: TocOutput) -> TocOutput:
+        """Combine the LLM's ToC for the unresolved lines with the carried-over sections."""
+        if not self.sections:
+            return toc
+        sections = self.sections + clip_sections(toc.sections, line_runs(self.unresolved))
+        return TocOutput(sections=sorted(sections, key=lambda s: s.start_line))
+
+    def result(self) -> GenerationResult:
+        """GenerationResult for a page resolved entirely from the cache."""
+        return GenerationResult(
+            success=True,
+            trace_id="ssm-template",
+            content=TocOutput(sections=list(self.sections)),
+            usage={
+                "input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "total_cost": 0.0,
+                ("ssm_template_hits" if self.matched else "section_memo_hits"): 1,
+            },
+            operation_name="get_content_toc",
+        )
+
+
+class _Template:
+    __slots__ = ("spec_key", "hashes", "counts", "sections")
+
+    def __init__(self, spec_key: str, hashes: List[str], sections: List[TocSection]):
+        self.spec_key = spec_key
+        self.hashes = hashes
+        self.counts = Counter(hashes)
+        self.sections = sections
+
+
+class SSMTemplateCache:
+    """
+    In-memory LRU of page skeletons and their ToCs, grouped by spec.
+
+    Parameters
+    ----------
+    max_templates : int
+        Templates kept across all specs; the least recently used is evicted.
+    min_similarity : float
+        Minimum share of lines two skeletons have in common (counted as a
+        multiset, relative to the longer page) for a cached skeleton to be
+        used as the page's template.
+    """
+
+    def __init__(self, max_templates: int = 512, min_similarity: float = 0.5):
+        self.max_templates = max_templates
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._templates: "OrderedDict[int, _Template]" = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _best_template(self, spec_key: str, hashes: List[str]) -> Tuple[Optional[int], Optional[_Template]]:
+        counts = Counter(hashes)
+        best_id, best, best_score = None, None, self.min_similarity
+        with self._lock:
+            candidates = [(tid, t) for tid, t in self._templates.items() if t.spec_key == spec_key]
+        for tid, template in candidates:
+            longest = max(len(hashes), len(template.hashes))
+            shared = sum((counts & template.counts).values())
+            score = shared / longest if longest else 0.0
+            if score >= best_score:
+                best_id, best, best_score = tid, template, score
+        return best_id, best
+
+    def plan(self, spec_key: str, lines: Sequence[str]) -> SSMPlan:
+        """Resolve as many lines of a page as the cached templates allow."""
+        hashes = [line_hash(line) for line in lines]
+        template_id, template = self._best_template(spec_key, hashes)
+        if template is None:
+            with self._lock:
+                self.misses += 1
+            return SSMPlan(spec_key, hashes, unresolved=list(range(1, len(hashes) + 1)))
+
+        sections = remap_sections(template.hashes, hashes, template.sections)
+        covered = set()
+        for section in sections:
+            covered.update(range(section.start_line, section.end_line + 1))
+        unresolved = [n for n in range(1, len(hashes) + 1) if n not in covered]
+
+        with self._lock:
+            if template_id in self._templates:
+                self._templates.move_to_end(template_id)
+            if unresolved:
+                self.partial_hits += 1
+            else:
+                self.hits += 1
+        return SSMPlan(spec_key, hashes, sections, unresolved, template_id)
+
+    def store(self, plan: SSMPlan, toc: TocOutput) -> None:
+        """Remember a page's final ToC; it replaces the template it was built from."""
+        if not toc.sections:
+            return
+        template = _Template(plan.spec_key, plan.line_hashes, list(toc.sections))
+        with self._lock:
+            if plan.template_id is not None:
+                self._templates.pop(plan.template_id, None)
+            self._templates[self._next_id] = template
+            self._next_id += 1
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+            }
+
+
+# ───────────────────────── block decision memo ─────────────────────────
+def block_hash(line_hashes: Sequence[str]) -> str:
+    """Hash of a run of line hashes."""
+    return hashlib.blake2b("".join(line_hashes).encode("ascii"), digest_size=12).hexdigest()
+
+
+class _Decision:
+    __slots__ = ("index_key", "length", "section", "keep", "seen", "conflicted")
+
+    def __init__(self, index_key: Tuple[str, str], length: int, section: TocSection, keep: bool):
+        self.index_key = index_key
+        self.length = length
+        self.section = section   # prototype; line numbers are replaced on use
+        self.keep = keep
+        self.seen = 1
+        self.conflicted = False
+
+
+class SectionDecisionMemo:
+    """
+    Memo of ``(block hash, spec key) → keep/delete`` built from final ToCs.
+
+    Every section of a filtered page is recorded as a block (the hashes of
+    its lines) together with the ``_should_keep_section`` decision. A block
+    is pre-resolved on later pages once it was seen ``min_observations``
+    times with the same decision; blocks that got conflicting decisions are
+    never used.
+
+    Parameters
+    ----------
+    max_blocks : int
+        Blocks remembered across all specs (LRU).
+    min_block_lines : int
+        Shorter sections are not recorded; tiny blocks are too generic.
+    min_observations : int
+        Consistent sightings needed before a block is trusted.
+    """
+
+    def __init__(self, max_blocks: int = 100_000, min_block_lines: int = 3, min_observations: int = 2):
+        self.max_blocks = max_blocks
+        self.min_block_lines = min_block_lines
+        self.min_observations = min_observations
+        self._lock = threading.Lock()
+        self._decisions: "OrderedDict[Tuple[str, str], _Decision]" = OrderedDict()
+        # (spec_key, first line hash) → {block length: number of blocks}
+        self._index: Dict[Tuple[str, str], Counter] = {}
+        self.lines_resolved = 0
+
+    def __len__(self) -> int:
+        return len(self._decisions)
+
+    def record(self, spec_key: str, line_hashes: Sequence[str], toc: TocOutput, keep: Callable[[TocSection], bool]) -> None:
+        """Record the decision for every section of a page's final ToC."""
+        with self._lock:
+            for section in toc.sections:
+                lines = line_hashes[section.start_line - 1:section.end_line]
+                if len(lines) < self.min_block_lines:
+                    continue
+                key = (spec_key, block_hash(lines))
+                decision = keep(section)
+                existing = self._decisions.get(key)
+                if existing is None:
+                    index_key = (spec_key, lines[0])
+                    self._decisions[key] = _Decision(index_key, len(lines), section, decision)
+                    self._index.setdefault(index_key, Counter())[len(lines)] += 1
+                    self._evict()
+                else:
+                    existing.seen += 1
+                    existing.conflicted |= existing.keep != decision
+                    self._decisions.move_to_end(key)
+
+    def _evict(self) -> None:
+        while len(self._decisions) > self.max_blocks:
+            _, old = self._decisions.popitem(last=False)
+            lengths = self._index[old.index_key]
+            lengths[old.length] -= 1
+            if lengths[old.length] <= 0:
+                del lengths[old.length]
+            if not lengths:
+                del self._index[old.index_key]
+
+    def resolve(self, plan: SSMPlan) -> None:
+        """Pre-resolve known blocks among the plan's unresolved lines."""
+        hashes = plan.line_hashes
+        open_lines = set(plan.unresolved)
+        sections: List[TocSection] = []
+        with self._lock:
+            n = 1
+            total = len(hashes)
+            while n <= total:
+                lengths = self._index.get((plan.spec_key, hashes[n - 1])) if n in open_lines else None
+                matched = 0
+                for length in sorted(lengths or (), reverse=True):
+                    end = n + length - 1
+                    if end > total or not all(m in open_lines for m in range(n, end + 1)):
+                        continue
+                    decision = self._decisions.get((plan.spec_key, block_hash(hashes[n - 1:end])))
+                    if decision is None or decision.conflicted or decision.seen < self.min_observations:
+                        continue
+                    sections.append(decision.section.model_copy(update={"start_line": n, "end_line": end}))
+                    matched = length
+                    break
+                n += matched or 1
+            self.lines_resolved += sum(s.end_line - s.start_line + 1 for s in sections)
+        if sections:
+            plan.resolve(sections)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._decisions.clear()
+            self._index.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"blocks": len(self._decisions), "lines_resolved": self.lines_resolved}
@@ -0,0 +1,122 @@
+# extracthero/streaming.py
+"""
+Streaming subtractive filtering for inputs too large to hold several times.
+
+_run_subtractive splits the whole text, numbers a full copy, collects a set
+of kept line numbers and joins the result, so peak memory is a multiple of
+the input. FilterHero.run_stream instead:
+
+• reads lines lazily from a path, an open file or any iterable of lines;
+• numbers them in overlapping windows on the fly (windowing.iter_line_windows);
+• writes each window's owned, kept lines straight to a sink as soon as its
+  ToC arrives, in document order.
+
+Memory is bounded by the windows in flight plus the stitched section map,
+not by the document. The sink receives exactly what run(...,
+filter_mode="subtractive", window_lines=...) would return as content.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from llmservice import GenerationResult
+
+from extracthero.myllmservice import TocOutput, TocSection
+from extracthero.windowing import stitch_window
+
+
+Window = Tuple[int, List[str], Tuple[int, int]]
+
+
+def _strip_newline(line: str) -> str:
+    return line[:-1] if line.endswith("\n") else line
+
+
+@contextmanager
+def open_lines(source: Any) -> Iterator[Iterator[str]]:
+    """Lines of a path, an open text file or an iterable of strings, without their newline."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as handle:
+            yield (_strip_newline(line) for line in handle)
+    else:
+        yield (_strip_newline(line) for line in source)
+
+
+def line_sink(sink: Any) -> Callable[[str], Any]:
+    """``sink.write`` for file-like sinks; any other callable is used as is."""
+    write = getattr(sink, "write", sink)
+    if not callable(write):
+        raise TypeError("sink must have a write() method or be callable")
+    return write
+
+
+def batched(windows: Iterable[Window], size: int) -> Iterator[List[Window]]:
+    """Consecutive groups of at most ``size`` windows."""
+    if size < 1:
+        raise ValueError("max_concurrent_windows must be >= 1")
+    iterator = iter(windows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class StreamedSubtraction:
+    """
+    Running state of one streamed subtractive filter: the stitched section
+    map, line counts, summed usage and the output written so far.
+    """
+
+    def __init__(self, write: Callable[[str], Any], keep_section: Callable[[TocSection], bool]):
+        self.write = write
+        self.keep_section = keep_section
+        self.sections: List[TocSection] = []
+        self.usage: Dict[str, Any] = {}
+        self.windows = 0
+        self.line_count = 0
+        self.retained = 0
+        self.error: Optional[str] = None
+
+    def apply(self, window: Window, gen_result: GenerationResult) -> bool:
+        """
+        Write the kept lines this window owns. Returns False (and sets
+        ``error``) when its ToC call failed; nothing more should be written.
+        """
+        first, lines, owned = window
+        self.windows += 1
+        for key, value in (gen_result.usage or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.usage[key] = self.usage.get(key, 0) + value
+            else:
+                self.usage.setdefault(key, value)
+
+        lo, hi = owned
+        if not gen_result.success or not isinstance(gen_result.content, TocOutput):
+            if gen_result.success:
+                reason = f"expected TocOutput but got {type(gen_result.content).__name__}"
+            else:
+                reason = gen_result.error_message or "unknown error"
+            self.error = f"window {self.windows} (lines {lo}-{hi}): {reason}"
+            return False
+
+        keep = bytearray(hi - lo + 1)
+        for section in stitch_window(self.sections, gen_result.content, owned):
+            if self.keep_section(section):
+                start, end = section.start_line - lo, section.end_line - lo + 1
+                keep[start:end] = b"\x01" * (end - start)
+        for n in range(lo, hi + 1):
+            if keep[n - lo]:
+                self.write(("\n" if self.retained else "") + lines[n - first])
+                self.retained += 1
+        self.line_count = hi
+        return True
+
+    def usage_summary(self) -> Optional[Dict[str, Any]]:
+        if not self.windows:
+            return None
+        return {**self.usage, "fanout_calls": self.windows}
@@ -0,0 +1,96 @@
+# extracthero/token_ledger.py
+"""
+Token-count ledger.
+
+Every phase of an extraction reports token counts (HTML Reduction, Trimming,
+Filter, Parse, per-stage chain reductions), and the same strings flow from
+one phase into the next: the reduced HTML is the filter input, a stage's
+output is the next stage's input. Encoding a multi-MB corpus with tiktoken
+is the most expensive local step, so the ledger memoizes counts by content
+and lets whoever already knows a count (e.g. HtmlReducer) record it.
+
+- ``count(text)`` encodes at most once per distinct text.
+- ``record(text, n)`` seeds a count computed elsewhere.
+- ``peek(text)`` returns a known count without encoding.
+
+One ledger is shared by an ExtractHero and its FilterHero.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+import tiktoken
+
+
+def _as_text(content: Any) -> str:
+    if isinstance(content, dict):
+        return json.dumps(content)
+    return str(content)
+
+
+def _key(text: str) -> Tuple[int, int]:
+    # str caches its hash, so repeated lookups of the same object are O(1)
+    return len(text), hash(text)
+
+
+class TokenLedger:
+    """Thread-safe LRU of token counts keyed by content hash."""
+
+    def __init__(self, model: str = "gpt-4o-mini", max_entries: int = 4096):
+        self.model = model
+        self.max_entries = max_entries
+        self._encoding = None
+        self._lock = threading.Lock()
+        self._counts: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+        self.encodes = 0
+        self.hits = 0
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            self._encoding = tiktoken.encoding_for_model(self.model)
+        return self._encoding
+
+    def peek(self, content: Any) -> Optional[int]:
+        """Known token count of ``content``, or None (never encodes)."""
+        if content is None:
+            return None
+        key = _key(_as_text(content))
+        with self._lock:
+            n = self._counts.get(key)
+            if n is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+            return n
+
+    def record(self, content: Any, n: Optional[int]) -> None:
+        """Seed the count of ``content`` (ignored when ``n`` is None)."""
+        if content is None or n is None:
+            return
+        key = _key(_as_text(content))
+        with self._lock:
+            self._counts[key] = n
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def count(self, content: Any) -> int:
+        """Token count of ``content``; 0 for None or when encoding fails."""
+        if content is None:
+            return 0
+        text = _as_text(content)
+        n = self.peek(text)
+        if n is not None:
+            return n
+        try:
+            n = len(self.encoding.encode(text))
+        except Exception:
+            return 0
+        with self._lock:
+            self.encodes += 1
+        self.record(text, n)
+        return n
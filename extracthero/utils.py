@@ -1,3 +1,7 @@
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+
 def load_html(path: str) -> str:
     """Read a local HTML file and return its contents as a string (UTF-8)."""
     with open(path, 'r', encoding='utf-8') as f:
@@ -71,4 +75,162 @@ def prepare_numbered_content(lines, max_line_length=None, line_format="[{n}]"):
             line_prefix = line_format.format(n=i)
             numbered_lines.append(f"{line_prefix} {display_line}")
         
-        return '\n'.join(numbered_lines)
\ No newline at end of file
+        return '\n'.join(numbered_lines)
+
+_HEADING_RE = re.compile(r"^\s{0,3}(#{1,6}\s|<h[1-6][\s>])", re.IGNORECASE)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def structural_blocks(lines: List[str]) -> List[List[str]]:
+    """Group lines into blocks that end at blank lines and before headings."""
+    blocks: List[List[str]] = []
+    current: List[str] = []
+    for line in lines:
+        if current and _HEADING_RE.match(line):
+            blocks.append(current)
+            current = []
+        current.append(line)
+        if not line.strip():
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def split_structural_chunks(
+    text: str,
+    max_tokens: int,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> List[str]:
+    """
+    Split text into chunks of at most ``max_tokens`` on structural boundaries.
+
+    Blocks (paragraphs separated by blank lines, and headings) are packed
+    greedily into chunks. A block that does not fit on its own is split on
+    lines, and a single line longer than the budget is cut by characters.
+    Unless a line had to be cut, ``"\\n".join(chunks) == text``.
+
+    Parameters
+    ----------
+    text : str
+        Text to split.
+    max_tokens : int
+        Token budget per chunk.
+    count_tokens : callable or None
+        Token counter; None estimates 4 characters per token.
+
+    Returns
+    -------
+    List[str]
+        Chunks in document order.
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be >= 1")
+    count = count_tokens or _estimate_tokens
+
+    # (text, tokens) units that each fit the budget
+    units: List[Tuple[str, int]] = []
+    for block in structural_blocks(text.split("\n")):
+        block_text = "\n".join(block)
+        n = count(block_text)
+        if n <= max_tokens:
+            units.append((block_text, n))
+            continue
+        for line in block:
+            n = count(line)
+            if n <= max_tokens:
+                units.append((line, n))
+                continue
+            step = max(1, len(line) * max_tokens // n)
+            units.extend((line[i:i + step], count(line[i:i + step])) for i in range(0, len(line), step))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for unit, n in units:
+        if current and current_tokens + n + 1 > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += n + (1 if len(current) > 1 else 0)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _snap_cut(text: str, end: int, snap: str) -> int:
+    """Move a cut at ``end`` back to the last block or line boundary, giving up at most half."""
+    floor = end // 2
+    if snap == "block":
+        i = text.rfind("\n\n", 0, end)
+        if i >= floor and i > 0:
+            return i
+    i = text.rfind("\n", 0, end)
+    if i >= floor and i > 0:
+        return i
+    return end
+
+
+def trim_to_token_budget(
+    text: str,
+    max_tokens: int,
+    encoding: Any,
+    tokens: Optional[List[int]] = None,
+    snap: str = "block",
+) -> Tuple[str, int, int]:
+    """
+    Trim text to at most ``max_tokens`` tokens, cut at a block or line boundary.
+
+    The text is encoded once (or not at all when ``tokens`` is given). The
+    cut position comes from the byte length of the first ``max_tokens``
+    tokens and is snapped back to the last blank line (``snap="block"``) or
+    newline; a cut mid-line only happens when no boundary lies in the second
+    half of the budget. The trimmed token count is derived from the token
+    byte lengths, not from a second encode.
+
+    Parameters
+    ----------
+    text : str
+        Text to trim.
+    max_tokens : int
+        Token budget.
+    encoding : tiktoken.Encoding
+        Tokenizer of the target model.
+    tokens : list of int or None
+        ``encoding.encode(text)`` if already known.
+    snap : str
+        "block" (default) or "line".
+
+    Returns
+    -------
+    Tuple[str, int, int]
+        (trimmed_text, trimmed_tokens, total_tokens)
+    """
+    if max_tokens < 1:
+        raise ValueError("max_tokens must be >= 1")
+    if snap not in ("block", "line"):
+        raise ValueError('snap must be "block" or "line"')
+    if tokens is None:
+        tokens = encoding.encode(text)
+    total = len(tokens)
+    if total <= max_tokens:
+        return text, total, total
+
+    budget_bytes = len(encoding.decode_bytes(tokens[:max_tokens]))
+    end = len(text.encode("utf-8")[:budget_bytes].decode("utf-8", "ignore"))
+    cut = _snap_cut(text, end, snap)
+    cut_bytes = len(text[:cut].encode("utf-8"))
+
+    # Drop the tokens past the cut; a token straddling it still counts
+    n, consumed = max_tokens, budget_bytes
+    while n > 0 and consumed > cut_bytes:
+        size = len(encoding.decode_single_token_bytes(tokens[n - 1]))
+        if consumed - size < cut_bytes:
+            break
+        consumed -= size
+        n -= 1
+    return text[:cut], n, total
@@ -0,0 +1,142 @@
+# extracthero/windowing.py
+"""
+Windowed Semantic Section Mapping for long documents.
+
+Subtractive mode normally numbers the whole document and asks for one
+ToC, so latency and the context limit grow with document length. In
+windowed mode the numbered lines are split into overlapping windows, one
+get_content_toc call per window runs in parallel, and the sections are
+stitched back together on global line numbers:
+
+• Every window owns the lines up to the midpoint of its overlap with the
+  next window; sections are clipped to the lines their window owns, so the
+  overlap only serves as context and no line is decided twice.
+• A section cut at an ownership boundary is rejoined with the section that
+  continues it on the other side when both have the same category and
+  content/navigation flags.
+
+The stitched TocOutput uses the same global line numbers as a single call,
+so FilterHero's _convert_toc_to_lines_to_keep / _build_deletion_ranges work
+unchanged.
+
+iter_line_windows produces the same windows and ownership lazily from a
+stream of lines, for FilterHero.run_stream.
+"""
+
+from __future__ import annotations
+
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from extracthero.myllmservice import TocOutput, TocSection
+from extracthero.ssm_cache import clip_sections
+
+
+def _check_window(window_lines: int, overlap: int) -> None:
+    if window_lines < 1:
+        raise ValueError("window_lines must be >= 1")
+    if not 0 <= overlap < window_lines:
+        raise ValueError("window_overlap must be >= 0 and smaller than window_lines")
+
+
+def line_windows(count: int, window_lines: int, overlap: int) -> List[Tuple[int, int]]:
+    """Half-open index ranges of ``window_lines`` lines, consecutive ones sharing ``overlap``."""
+    _check_window(window_lines, overlap)
+    windows = []
+    start = 0
+    while True:
+        end = min(count, start + window_lines)
+        windows.append((start, end))
+        if end >= count:
+            return windows
+        start += window_lines - overlap
+
+
+def window_ownership(windows: Sequence[Tuple[int, int]], line_numbers: Sequence[int]) -> List[Tuple[int, int]]:
+    """
+    Inclusive global line ranges owned by each window.
+
+    ``line_numbers[i]`` is the document line shown at index ``i``; ownership
+    changes hands at the midpoint of each overlap.
+    """
+    owned = []
+    start = line_numbers[0]
+    for (_, end), (next_start, _) in zip(windows, windows[1:]):
+        boundary = line_numbers[(next_start + end) // 2]
+        owned.append((start, boundary - 1))
+        start = boundary
+    owned.append((start, line_numbers[-1]))
+    return owned
+
+
+def iter_line_windows(
+    lines: Iterable[str],
+    window_lines: int,
+    overlap: int,
+) -> Iterator[Tuple[int, List[str], Tuple[int, int]]]:
+    """
+    Lazy line_windows + window_ownership over a stream of lines.
+
+    Yields ``(first_line, window, owned)``: the 1-based number of the
+    window's first line, its lines and the inclusive range of lines it owns.
+    The windows and ownership match the list versions for the whole
+    document, but at most one window of lines is read ahead.
+    """
+    _check_window(window_lines, overlap)
+    step = window_lines - overlap
+    iterator = iter(lines)
+    window = list(islice(iterator, window_lines))
+    first, owned_from = 1, 1
+    while window:
+        following = list(islice(iterator, step))
+        if not following:
+            yield first, window, (owned_from, first + len(window) - 1)
+            return
+        # Same boundary as window_ownership: midpoint of the overlap
+        boundary = first + (step + len(window)) // 2
+        yield first, window, (owned_from, boundary - 1)
+        window = window[step:] + following
+        first, owned_from = first + step, boundary
+
+
+def _same_kind(a: TocSection, b: TocSection) -> bool:
+    return (a.category, a.is_content, a.is_navigation) == (b.category, b.is_content, b.is_navigation)
+
+
+def stitch_window(stitched: List[TocSection], toc: TocOutput, owned: Tuple[int, int]) -> List[TocSection]:
+    """
+    Clip one window's sections to the lines it owns and append them to
+    ``stitched``, rejoining sections cut at the previous boundary.
+
+    Returns the clipped sections of this window.
+    """
+    lo, hi = owned
+    # Sections of earlier windows that ended exactly at the previous boundary
+    open_ends = [i for i, section in enumerate(stitched) if section.end_line == lo - 1]
+    clipped = sorted(clip_sections(toc.sections, [owned]), key=lambda s: s.start_line)
+    for section in clipped:
+        if section.start_line == lo:
+            match = next((i for i in open_ends if _same_kind(stitched[i], section)), None)
+            if match is not None:
+                open_ends.remove(match)
+                stitched[match] = stitched[match].model_copy(update={"end_line": section.end_line})
+                continue
+        stitched.append(section)
+    return clipped
+
+
+def stitch_toc(contents: List[Any], owned: Sequence[Tuple[int, int]]) -> Any:
+    """
+    Stitch per-window ToCs into one on global line numbers (see module doc).
+
+    Anything other than a TocOutput is returned as is, so FilterHero reports
+    it like an unexpected single-call result.
+    """
+    for content in contents:
+        if not isinstance(content, TocOutput):
+            return content
+
+    stitched: List[TocSection] = []
+    for toc, window_owned in zip(contents, owned):
+        stitch_window(stitched, toc, window_owned)
+    return TocOutput(sections=stitched)
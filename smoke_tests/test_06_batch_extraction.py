@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+"""
+Test 6: Batch extraction
+Tests ExtractHero.extract_many / extract_many_async /
+extract_many_as_completed: at most max_concurrency documents are in flight,
+results stream out as they complete or come back in input order, an item
+that raises or lacks a spec fails alone, and closing the stream early
+leaves no task running. The LLM prompt methods are stubs.
+
+Run: python smoke_tests/test_06_batch_extraction.py
+
+Critical because: one bad page must never abort or stall a batch of thousands.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="price", desc="product price")
+
+
+def page(i, delay=0.02):
+    return f"delay:{delay}\nPrice: {i} EUR"
+
+
+class StubLLM(MyLLMService):
+    """Filter sleeps "delay:" seconds and keeps the Price line; "explode" pages raise."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        if "explode" in corpus:
+            raise RuntimeError("exploded")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(float(corpus.split("delay:")[1].split("\n")[0]))
+        self.in_flight -= 1
+        kept = [line for line in corpus.split("\n") if line.startswith("Price")]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 1})
+
+    async def parse_via_llm_async(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return GenerationResult(success=True, trace_id="p", content={"price": corpus.split(": ")[1]}, usage={"total_tokens": 1})
+
+
+# Test 1: Bounded concurrency
+def test_bounded_concurrency():
+    """No more than max_concurrency documents run at once"""
+    print_test_header("1. Bounded Concurrency")
+
+    passed = True
+    llm = StubLLM()
+    hero = ExtractHero(llm=llm, reduction_executor="thread")
+    ops = hero.extract_many([page(i) for i in range(12)], SPEC, reduce_html=False, max_concurrency=3)
+    passed &= print_result(all(op.success for op in ops), "All documents extracted")
+    passed &= print_result(1 < llm.max_in_flight <= 3, f"{llm.max_in_flight} in flight (limit 3)")
+
+    try:
+        hero.extract_many([page(0)], SPEC, max_concurrency=0)
+        passed &= print_result(False, "max_concurrency=0 accepted")
+    except ValueError:
+        passed &= print_result(True, "max_concurrency=0 rejected")
+    hero.close()
+    return passed
+
+
+# Test 2: Ordering
+def test_ordering():
+    """as_completed yields in completion order; extract_many keeps input order"""
+    print_test_header("2. Result Ordering")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    docs = [page(0, delay=0.3), page(1), page(2)]
+
+    async def collect():
+        return [index async for index, _ in hero.extract_many_as_completed(docs, SPEC, reduce_html=False)]
+
+    order = asyncio.run(collect())
+    passed &= print_result(sorted(order) == [0, 1, 2] and order[-1] == 0, f"Slow document yielded last: {order}")
+
+    ops = hero.extract_many(docs, SPEC, reduce_html=False)
+    passed &= print_result([op.content["price"] for op in ops] == ["0 EUR", "1 EUR", "2 EUR"], "extract_many in input order")
+
+    own_spec = [(page(5), WhatToRetain(name="price", desc="price in EUR"))]
+    ops = hero.extract_many(own_spec, reduce_html=False)
+    passed &= print_result(ops[0].content == {"price": "5 EUR"}, "(document, spec) tuples accepted")
+    hero.close()
+    return passed
+
+
+# Test 3: Error isolation
+def test_error_isolation():
+    """A raising item or one without a spec fails alone"""
+    print_test_header("3. Error Isolation")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    ops = hero.extract_many([page(0), "explode", page(2)], SPEC, reduce_html=False)
+    passed &= print_result([op.success for op in ops] == [True, False, True], "Raising item failed alone")
+    passed &= print_result("exploded" in (ops[1].error or ""), f"Error kept: {ops[1].error}")
+
+    ops = hero.extract_many([page(0), (page(1), SPEC)], reduce_html=False)
+    passed &= print_result([op.success for op in ops] == [False, True], "Item without a spec failed alone")
+    hero.close()
+    return passed
+
+
+# Test 4: Early close
+def test_early_close():
+    """Closing or cancelling the generator cancels the workers and the pending get"""
+    print_test_header("4. Early Close")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    docs = [page(0)] + [page(i, delay=5) for i in range(1, 6)]
+
+    async def close_early():
+        stream = hero.extract_many_as_completed(docs, SPEC, reduce_html=False, max_concurrency=3)
+        first = await stream.__anext__()
+        try:
+            await asyncio.wait_for(stream.__anext__(), timeout=0.1)
+        except asyncio.TimeoutError:
+            pass
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return first, [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    first, pending = asyncio.run(close_early())
+    passed &= print_result(first[0] == 0, "First result yielded")
+    passed &= print_result(not pending, f"No tasks left running ({len(pending)})")
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 6: BATCH EXTRACTION")
+    print("="*80)
+
+    results = []
+    results.append(("Bounded Concurrency", test_bounded_concurrency()))
+    results.append(("Result Ordering", test_ordering()))
+    results.append(("Error Isolation", test_error_isolation()))
+    results.append(("Early Close", test_early_close()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Test 7: Async subtractive filtering
+Tests FilterHero.run_async(filter_mode="subtractive"): the ToC call goes
+through MyLLMService.get_content_toc_async without blocking the event loop,
+model_name reaches the request, concurrent runs overlap, and the output is
+the same as the sync path. The generation call is replaced with a stub that
+classifies the numbered lines of the prompt by prefix.
+
+Run: python smoke_tests/test_07_async_subtractive.py
+
+Critical because: a blocking ToC call serialises every subtractive extraction in the loop.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import re
+import time
+
+from llmservice import GenerationResult
+
+from extracthero import FilterHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="article", desc="article body")
+LINE_RE = re.compile(r"^\[(\d+)\] (.*)$", re.M)
+DOCUMENT = "\n".join(
+    [f"nav link {i}" for i in range(5)]
+    + [f"Article paragraph {i}" for i in range(10)]
+    + [f"footer item {i}" for i in range(3)]
+)
+
+
+def toc_json(prompt):
+    """One section per run of lines; "nav"/"footer" lines are non-content."""
+    sections = []
+    for n, text in LINE_RE.findall(prompt):
+        n = int(n)
+        is_content = not text.startswith(("nav", "footer"))
+        if sections and sections[-1]["end_line"] == n - 1 and sections[-1]["is_content"] == is_content:
+            sections[-1]["end_line"] = n
+        else:
+            sections.append({
+                "name": "content" if is_content else "chrome",
+                "category": "content" if is_content else "navigation",
+                "start_line": n, "end_line": n, "is_content": is_content, "is_navigation": not is_content,
+            })
+    return json.dumps({"sections": sections})
+
+
+class StubLLM(MyLLMService):
+    """Generation stub: ToC JSON built from the prompt after a 0.2 s "round trip"."""
+
+    def __init__(self):
+        super().__init__()
+        self.models = []
+
+    def execute_generation(self, generation_request, operation_name=None):
+        self.models.append(generation_request.model)
+        time.sleep(0.2)
+        return GenerationResult(success=True, trace_id="toc", content=toc_json(generation_request.user_prompt), usage={"total_tokens": 10})
+
+    async def execute_generation_async(self, generation_request, operation_name=None):
+        self.models.append(generation_request.model)
+        await asyncio.sleep(0.2)
+        return GenerationResult(success=True, trace_id="toc", content=toc_json(generation_request.user_prompt), usage={"total_tokens": 10})
+
+
+# Test 1: Same output as sync
+def test_same_output():
+    """run_async matches run; model_name reaches the request"""
+    print_test_header("1. Async Matches Sync")
+
+    passed = True
+    llm = StubLLM()
+    hero = FilterHero(llm=llm)
+    sync_op = hero.run(DOCUMENT, SPEC, filter_mode="subtractive")
+    async_op = asyncio.run(hero.run_async(DOCUMENT, SPEC, filter_strategy="relaxed", filter_mode="subtractive", model_name="gpt-5"))
+
+    passed &= print_result(sync_op.success and async_op.success, "Both paths succeeded")
+    passed &= print_result(async_op.content == sync_op.content, "Same filtered text")
+    passed &= print_result(async_op.content.split("\n") == [f"Article paragraph {i}" for i in range(10)], "Navigation and footer removed")
+    passed &= print_result(async_op.deletions_applied == sync_op.deletions_applied, "Same deletion ranges")
+    passed &= print_result(llm.models[-1] == "gpt-5", f"model_name passed through: {llm.models}")
+    return passed
+
+
+# Test 2: Non-blocking
+def test_non_blocking():
+    """Concurrent subtractive runs overlap and the loop keeps ticking"""
+    print_test_header("2. Non-blocking ToC Call")
+
+    passed = True
+    hero = FilterHero(llm=StubLLM())
+    ticks = []
+
+    async def ticker():
+        for _ in range(10):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.02)
+
+    async def run_all():
+        start = time.perf_counter()
+        ops = await asyncio.gather(
+            *(hero.run_async(DOCUMENT, SPEC, filter_mode="subtractive") for _ in range(5)),
+            ticker(),
+        )
+        return ops[:-1], time.perf_counter() - start
+
+    ops, elapsed = asyncio.run(run_all())
+    passed &= print_result(all(op.success for op in ops), "All runs succeeded")
+    passed &= print_result(elapsed < 0.6, f"5 runs × 0.2 s overlapped in {elapsed:.2f} s")
+    passed &= print_result(len(ticks) == 10 and max(b - a for a, b in zip(ticks, ticks[1:])) < 0.15, "Event loop kept ticking")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 7: ASYNC SUBTRACTIVE FILTERING")
+    print("="*80)
+
+    results = []
+    results.append(("Async Matches Sync", test_same_output()))
+    results.append(("Non-blocking ToC Call", test_non_blocking()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+Test 8: Reduction executor
+Tests ExtractHero(reduction_executor=...): the async pipelines run
+HtmlReducer on a thread pool (default), a process pool, a caller's Executor
+or inline, with the same reduced corpus and "HTML Reduction" stage tokens
+as the sync path, and a pool created by ExtractHero is shut down by
+close(), a with-block or garbage collection. The LLM prompt methods are
+stubs.
+
+Run: python smoke_tests/test_08_reduction_executor.py
+
+Critical because: a reducer on the event loop stalls every extraction, and a leaked pool leaks processes.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import gc
+from concurrent.futures import ThreadPoolExecutor
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="voltage", desc="reverse voltage")
+HTML = (
+    "<html><head><title>BZX84</title><script>var x = 1;</script></head><body>"
+    "<nav><a href='/'>Home</a></nav>"
+    + "".join(f"<div class='row'><p>Parameter {i}: value {i} V</p></div>" for i in range(30))
+    + "<p>Reverse voltage: 5.1 V</p></body></html>"
+)
+
+
+class StubLLM(MyLLMService):
+    """Filter echoes the corpus; parse returns a fixed dict."""
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        return GenerationResult(success=True, trace_id="f", content=corpus, usage={"total_tokens": 1})
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        return self.filter_via_llm(corpus, thing_to_extract, model, filter_strategy)
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return GenerationResult(success=True, trace_id="p", content={"voltage": "5.1 V"}, usage={"total_tokens": 1})
+
+    async def parse_via_llm_async(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return self.parse_via_llm(corpus, parse_keywords, model, content_output_format)
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+# Test 1: Executor options
+def test_executor_options():
+    """Every executor option gives the sync path's reduction"""
+    print_test_header("1. Executor Options")
+
+    passed = True
+    with ExtractHero(llm=StubLLM()) as hero:
+        passed &= print_result(hero.reduction_executor == "thread", "Default executor is a thread pool")
+        expected = hero.extract(HTML, SPEC)
+    passed &= print_result(expected.success and "HTML Reduction" in expected.stage_tokens, "Sync path reduced the page")
+
+    custom = CountingExecutor()
+    for option in ("thread", "process", None, custom):
+        with ExtractHero(llm=StubLLM(), reduction_executor=option) as hero:
+            op = asyncio.run(hero.extract_async(HTML, SPEC))
+        name = type(option).__name__ if option is custom else repr(option)
+        passed &= print_result(
+            op.reduced_html == expected.reduced_html
+            and op.stage_tokens.get("HTML Reduction") == expected.stage_tokens["HTML Reduction"],
+            f"{name}: same reduced corpus and stage tokens",
+        )
+    passed &= print_result(custom.submitted == 1 and not custom._shutdown, "Caller's executor used and left running")
+    custom.shutdown()
+
+    try:
+        ExtractHero(llm=StubLLM(), reduction_executor="fork")
+        passed &= print_result(False, "Unknown executor accepted")
+    except ValueError:
+        passed &= print_result(True, "Unknown executor rejected")
+    return passed
+
+
+# Test 2: Pool lifecycle
+def test_pool_lifecycle():
+    """Owned pools are shut down by close, with-blocks and garbage collection"""
+    print_test_header("2. Pool Lifecycle")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM())
+    asyncio.run(hero.extract_async(HTML, SPEC))
+    pool = hero._owned_executor
+    hero.close()
+    passed &= print_result(pool._shutdown and hero._owned_executor is None, "close() shuts the pool down")
+
+    async def in_async_with():
+        async with ExtractHero(llm=StubLLM()) as hero:
+            await hero.extract_async(HTML, SPEC)
+            return hero._owned_executor
+
+    pool = asyncio.run(in_async_with())
+    passed &= print_result(pool._shutdown, "async with shuts the pool down")
+
+    hero = ExtractHero(llm=StubLLM())
+    asyncio.run(hero.extract_async(HTML, SPEC))
+    pool = hero._owned_executor
+    del hero
+    gc.collect()
+    passed &= print_result(pool._shutdown, "Garbage collection shuts the pool down")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 8: REDUCTION EXECUTOR")
+    print("="*80)
+
+    results = []
+    results.append(("Executor Options", test_executor_options()))
+    results.append(("Pool Lifecycle", test_pool_lifecycle()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""
+Test 9: Extract pipeline
+Tests ExtractPipeline.run / run_all: results stream out as they complete
+and run_all restores input order, documents are pulled from the input
+lazily (bounded queues), a failing item only fails itself, and an input
+iterator that raises surfaces its error instead of hanging the consumer.
+The LLM prompt methods are stubs.
+
+Run: python smoke_tests/test_09_pipeline.py
+
+Critical because: a pipeline that hangs or buffers the whole batch is worse than no pipeline.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.pipeline import ExtractPipeline
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="price", desc="product price")
+
+
+def page(i):
+    return f"Product {i}\nPrice: {i} EUR"
+
+
+class StubLLM(MyLLMService):
+    """Filter sleeps "delay:" seconds and keeps the Price line; "fail" pages fail."""
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        if "fail" in corpus:
+            return GenerationResult(success=False, trace_id="f", content=None, error_message="boom", usage={})
+        delay = float(corpus.split("delay:")[1].split("\n")[0]) if "delay:" in corpus else 0.01
+        await asyncio.sleep(delay)
+        kept = [line for line in corpus.split("\n") if line.startswith("Price")]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 1})
+
+    async def parse_via_llm_async(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return GenerationResult(success=True, trace_id="p", content={"price": corpus.split(": ")[1]}, usage={"total_tokens": 1})
+
+
+def make_pipeline(**kwargs):
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    return ExtractPipeline(hero, **kwargs)
+
+
+# Test 1: Ordering
+def test_ordering():
+    """run yields as completed; run_all returns input order"""
+    print_test_header("1. Result Ordering")
+
+    passed = True
+    docs = ["delay:0.3\n" + page(0), page(1), page(2)]
+
+    async def collect():
+        return [index async for index, _ in make_pipeline().run(docs, SPEC, reduce_html=False)]
+
+    order = asyncio.run(collect())
+    passed &= print_result(sorted(order) == [0, 1, 2] and order[-1] == 0, f"Slow document finishes last: {order}")
+
+    ops = asyncio.run(make_pipeline().run_all([page(i) for i in range(20)], SPEC, reduce_html=False))
+    passed &= print_result([op.content for op in ops] == [{"price": f"{i} EUR"} for i in range(20)], "run_all in input order")
+    return passed
+
+
+# Test 2: Bounded queues
+def test_bounded_queues():
+    """Documents are pulled lazily, not read into memory up front"""
+    print_test_header("2. Bounded Queues")
+
+    passed = True
+    pulled = [0]
+    ahead = [0]
+
+    def documents():
+        for i in range(60):
+            pulled[0] += 1
+            yield page(i)
+
+    async def consume():
+        done = 0
+        async for _ in make_pipeline(queue_size=1, reduce_workers=1, filter_workers=1, parse_workers=1).run(
+            documents(), SPEC, reduce_html=False
+        ):
+            done += 1
+            ahead[0] = max(ahead[0], pulled[0] - done)
+        return done
+
+    done = asyncio.run(consume())
+    # 4 stage queues of 1 + 4 jobs in workers + 1 held by the feeder
+    passed &= print_result(done == 60 and ahead[0] <= 9, f"At most {ahead[0]} documents in flight")
+    return passed
+
+
+# Test 3: Errors
+def test_errors():
+    """A failing item fails alone; a raising input reaches the caller"""
+    print_test_header("3. Error Paths")
+
+    passed = True
+    ops = asyncio.run(make_pipeline().run_all([page(0), "fail\n" + page(1), page(2), 42], SPEC, reduce_html=False))
+    passed &= print_result([op.success for op in ops] == [True, False, True, False], "Failed items isolated")
+
+    def broken():
+        yield page(0)
+        yield page(1)
+        raise RuntimeError("source read failed")
+
+    async def consume():
+        seen = []
+        try:
+            async for index, _ in make_pipeline().run(broken(), SPEC, reduce_html=False):
+                seen.append(index)
+        except RuntimeError as e:
+            return seen, str(e)
+        return seen, None
+
+    try:
+        seen, error = asyncio.run(asyncio.wait_for(consume(), timeout=10))
+        passed &= print_result(error == "source read failed", f"Input error raised to the caller: {error}")
+        passed &= print_result(sorted(seen) == [0, 1], f"Documents read before the error yielded: {seen}")
+    except asyncio.TimeoutError:
+        passed &= print_result(False, "Pipeline hung on a raising input")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 9: EXTRACT PIPELINE")
+    print("="*80)
+
+    results = []
+    results.append(("Result Ordering", test_ordering()))
+    results.append(("Bounded Queues", test_bounded_queues()))
+    results.append(("Error Paths", test_errors()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+"""
+Test 10: Client-side rate limiting in MyLLMService
+Tests TokenBucket, priority admission and the per-model lanes that sit in
+front of execute_generation. No real LLM calls are made: the base generation call is
+replaced with a stub that reports fixed usage.
+
+Run: python smoke_tests/test_10_rate_limits.py
+
+Critical because: a wrong bucket either lets bursts through (429 storms) or
+throttles far below the provider quota.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+from llmservice import GenerationResult
+from llmservice.base_service import BaseLLMService
+from llmservice.generation_engine import GenerationRequest
+
+from extracthero.myllmservice import MyLLMService
+from extracthero.rate_limits import ModelLane, SlotLimiter, TokenBucket, current_priority, priority_scope
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+def _stub_result(request, total_tokens=100):
+    return GenerationResult(
+        success=True,
+        trace_id="stub",
+        content="ok",
+        model=request.model,
+        usage={"input_tokens": total_tokens, "output_tokens": 0, "total_tokens": total_tokens, "total_cost": 0.0},
+    )
+
+
+# Test 1: TokenBucket basics
+def test_token_bucket():
+    """Bucket admits bursts up to capacity, then makes callers wait"""
+    print_test_header("1. TokenBucket Reservation")
+
+    passed = True
+    bucket = TokenBucket(capacity=100, refill_per_second=1000)
+
+    waited = bucket.acquire_sync(100)
+    passed &= print_result(waited == 0, "Full burst admitted without waiting")
+
+    start = time.monotonic()
+    waited = bucket.acquire_sync(50)
+    elapsed = time.monotonic() - start
+    passed &= print_result(waited > 0 and elapsed >= 0.04, f"Deficit slept off ({waited} ms)")
+
+    bucket.adjust(-1000)
+    passed &= print_result(bucket.available <= bucket.capacity, "Refund never exceeds capacity")
+
+    oversized = TokenBucket(capacity=10, refill_per_second=1000)
+    passed &= print_result(oversized.acquire_sync(10_000) == 0, "Oversized request admitted once bucket is full")
+
+    return passed
+
+
+# Test 2: Async acquire and cancellation refund
+def test_token_bucket_async():
+    """Async acquire waits, and cancelled waiters give their reservation back"""
+    print_test_header("2. TokenBucket Async")
+
+    async def scenario():
+        bucket = TokenBucket(capacity=100, refill_per_second=100)
+        await bucket.acquire(100)
+        task = asyncio.create_task(bucket.acquire(100))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return bucket.available
+
+    available = asyncio.run(scenario())
+    return print_result(available > -10, f"Cancelled reservation refunded (available={available:.1f})")
+
+
+# Test 3: Per-model TPM admission in MyLLMService
+def test_service_tpm_admission():
+    """Only models with a TPM budget are gated, and usage reconciles the estimate"""
+    print_test_header("3. MyLLMService TPM Admission")
+
+    passed = True
+    original = BaseLLMService.execute_generation
+    BaseLLMService.execute_generation = lambda self, req, op=None: _stub_result(req, total_tokens=500)
+    try:
+        llm = MyLLMService(tpm_limits={"gpt-4.1-mini": 6000})
+
+        passed &= print_result(llm._lane_for("gpt-4o-mini") is None, "Model without budget is not gated")
+
+        bucket = llm._lane_for("gpt-4.1-mini").tpm_bucket
+        passed &= print_result(bucket is not None and bucket.capacity == 6000, "Per-model bucket created")
+        passed &= print_result(llm._estimate_prompt_tokens(GenerationRequest(user_prompt="x" * 4000)) == 1001, "Prompt estimate without encoding (~4 bytes per token)")
+
+        request = GenerationRequest(user_prompt="hello " * 50, model="gpt-4.1-mini")
+        result = llm.execute_generation(request)
+        passed &= print_result(result.success, "Request executed through the gate")
+        passed &= print_result(abs(bucket.available - 5500) < 50, f"Bucket charged actual usage (available={bucket.available:.0f})")
+    finally:
+        BaseLLMService.execute_generation = original
+
+    return passed
+
+
+# Test 4: SlotLimiter shared by threads and event loops
+def test_slot_limiter():
+    """Slots are handed over in FIFO order and survive multiple event loops"""
+    print_test_header("4. SlotLimiter")
+
+    passed = True
+    limiter = SlotLimiter(2)
+    order = []
+
+    async def job(name):
+        await limiter.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        limiter.release()
+
+    async def scenario():
+        await asyncio.gather(*(job(i) for i in range(6)))
+
+    asyncio.run(scenario())
+    passed &= print_result(order == list(range(6)), f"FIFO hand-over order: {order}")
+
+    # A second asyncio.run uses a new loop; an asyncio.Semaphore would be bound to the old one
+    order.clear()
+    asyncio.run(scenario())
+    passed &= print_result(len(order) == 6 and limiter.in_use == 0, "Reusable across event loops")
+
+    return passed
+
+
+# Test 5: Lanes are isolated per model
+def test_model_lanes():
+    """A saturated lane doesn't block requests for a different model"""
+    print_test_header("5. Per-Model Lanes")
+
+    passed = True
+    original = BaseLLMService.execute_generation_async
+
+    async def slow_stub(self, req, op=None):
+        await asyncio.sleep(0.2 if req.model == "gpt-4.1-mini" else 0.0)
+        return _stub_result(req)
+
+    BaseLLMService.execute_generation_async = slow_stub
+    try:
+        llm = MyLLMService(model_limits={
+            "gpt-4.1-mini": {"max_concurrent": 1},
+            "gpt-4o-mini": {"max_concurrent": 4, "rpm": 6000},
+        })
+
+        async def scenario():
+            busy = [
+                asyncio.create_task(llm.execute_generation_async(GenerationRequest(user_prompt=f"toc {i}", model="gpt-4.1-mini")))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0.01)
+            start = time.monotonic()
+            await llm.execute_generation_async(GenerationRequest(user_prompt="parse", model="gpt-4o-mini"))
+            other_lane_latency = time.monotonic() - start
+            await asyncio.gather(*busy)
+            return other_lane_latency
+
+        latency = asyncio.run(scenario())
+        passed &= print_result(latency < 0.1, f"Other model not starved ({latency * 1000:.0f} ms)")
+
+        lane = llm._lane_for("gpt-4o-mini")
+        passed &= print_result(isinstance(lane, ModelLane) and lane.rpm_bucket is not None, "RPM bucket configured per model")
+
+        llm.set_model_limits("gpt-4.1-mini", max_concurrent=8)
+        passed &= print_result(llm._lane_for("gpt-4.1-mini").slots.slots == 8, "Lane reconfigured at runtime")
+    finally:
+        BaseLLMService.execute_generation_async = original
+
+    return passed
+
+
+# Test 6: Priority classes
+def test_priority_classes():
+    """Interactive waiters are admitted ahead of bulk work queued earlier, for slots and budget"""
+    print_test_header("6. Priority Classes")
+
+    passed = True
+    limiter = SlotLimiter(1)
+    order = []
+
+    async def job(name, priority):
+        with priority_scope(priority):
+            await limiter.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        limiter.release()
+
+    async def scenario():
+        await limiter.acquire()  # hold the only slot while the queue fills up
+        tasks = [asyncio.create_task(job(f"bulk-{i}", "bulk")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(job("interactive", "interactive")))
+        await asyncio.sleep(0.01)
+        limiter.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    passed &= print_result(order[0] == "interactive", f"Interactive jumped the queue: {order}")
+    passed &= print_result(order[1:] == ["bulk-0", "bulk-1", "bulk-2"], "FIFO within a priority class")
+
+    # The same order applies to budget waits in a TPM bucket
+    bucket = TokenBucket(capacity=100, refill_per_second=1000)
+    budget_order = []
+
+    async def spend(name, priority):
+        with priority_scope(priority):
+            await bucket.acquire(100)
+        budget_order.append(name)
+
+    async def budget_scenario():
+        await bucket.acquire(100)  # drain the bucket while the queue fills up
+        tasks = [asyncio.create_task(spend(f"bulk-{i}", "bulk")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(spend("interactive", "interactive")))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(budget_scenario())
+    passed &= print_result(budget_order == ["interactive", "bulk-0", "bulk-1", "bulk-2"], f"Interactive jumped the TPM queue: {budget_order}")
+
+    with priority_scope("bulk"):
+        inner = current_priority()
+        with priority_scope(None):
+            passed &= print_result(current_priority() == inner, "None keeps the surrounding priority")
+    passed &= print_result(current_priority() == 5, "Scope restored on exit")
+
+    try:
+        with priority_scope("urgent"):
+            pass
+        passed &= print_result(False, "Unknown class should raise")
+    except ValueError:
+        passed &= print_result(True, "Unknown class rejected")
+
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 10: RATE LIMITS")
+    print("="*80)
+
+    results = []
+    results.append(("TokenBucket", test_token_bucket()))
+    results.append(("TokenBucket Async", test_token_bucket_async()))
+    results.append(("Service TPM Admission", test_service_tpm_admission()))
+    results.append(("SlotLimiter", test_slot_limiter()))
+    results.append(("Per-Model Lanes", test_model_lanes()))
+    results.append(("Priority Classes", test_priority_classes()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Test 11: Hedged LLM requests
+Tests that MyLLMService fires a duplicate for calls slower than the learned
+pXX latency, keeps the faster answer and reports the duplicate in usage.
+The base generation call is replaced with a stub, no real LLM calls are made.
+
+Run: python smoke_tests/test_11_hedging.py
+
+Critical because: a hedge that fires too eagerly doubles the bill, one that
+never fires leaves the 100 s tail in place.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import itertools
+import time
+
+from llmservice import GenerationResult
+from llmservice.base_service import BaseLLMService
+from llmservice.generation_engine import GenerationRequest
+
+from extracthero.hedging import HedgePolicy, LatencyTracker, normalize_operation
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+def _stub_result(request, label):
+    return GenerationResult(
+        success=True,
+        trace_id=label,
+        content=label,
+        model=request.model,
+        usage={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110,
+               "input_cost": 0.01, "output_cost": 0.001, "total_cost": 0.011},
+    )
+
+
+def _warm_up(llm, request, samples):
+    key = llm._hedge_key(request, None)
+    for _ in range(samples):
+        llm._latency.record(key, 0.02)
+
+
+# Test 1: Latency tracker
+def test_latency_tracker():
+    """Cold buckets never hedge; warm ones hedge at the configured quantile"""
+    print_test_header("1. Latency Tracker")
+
+    passed = True
+    tracker = LatencyTracker(HedgePolicy(quantile=0.9, min_samples=5, min_delay_s=0.0))
+    key = ("gpt-4o-mini", "filter_via_llm", 0)
+
+    passed &= print_result(tracker.threshold(key) is None, "Cold bucket has no threshold")
+    for latency in range(1, 11):
+        tracker.record(key, float(latency))
+    passed &= print_result(tracker.threshold(key) == 10.0, f"p90 of 1..10 s = {tracker.threshold(key)}")
+    passed &= print_result(normalize_operation("parse_via_llm_async") == "parse_via_llm", "Async suffix normalized")
+
+    return passed
+
+
+# Test 2: Async hedge wins over a stuck call
+def test_async_hedge():
+    """A stuck primary is overtaken by its duplicate and the overhead is reported"""
+    print_test_header("2. Async Hedge")
+
+    passed = True
+    original = BaseLLMService.execute_generation_async
+    calls = itertools.count()
+
+    async def stub(self, req, op=None):
+        n = next(calls)
+        await asyncio.sleep(5.0 if n == 0 else 0.01)
+        return _stub_result(req, f"call-{n}")
+
+    BaseLLMService.execute_generation_async = stub
+    try:
+        llm = MyLLMService(hedge_policy=HedgePolicy(min_samples=3, min_delay_s=0.05, max_hedge_ratio=1.0))
+        request = GenerationRequest(user_prompt="filter me", model="gpt-4o-mini", operation_name="filter_via_llm_async")
+        _warm_up(llm, request, 3)
+
+        start = time.monotonic()
+        result = asyncio.run(llm.execute_generation_async(request))
+        elapsed = time.monotonic() - start
+
+        passed &= print_result(result.content == "call-1" and elapsed < 1.0, f"Duplicate answered first ({elapsed * 1000:.0f} ms)")
+        passed &= print_result(result.usage.get("hedged_requests") == 1, "hedged_requests reported")
+        passed &= print_result(abs(result.usage["total_cost"] - 0.021) < 1e-9, f"Overhead charged (total_cost={result.usage['total_cost']:.3f})")
+
+        other = GenerationRequest(user_prompt="x", model="gpt-4o-mini", operation_name="categorize_simple_async")
+        passed &= print_result(llm._hedge_key(other, None) is None, "Ineligible operations are not hedged")
+    finally:
+        BaseLLMService.execute_generation_async = original
+
+    return passed
+
+
+# Test 3: Sync hedge and budget
+def test_sync_hedge_budget():
+    """The sync path hedges too, within max_hedge_ratio and idle capacity"""
+    print_test_header("3. Sync Hedge Budget")
+
+    passed = True
+    original = BaseLLMService.execute_generation
+    calls = itertools.count()
+
+    def stub(self, req, op=None):
+        n = next(calls)
+        time.sleep(0.5 if n == 0 else 0.01)
+        return _stub_result(req, f"call-{n}")
+
+    BaseLLMService.execute_generation = stub
+    try:
+        llm = MyLLMService(hedge_policy=HedgePolicy(min_samples=3, min_delay_s=0.05, max_hedge_ratio=0.5))
+        request = GenerationRequest(user_prompt="parse me", model="gpt-4o-mini", operation_name="parse_via_llm")
+        _warm_up(llm, request, 3)
+
+        result = llm.execute_generation(request)
+        passed &= print_result(result.content == "call-1" and result.usage.get("hedged_requests") == 1, "Sync duplicate answered first")
+
+        passed &= print_result(not llm._latency.try_spend_hedge(), "Budget exhausted after 1 hedge in 1 call")
+
+        # One admission slot, held by the primary: no idle capacity to hedge with
+        calls = itertools.count()
+        saturated = MyLLMService(max_concurrent_requests=1, hedge_policy=HedgePolicy(min_samples=3, min_delay_s=0.05, max_hedge_ratio=1.0))
+        _warm_up(saturated, request, 3)
+        result = saturated.execute_generation(request)
+        passed &= print_result(result.content == "call-0" and "hedged_requests" not in result.usage, "Saturated sync service waits on the original call")
+        passed &= print_result(saturated._latency.hedged == 0, "No hedge budget spent")
+    finally:
+        BaseLLMService.execute_generation = original
+
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 11: HEDGED REQUESTS")
+    print("="*80)
+
+    results = []
+    results.append(("Latency Tracker", test_latency_tracker()))
+    results.append(("Async Hedge", test_async_hedge()))
+    results.append(("Sync Hedge Budget", test_sync_hedge_budget()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+"""
+Test 12: Multi-spec fan-out
+Tests that max_specs_per_call splits a spec list into concurrent filter and
+parse calls (at most max_fanout_workers threads at a time) and merges them
+back into one ExtractOp. The LLM prompt methods are replaced with stubs
+that echo which specs they were given.
+
+Run: python smoke_tests/test_12_spec_fanout.py
+
+Critical because: a wrong merge silently drops fields from the final dict.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, FilterHero, WhatToRetain
+from extracthero.fanout import spec_groups
+from extracthero.myllmservice import MyLLMService, TocOutput, TocSection
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPECS = [WhatToRetain(name=f"field_{i}", desc=f"value of field {i}") for i in range(6)]
+
+
+def _usage():
+    return {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15, "total_cost": 0.001}
+
+
+class StubLLM(MyLLMService):
+    """Echoes the spec names it sees; each call takes 0.1 s."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._calls_lock = threading.Lock()
+
+    def _names(self, prompt):
+        return [spec.name for spec in SPECS if spec.name in prompt]
+
+    def _count(self):
+        with self._calls_lock:
+            self.calls += 1
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self._count()
+        with self._calls_lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.1)
+        with self._calls_lock:
+            self.active -= 1
+        return GenerationResult(success=True, trace_id="f", content=" ".join(self._names(thing_to_extract)), usage=_usage())
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        self._count()
+        time.sleep(0.1)
+        return GenerationResult(success=True, trace_id="p", content={n: "ok" for n in self._names(parse_keywords)}, usage=_usage())
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self._count()
+        await asyncio.sleep(0.1)
+        return GenerationResult(success=True, trace_id="f", content=" ".join(self._names(thing_to_extract)), usage=_usage())
+
+    async def parse_via_llm_async(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        self._count()
+        await asyncio.sleep(0.1)
+        return GenerationResult(success=True, trace_id="p", content={n: "ok" for n in self._names(parse_keywords)}, usage=_usage())
+
+
+def _section(start, end, keep):
+    return TocSection(
+        name="body" if keep else "menu", category="content" if keep else "navigation",
+        start_line=start, end_line=end, is_content=keep, is_navigation=not keep,
+    )
+
+
+class TocStubLLM(MyLLMService):
+    """field_0 keeps lines 4-6; field_1 keeps lines 2-3 (a price in the header)."""
+
+    def get_content_toc(self, numbered_corpus, max_line, what_to_retain, model=None):
+        if "field_0" in what_to_retain:
+            sections = [_section(1, 3, False), _section(4, 6, True)]
+        else:
+            sections = [_section(1, 1, False), _section(2, 3, True), _section(4, 6, False)]
+        return GenerationResult(success=True, trace_id="toc", content=TocOutput(sections=sections), usage=_usage())
+
+
+# Test 1: Grouping
+def test_spec_groups():
+    """Spec lists are chunked, single specs are left alone"""
+    print_test_header("1. Spec Grouping")
+
+    passed = True
+    passed &= print_result([len(g) for g in spec_groups(SPECS, 4)] == [4, 2], "6 specs / 4 per call → [4, 2]")
+    passed &= print_result(spec_groups(SPECS, None) == [SPECS], "None keeps a single call")
+    passed &= print_result(spec_groups(SPECS[0], 1) == [SPECS[0]], "Single spec untouched")
+    return passed
+
+
+# Test 2: Sync fan-out through ExtractHero
+def test_sync_fanout():
+    """Groups run concurrently and all fields survive the merge"""
+    print_test_header("2. Sync Fan-out")
+
+    passed = True
+    llm = StubLLM()
+    hero = ExtractHero(llm=llm, reduction_executor="thread")
+
+    start = time.monotonic()
+    op = hero.extract("some text", SPECS, reduce_html=False, max_specs_per_call=2)
+    elapsed = time.monotonic() - start
+
+    passed &= print_result(op.success, "Extraction succeeded")
+    passed &= print_result(sorted(op.content) == [s.name for s in SPECS], f"All fields merged: {sorted(op.content or {})}")
+    passed &= print_result(llm.calls == 6, f"3 filter + 3 parse calls ({llm.calls})")
+    passed &= print_result(elapsed < 0.5, f"Calls overlapped ({elapsed * 1000:.0f} ms)")
+    passed &= print_result(op.usage and op.usage.get("fanout_calls") == 6, "Usage summed across calls")
+    hero.close()
+    return passed
+
+
+# Test 3: Async fan-out
+def test_async_fanout():
+    """The async path gathers the groups on the event loop"""
+    print_test_header("3. Async Fan-out")
+
+    passed = True
+    llm = StubLLM()
+    hero = ExtractHero(llm=llm, reduction_executor="thread")
+
+    op = asyncio.run(hero.extract_async("some text", SPECS, reduce_html=False, max_specs_per_call=3))
+    passed &= print_result(op.success and len(op.content) == 6, "All fields merged")
+    passed &= print_result(llm.calls == 4, f"2 filter + 2 parse calls ({llm.calls})")
+    hero.close()
+    return passed
+
+
+# Test 4: Worker cap
+def test_worker_cap():
+    """A fan-out never runs more threads than max_fanout_workers"""
+    print_test_header("4. Worker Cap")
+
+    passed = True
+    llm = StubLLM(max_fanout_workers=2)
+    hero = ExtractHero(llm=llm, reduction_executor="thread")
+
+    op = hero.extract("some text", SPECS, reduce_html=False, max_specs_per_call=1)
+    passed &= print_result(op.success and len(op.content) == 6, "All fields merged")
+    passed &= print_result(llm.peak == 2, f"At most 2 concurrent filter calls for 6 groups (peak {llm.peak})")
+    hero.close()
+
+    try:
+        StubLLM(max_fanout_workers=0)
+        passed &= print_result(False, "max_fanout_workers=0 accepted")
+    except ValueError:
+        passed &= print_result(True, "max_fanout_workers=0 rejected")
+    return passed
+
+
+# Test 5: Subtractive ToC merge
+def test_toc_merge():
+    """A line one group keeps is not reported as deleted by another"""
+    print_test_header("5. Subtractive ToC Merge")
+
+    passed = True
+    hero = FilterHero(llm=TocStubLLM())
+    text = "\n".join(["Menu", "Price: 20 EUR", "Sale", "Body 1", "Body 2", "Body 3"])
+    op = hero.run(text, SPECS[:2], filter_mode="subtractive", max_specs_per_call=1)
+    deleted = [(d["start_line"], d["end_line"]) for d in op.deletions_applied or []]
+
+    passed &= print_result(op.success and op.content == "\n".join(text.split("\n")[1:]), "Lines kept by either group survive")
+    passed &= print_result(deleted == [(1, 1)], f"Only line 1 reported as deleted: {deleted}")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 12: MULTI-SPEC FAN-OUT")
+    print("="*80)
+
+    results = []
+    results.append(("Spec Grouping", test_spec_groups()))
+    results.append(("Sync Fan-out", test_sync_fanout()))
+    results.append(("Async Fan-out", test_async_fanout()))
+    results.append(("Worker Cap", test_worker_cap()))
+    results.append(("Subtractive ToC Merge", test_toc_merge()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
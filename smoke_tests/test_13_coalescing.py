@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+"""
+Test 13: Single-flight request coalescing
+Tests that identical concurrent requests share one provider call in
+MyLLMService, from coroutines and from threads, and that followers' usage
+doesn't double count the spend. The base generation call is a stub.
+
+Run: python smoke_tests/test_13_coalescing.py
+
+Critical because: a coalescing bug either hands one page's result to a
+different page or deadlocks every caller waiting on a failed leader.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llmservice import GenerationResult
+from llmservice.base_service import BaseLLMService
+from llmservice.generation_engine import GenerationRequest
+
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+def _stub_result(request, n):
+    return GenerationResult(
+        success=True,
+        trace_id=f"call-{n}",
+        content=request.user_prompt.upper(),
+        model=request.model,
+        usage={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110, "total_cost": 0.01},
+    )
+
+
+# Test 1: Async callers share one call
+def test_async_coalescing():
+    """Five identical coroutines cause one provider call"""
+    print_test_header("1. Async Coalescing")
+
+    passed = True
+    original = BaseLLMService.execute_generation_async
+    calls = itertools.count()
+
+    async def stub(self, req, op=None):
+        n = next(calls)
+        await asyncio.sleep(0.05)
+        return _stub_result(req, n)
+
+    BaseLLMService.execute_generation_async = stub
+    try:
+        llm = MyLLMService()
+
+        async def scenario():
+            same = [llm.execute_generation_async(GenerationRequest(user_prompt="page", model="gpt-4o-mini")) for _ in range(5)]
+            other = llm.execute_generation_async(GenerationRequest(user_prompt="other page", model="gpt-4o-mini"))
+            return await asyncio.gather(*same, other)
+
+        results = asyncio.run(scenario())
+        provider_calls = next(calls)
+        passed &= print_result(provider_calls == 2, f"6 requests, 2 distinct → {provider_calls} provider calls")
+        passed &= print_result(all(r.content == "PAGE" for r in results[:5]) and results[5].content == "OTHER PAGE", "Each caller got its own prompt's answer")
+
+        total_cost = sum(r.usage["total_cost"] for r in results[:5])
+        coalesced = sum(r.usage.get("coalesced_requests", 0) for r in results[:5])
+        passed &= print_result(abs(total_cost - 0.01) < 1e-9 and coalesced == 4, f"Spend counted once (cost={total_cost}, coalesced={coalesced})")
+        passed &= print_result(len({id(r) for r in results}) == 6, "Followers get their own result objects")
+    finally:
+        BaseLLMService.execute_generation_async = original
+
+    return passed
+
+
+# Test 2: Threads share one call; nothing is cached afterwards
+def test_sync_coalescing():
+    """Identical blocking calls from threads coalesce; later calls run again"""
+    print_test_header("2. Sync Coalescing")
+
+    passed = True
+    original = BaseLLMService.execute_generation
+    calls = itertools.count()
+
+    def stub(self, req, op=None):
+        n = next(calls)
+        time.sleep(0.1)
+        return _stub_result(req, n)
+
+    BaseLLMService.execute_generation = stub
+    try:
+        llm = MyLLMService()
+        request = GenerationRequest(user_prompt="page", model="gpt-4o-mini")
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: llm.execute_generation(request), range(4)))
+        passed &= print_result(next(calls) == 1, "4 threads → 1 provider call")
+        passed &= print_result(len({r.trace_id for r in results}) == 1, "All threads received the same answer")
+
+        llm.execute_generation(request)
+        passed &= print_result(next(calls) == 3, "Finished flights are not cached")
+        passed &= print_result(llm._single_flight.in_flight == 0, "Registry empty when idle")
+    finally:
+        BaseLLMService.execute_generation = original
+
+    return passed
+
+
+# Test 3: Failing leader
+def test_leader_failure():
+    """Followers see the leader's exception instead of hanging"""
+    print_test_header("3. Leader Failure")
+
+    original = BaseLLMService.execute_generation_async
+
+    async def stub(self, req, op=None):
+        await asyncio.sleep(0.05)
+        raise RuntimeError("provider exploded")
+
+    BaseLLMService.execute_generation_async = stub
+    try:
+        llm = MyLLMService()
+
+        async def scenario():
+            request = GenerationRequest(user_prompt="page", model="gpt-4o-mini")
+            return await asyncio.wait_for(
+                asyncio.gather(*(llm.execute_generation_async(request) for _ in range(3)), return_exceptions=True),
+                timeout=2,
+            )
+
+        results = asyncio.run(scenario())
+        passed = print_result(all(isinstance(r, RuntimeError) for r in results), "Error propagated to all callers")
+    finally:
+        BaseLLMService.execute_generation_async = original
+
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 13: REQUEST COALESCING")
+    print("="*80)
+
+    results = []
+    results.append(("Async Coalescing", test_async_coalescing()))
+    results.append(("Sync Coalescing", test_sync_coalescing()))
+    results.append(("Leader Failure", test_leader_failure()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
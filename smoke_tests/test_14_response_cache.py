@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""
+Test 14: LLM response cache
+Tests InMemoryLRUCache eviction, the SQLite disk tier shared between
+processes and the cache layer in MyLLMService: a repeated filter / parse
+call is served from the cache, post-processed like a live answer and
+reported in usage. The base generation call is a stub.
+
+Run: python smoke_tests/test_14_response_cache.py
+
+Critical because: a stale or mis-keyed cache returns one page's data for
+another, which is worse than paying for the call.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import itertools
+import json
+import multiprocessing
+import tempfile
+import time
+
+from llmservice import GenerationResult
+from llmservice.base_service import BaseLLMService
+from llmservice.generation_engine import GenerationRequest
+
+from extracthero.cache import InMemoryLRUCache, ResponseCache, SqliteCache, SqliteReductionCache
+from extracthero.myllmservice import MyLLMService
+from extracthero.sqlite_store import SqliteStore
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+def _result(content, n=0):
+    return GenerationResult(
+        success=True,
+        trace_id=f"call-{n}",
+        content=content,
+        usage={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110, "total_cost": 0.01},
+    )
+
+
+# Test 1: LRU eviction by size
+def test_lru_eviction():
+    """Least recently used entries go first once max_bytes is exceeded"""
+    print_test_header("1. LRU Eviction")
+
+    passed = True
+    cache = InMemoryLRUCache(max_bytes=3 * (1000 + 512))
+    for key in "abc":
+        cache.put(key, _result("x" * 1000))
+    cache.get("a")  # a is now most recent
+    cache.put("d", _result("x" * 1000))
+
+    passed &= print_result(cache.get("b") is None, "Least recently used entry evicted")
+    passed &= print_result(cache.get("a") is not None and cache.get("d") is not None, "Recent entries kept")
+    stats = cache.stats()
+    passed &= print_result(stats["evictions"] == 1 and stats["bytes"] <= stats["max_bytes"], f"Stats: {stats}")
+
+    big = _result("x" * 1000)
+    big.formatted_prompt = "corpus " * 200_000
+    cache.put("e", big)
+    cached = cache.get("e")
+    passed &= print_result(cached is not None and cached.formatted_prompt is None, "Prompt not kept in the cache")
+    passed &= print_result(cache.stats()["bytes"] <= cache.max_bytes, "Budget holds with a large prompt")
+
+    class GetOnly(ResponseCache):
+        def get(self, key):
+            return None
+
+    try:
+        GetOnly()
+        passed &= print_result(False, "Incomplete ResponseCache subclass instantiated")
+    except TypeError:
+        passed &= print_result(True, "Incomplete ResponseCache subclass rejected")
+    return passed
+
+
+# Test 2: Cached calls through MyLLMService
+def test_service_cache():
+    """Second identical parse is a cache hit, different corpus is a miss"""
+    print_test_header("2. Service Cache")
+
+    passed = True
+    original = BaseLLMService.execute_generation
+    calls = itertools.count()
+
+    def stub(self, req, op=None):
+        n = next(calls)
+        return _result(json.dumps({"extracted_data": {"price": f"€{n}"}}), n)
+
+    BaseLLMService.execute_generation = stub
+    try:
+        llm = MyLLMService(cache=InMemoryLRUCache())
+
+        first = llm.parse_via_llm("price: €5", "price")
+        second = llm.parse_via_llm("price: €5", "price")
+        third = llm.parse_via_llm("price: €7", "price")
+
+        passed &= print_result(next(calls) == 2, "Only the two distinct corpora hit the provider")
+        passed &= print_result(second.content == first.content == {"price": "€0"}, f"Cached result post-processed: {second.content}")
+        passed &= print_result(second.usage.get("cache_hits") == 1 and second.usage["total_cost"] == 0, "Hit reported and free")
+        passed &= print_result(first.usage.get("cache_misses") == 1 and third.usage.get("cache_misses") == 1, "Misses reported")
+
+        llm.dummy_categorize_simple()
+        passed &= print_result(len(llm.cache) == 2, "Operations outside cached_operations are not stored")
+    finally:
+        BaseLLMService.execute_generation = original
+
+    # A slow (e.g. locked SQLite) tier must not stall the event loop
+    class SlowCache(InMemoryLRUCache):
+        def get(self, key):
+            time.sleep(0.2)
+            return super().get(key)
+
+        def put(self, key, result):
+            time.sleep(0.2)
+            super().put(key, result)
+
+    original_async = BaseLLMService.execute_generation_async
+
+    async def stub_async(self, req, op=None):
+        return _result("ok")
+
+    BaseLLMService.execute_generation_async = stub_async
+    try:
+        llm = MyLLMService(cache=SlowCache())
+        request = GenerationRequest(user_prompt="filter me", model="gpt-4o-mini", operation_name="filter_via_llm_async")
+        ticks = []
+
+        async def ticker():
+            for _ in range(20):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+
+        async def scenario():
+            ticking = asyncio.create_task(ticker())
+            await asyncio.sleep(0.05)
+            result = await llm.execute_generation_async(request)
+            await ticking
+            return result
+
+        result = asyncio.run(scenario())
+        gap = max(b - a for a, b in zip(ticks, ticks[1:]))
+        passed &= print_result(result.success and len(llm.cache) == 1, "Async result stored")
+        passed &= print_result(gap < 0.15, f"Event loop kept ticking during cache I/O (max gap {gap * 1000:.0f} ms)")
+    finally:
+        BaseLLMService.execute_generation_async = original_async
+
+    return passed
+
+
+def _write_from_child(path):
+    SqliteCache(path).put("shared-key", _result("written by child"))
+
+
+# Test 3: SQLite tier
+def test_sqlite_cache():
+    """Disk entries survive processes, expire by TTL and are trimmed to budget"""
+    print_test_header("3. SQLite Cache")
+
+    passed = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache", "extracthero.db")
+
+        child = multiprocessing.Process(target=_write_from_child, args=(path,))
+        child.start()
+        child.join()
+        hit = SqliteCache(path).get("shared-key")
+        passed &= print_result(hit is not None and hit.content == "written by child", "Entry written by another process is reused")
+        passed &= print_result(hit.usage["total_cost"] == 0.01, "Usage round-trips through JSON")
+
+        store = SqliteStore(path, table="budget", max_bytes=3000, ttl_seconds=None, trim_every=1)
+        for i in range(10):
+            store.put_bytes(f"k{i}", b"x" * 1000)
+        stats = store.stats()
+        passed &= print_result(stats["bytes"] <= 3000 and store.get_bytes("k9") is not None, f"Trimmed to budget: {stats['entries']} entries")
+
+        expiring = SqliteStore(path, table="ttl", ttl_seconds=0.05)
+        expiring.put_bytes("k", b"v")
+        time.sleep(0.1)
+        passed &= print_result(expiring.get_bytes("k") is None, "Expired entry treated as missing")
+
+        reductions = SqliteReductionCache(path)
+        reductions.put("html", {"reduced": "<p>hi</p>"})
+        passed &= print_result(reductions.get("html") == {"reduced": "<p>hi</p>"}, "Reduction outputs share the same file")
+
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 14: RESPONSE CACHE")
+    print("="*80)
+
+    results = []
+    results.append(("LRU Eviction", test_lru_eviction()))
+    results.append(("Service Cache", test_service_cache()))
+    results.append(("SQLite Cache", test_sqlite_cache()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Test 15: Canonical HTML fingerprints
+Tests that per-request noise (nonces, CSRF tokens, cache-busting and
+tracking params, inline scripts) doesn't change html_fingerprint while real
+content changes do, including numbers in paths and ids, and that
+ExtractHero(reduction_cache="memory") reuses a cached reduction for such pages.
+
+Run: python smoke_tests/test_15_html_fingerprints.py
+
+Critical because: a fingerprint that ignores real content serves stale
+reductions; one that keeps the noise never hits.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from extracthero import ExtractHero
+from extracthero.fingerprints import canonical_html, html_fingerprint
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+PAGE = """<html><head>
+<meta name="csrf-token" content="{token}">
+<script nonce="{nonce}">window.__STATE__ = {{"rendered": {ts}}};</script>
+<link rel="stylesheet" href="/main.css?ts={ts}&amp;_={ts}">
+</head><body>
+<!-- rendered at {ts} -->
+<a href="/product/42?utm_source={src}&amp;ref=nav">BZX84 Zener diode</a>
+<form><input type="hidden" name="authenticity_token" value="{token}"></form>
+<p>Reverse voltage: {voltage} V</p>
+</body></html>"""
+
+
+def _page(voltage="5.1", token="abc", nonce="n1", ts="1712345678", src="mail"):
+    return PAGE.format(voltage=voltage, token=token, nonce=nonce, ts=ts, src=src)
+
+
+# Test 1: Noise is ignored, content is not
+def test_fingerprint_stability():
+    """Volatile attributes don't change the fingerprint; visible text does"""
+    print_test_header("1. Fingerprint Stability")
+
+    passed = True
+    base = html_fingerprint(_page())
+    noisy = html_fingerprint(_page(token="zzz", nonce="n2", ts="1799999999", src="twitter"))
+    changed = html_fingerprint(_page(voltage="6.2"))
+
+    passed &= print_result(base == noisy, "Re-crawl with new tokens/nonces/timestamps matches")
+    passed &= print_result(base != changed, "Changed reverse voltage changes the fingerprint")
+    passed &= print_result("ref=nav" in canonical_html(_page()), "Non-tracking query params kept")
+
+    # Numbers in paths and ids are content, even when they look like timestamps
+    for a, b in (
+        ('<a href="/product/1234567890">Lamp</a>', '<a href="/product/1999999999">Lamp</a>'),
+        ('<div id="sku-1234567890">Lamp</div>', '<div id="sku-1098765432">Lamp</div>'),
+        ('<img src="/img/1712345678000.jpg">', '<img src="/img/1712345679000.jpg">'),
+    ):
+        passed &= print_result(html_fingerprint(a) != html_fingerprint(b), f"Differs: {a} vs {b}")
+    passed &= print_result(
+        html_fingerprint('<p data-timestamp="1712345678">x</p>') == html_fingerprint('<p data-timestamp="1799999999">x</p>'),
+        "data-timestamp attribute ignored",
+    )
+    return passed
+
+
+# Test 2: ExtractHero skips the reduction for a noisy re-crawl
+def test_reduction_cache_hit():
+    """Second page with only volatile differences reuses the first reduction"""
+    print_test_header("2. Reduction Cache Hit")
+
+    passed = True
+    passed &= print_result(ExtractHero().reduction_cache is None, "Reduction cache is off by default")
+
+    hero = ExtractHero(reduction_cache="memory")
+    hero._reduce_html(_page(), True, {})
+    noisy = _page(token="a-much-longer-csrf-token-value", nonce="n2", ts="1799999999")
+    stage_tokens = {}
+    hero._reduce_html(noisy, True, stage_tokens)
+    hero._reduce_html(_page(voltage="6.2"), True, {})
+
+    stats = hero.reduction_cache.stats()
+    passed &= print_result(stats["hits"] == 1 and stats["misses"] == 2, f"1 hit, 2 misses: {stats}")
+    input_tokens = stage_tokens["HTML Reduction"]["input"]
+    actual = len(hero.encoding.encode(noisy))
+    passed &= print_result(abs(input_tokens - actual) <= actual * 0.1, f"Cache hit estimates this input's tokens ({input_tokens} vs {actual})")
+    passed &= print_result(hero.token_ledger.encodes == 0, "Cache hit didn't re-encode the page")
+
+    stage_tokens = {}
+    exact = hero._reduce_html(_page(), True, {})[2]
+    asyncio.run(hero._reduce_html_async(_page(), True, stage_tokens))
+    passed &= print_result(stage_tokens["HTML Reduction"]["input"] == exact.total_token, "Same page reuses the cached count (async)")
+    passed &= print_result(hero.token_ledger.encodes == 0, "Still no encode")
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 15: HTML FINGERPRINTS")
+    print("="*80)
+
+    results = []
+    results.append(("Fingerprint Stability", test_fingerprint_stability()))
+    results.append(("Reduction Cache Hit", test_reduction_cache_hit()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
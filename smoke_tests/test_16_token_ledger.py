@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Test 16: Token ledger
+Tests that token counts are memoized by content and carried through
+FilterOp / FilterChainOp / ExtractOp, so an extraction encodes each text at
+most once. The LLM prompt methods are replaced with stubs.
+
+Run: python smoke_tests/test_16_token_ledger.py
+
+Critical because: on multi-MB inputs repeated tiktoken passes dominate local CPU time.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.token_ledger import TokenLedger
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="price", desc="product price")
+CORPUS = "\n".join(f"line {i} with some words in it" for i in range(2000)) + "\nprice: 42 EUR"
+
+
+class StubLLM(MyLLMService):
+    """Filter keeps the price line; parse returns a dict."""
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        kept = [line for line in corpus.split("\n") if "price" in line or "EUR" in line]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 1})
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return GenerationResult(success=True, trace_id="p", content={"price": "42 EUR"}, usage={"total_tokens": 1})
+
+
+# Test 1: Ledger basics
+def test_ledger_memoizes():
+    """count() encodes once per distinct text; record() seeds counts"""
+    print_test_header("1. Ledger Memoization")
+
+    passed = True
+    ledger = TokenLedger()
+    first = ledger.count(CORPUS)
+    second = ledger.count(CORPUS)
+    passed &= print_result(first == second and first > 0, f"Same count twice ({first})")
+    passed &= print_result(ledger.encodes == 1, f"Encoded once ({ledger.encodes})")
+
+    ledger.record("seeded text", 7)
+    passed &= print_result(ledger.count("seeded text") == 7 and ledger.encodes == 1, "Seeded count used without encoding")
+    passed &= print_result(ledger.peek("never seen") is None, "peek() does not encode")
+    return passed
+
+
+# Test 2: Extraction encodes each text once
+def test_extract_single_encode():
+    """Filter input and output are counted once and carried on the ops"""
+    print_test_header("2. Single Encode per Text")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    op = hero.extract(CORPUS, SPEC, reduce_html=False)
+    ledger = hero.token_ledger
+
+    passed &= print_result(op.success, "Extraction succeeded")
+    # corpus, filter output, parse output
+    passed &= print_result(ledger.encodes == 3, f"3 encodes for 3 distinct texts ({ledger.encodes})")
+    passed &= print_result(op.filter_op.source_token_size == op.stage_tokens["Filter"]["input"], "FilterOp carries its input token count")
+
+    chain_op = hero.filter_hero.chain(CORPUS, [(SPEC, "relaxed"), (SPEC, "relaxed")])
+    details = chain_op.reduction_details
+    passed &= print_result(
+        len(details) == 2 and details[1]["source_token_size"] == details[0]["filtered_token_size"],
+        "Chain stages reuse the previous stage's count",
+    )
+    passed &= print_result(ledger.encodes == 3, f"Chain added no encodes ({ledger.encodes})")
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 16: TOKEN LEDGER")
+    print("="*80)
+
+    results = []
+    results.append(("Ledger Memoization", test_ledger_memoizes()))
+    results.append(("Single Encode per Text", test_extract_single_encode()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
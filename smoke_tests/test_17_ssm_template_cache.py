@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+"""
+Test 17: SSM template cache
+Tests that subtractive filtering reuses the Semantic Section Map of pages
+that share a site template: the header/footer sections are remapped and
+only the lines that differ are sent to get_content_toc. Also tests the
+block decision memo for blocks shared by pages of different layouts. The
+ToC call is replaced with a stub that classifies lines by prefix.
+
+Run: python smoke_tests/test_17_ssm_template_cache.py
+
+Critical because: a wrong remap silently drops content lines or keeps navigation.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import re
+import threading
+
+from llmservice import GenerationResult
+
+from extracthero import FilterHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService, TocOutput, TocSection
+from extracthero.ssm_cache import SectionDecisionMemo, SSMTemplateCache
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="product", desc="product name and price")
+LINE_RE = re.compile(r"^\[(\d+)\] (.*)$")
+
+
+class StubLLM(MyLLMService):
+    """One section per run of lines; "nav"/"footer" lines are non-content."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def get_content_toc(self, numbered_corpus, max_line, what_to_retain, model=None):
+        self.prompts.append(numbered_corpus)
+        sections = []
+        for line in numbered_corpus.split("\n"):
+            n, text = LINE_RE.match(line).groups()
+            n = int(n)
+            is_content = not text.startswith(("nav", "footer", "cookie"))
+            last = sections[-1] if sections else None
+            if last and last.end_line == n - 1 and last.is_content == is_content:
+                last.end_line = n
+            else:
+                sections.append(TocSection(
+                    name="content" if is_content else "chrome",
+                    category="content" if is_content else "navigation",
+                    start_line=n, end_line=n,
+                    is_content=is_content, is_navigation=not is_content,
+                ))
+        usage = {"input_tokens": len(numbered_corpus), "output_tokens": 1, "total_tokens": len(numbered_corpus) + 1}
+        return GenerationResult(success=True, trace_id="toc", content=TocOutput(sections=sections), usage=usage)
+
+    async def get_content_toc_async(self, numbered_corpus, max_line, what_to_retain, model=None):
+        return self.get_content_toc(numbered_corpus, max_line, what_to_retain, model)
+
+
+def page(product, body_lines, visits):
+    header = [f"nav link {i}" for i in range(8)] + [f"nav visits {visits}"]
+    body = [f"Product: {product}"] + [f"{product} detail {i}" for i in range(body_lines)] + ["Price: 42 EUR"]
+    footer = [f"footer item {i}" for i in range(5)]
+    return "\n".join(header + body + footer), "\n".join(body)
+
+
+# Test 1: Partial reuse
+def test_partial_reuse():
+    """A second page of the same template only sends its changed lines"""
+    print_test_header("1. Partial Template Reuse")
+
+    passed = True
+    llm = StubLLM()
+    hero = FilterHero(llm=llm, ssm_cache=SSMTemplateCache())
+
+    text_a, body_a = page("Alpha", 3, 100)
+    text_b, body_b = page("Beta", 6, 205)
+
+    op_a = hero.run(text_a, SPEC, filter_mode="subtractive")
+    op_b = hero.run(text_b, SPEC, filter_mode="subtractive")
+
+    passed &= print_result(op_a.content == body_a, "First page filtered by the LLM")
+    passed &= print_result(op_b.content == body_b, "Second page keeps exactly its content lines")
+    second_prompt = llm.prompts[1]
+    passed &= print_result(
+        "nav" not in second_prompt and "footer" not in second_prompt,
+        f"Only changed lines sent ({len(second_prompt.splitlines())} of {len(text_b.splitlines())})",
+    )
+    passed &= print_result(op_b.usage.get("ssm_lines_reused") == 14, f"Usage reports reused lines ({op_b.usage.get('ssm_lines_reused')})")
+    return passed
+
+
+# Test 2: Full reuse skips the call
+def test_full_reuse():
+    """A page that only differs in numbers is resolved without the LLM"""
+    print_test_header("2. Full Template Reuse")
+
+    passed = True
+    llm = StubLLM()
+    cache = SSMTemplateCache()
+    hero = FilterHero(llm=llm, ssm_cache=cache)
+
+    text_1, _ = page("Gamma", 4, 1)
+    text_2, body_2 = page("Gamma", 4, 999)
+    hero.run(text_1, SPEC, filter_mode="subtractive")
+    plan_threads = []
+    plan = cache.plan
+
+    def spy_plan(*args, **kwargs):
+        plan_threads.append(threading.current_thread() is threading.main_thread())
+        return plan(*args, **kwargs)
+
+    cache.plan = spy_plan
+    op = asyncio.run(hero.run_async(text_2, SPEC, filter_strategy="relaxed", filter_mode="subtractive"))
+    passed &= print_result(plan_threads == [False], "Async template lookup ran in a worker thread")
+
+    passed &= print_result(len(llm.prompts) == 1, f"One LLM call for two pages ({len(llm.prompts)})")
+    passed &= print_result(op.success and op.content == body_2, "Cached sections applied")
+    passed &= print_result(op.usage.get("ssm_template_hits") == 1, "Usage reports a template hit")
+
+    other_spec = WhatToRetain(name="reviews", desc="customer reviews")
+    hero.run(text_2, other_spec, filter_mode="subtractive")
+    passed &= print_result(len(llm.prompts) == 2, "Templates are not shared across specs")
+    passed &= print_result(cache.stats()["hits"] == 1, f"Stats: {cache.stats()}")
+    return passed
+
+
+# Test 3: Block decision memo
+def test_block_memo():
+    """A repeated block is pre-resolved on pages with a different layout"""
+    print_test_header("3. Block Decision Memo")
+
+    passed = True
+    llm = StubLLM()
+    memo = SectionDecisionMemo()
+    hero = FilterHero(llm=llm, section_memo=memo)
+    banner = [f"cookie notice line {i}" for i in range(4)]
+
+    pages = [
+        ["Article one", "text a", "text b"] + banner,
+        banner + ["Recipe", "step 1", "step 2", "step 3"],
+        ["Product", "spec x"] + banner + ["Price: 7 EUR"],
+    ]
+    ops = [hero.run("\n".join(lines), SPEC, filter_mode="subtractive") for lines in pages]
+
+    passed &= print_result(all("cookie" in prompt for prompt in llm.prompts[:2]), "Block sent while it is still unproven")
+    passed &= print_result("cookie" not in llm.prompts[2], "Known block left out of the third prompt")
+    passed &= print_result(ops[2].content == "Product\nspec x\nPrice: 7 EUR", "Known block still deleted")
+    passed &= print_result(memo.stats()["lines_resolved"] == 4, f"Stats: {memo.stats()}")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 17: SSM TEMPLATE CACHE")
+    print("="*80)
+
+    results = []
+    results.append(("Partial Template Reuse", test_partial_reuse()))
+    results.append(("Full Template Reuse", test_full_reuse()))
+    results.append(("Block Decision Memo", test_block_memo()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+Test 18: Near-duplicate detection
+Tests that ExtractHero(near_duplicates=...) reuses the filter output of a
+near-identical earlier document (re-running only the parse call on the
+patched text), skips both calls for an identical one, and that the SQLite
+index persists across instances. The LLM prompt methods are stubs.
+
+Run: python smoke_tests/test_18_near_duplicates.py
+
+Critical because: reusing a variant's filter output must never hide the values that differ.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tempfile
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.near_duplicates import (
+    NearDuplicateIndex, SqliteNearDuplicateIndex, patch_filtered, simhash, simhash_similarity,
+)
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="variant", desc="colour and price of the product")
+DESCRIPTION = [
+    f"The trail jacket keeps you dry in {word} weather thanks to its sealed seams and layer {i}"
+    for i, word in enumerate(["wet", "cold", "windy", "stormy", "mild", "humid"] * 10)
+]
+
+
+def product_page(colour, price="89 EUR", size=None):
+    sizes = [f"Size: {size}"] if size else []
+    return "\n".join(["Trail Jacket"] + DESCRIPTION + [f"Colour: {colour}"] + sizes + [f"Price: {price}"])
+
+
+class StubLLM(MyLLMService):
+    """Filter keeps the Colour/Price lines; parse reads them into a dict."""
+
+    def __init__(self):
+        super().__init__()
+        self.filter_calls = 0
+        self.parse_inputs = []
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self.filter_calls += 1
+        kept = [line for line in corpus.split("\n") if line.startswith(("Colour", "Size", "Price"))]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 10})
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        self.parse_inputs.append(corpus)
+        fields = dict(line.split(": ", 1) for line in corpus.split("\n") if ": " in line)
+        return GenerationResult(success=True, trace_id="p", content=fields, usage={"total_tokens": 5})
+
+
+# Test 1: Fingerprints
+def test_simhash():
+    """Variants are close, unrelated pages are far"""
+    print_test_header("1. SimHash Similarity")
+
+    passed = True
+    base = simhash(product_page("red"))
+    variant = simhash_similarity(base, simhash(product_page("blue")))
+    unrelated = simhash_similarity(base, simhash("\n".join(f"release notes entry {i} fixes bug {i * 7}" for i in range(60))))
+    passed &= print_result(simhash_similarity(base, base) == 1.0, "Identical text → 1.0")
+    passed &= print_result(variant >= 0.88, f"Colour variant similarity {variant:.3f}")
+    passed &= print_result(unrelated < 0.8, f"Unrelated page similarity {unrelated:.3f}")
+    return passed
+
+
+# Test 2: Patching the filter output
+def test_patch_filtered():
+    """Deleted lines are dropped, changed lines replaced whole, nothing stale kept"""
+    print_test_header("2. Patching Filter Output")
+
+    passed = True
+    old = "Title\nColour: red\nSize: XL\nPrice: 10 EUR\nShipping: 100 EUR"
+    filtered = "Colour: red\nSize: XL\nPrice: 10 EUR\nShipping: 100 EUR"
+
+    patched, changed = patch_filtered(filtered, old, "Title\nColour: red\nPrice: 10 EUR\nShipping: 100 EUR")
+    passed &= print_result("Size: XL" not in patched and changed, f"Deleted line dropped: {patched!r}")
+
+    patched, changed = patch_filtered(filtered, old, old.replace("Price: 10 EUR", "Price: 12 EUR"))
+    passed &= print_result(
+        patched == "Colour: red\nSize: XL\nPrice: 12 EUR\nShipping: 100 EUR" and changed,
+        f"Changed line replaced whole, others untouched: {patched!r}",
+    )
+
+    patched, changed = patch_filtered(filtered, old, old + "\nStock: 3")
+    passed &= print_result(patched.endswith("\n\nStock: 3") and changed, "New line appended")
+
+    patched, changed = patch_filtered(filtered, old, old)
+    passed &= print_result(patched == filtered and not changed, "Same corpus → unchanged")
+    return passed
+
+
+# Test 3: Reuse and skip through ExtractHero
+def test_extract_reuse():
+    """A variant re-runs only the parse; an identical page runs nothing"""
+    print_test_header("3. Filter Reuse and Skip")
+
+    passed = True
+    llm = StubLLM()
+    index = NearDuplicateIndex()
+    hero = ExtractHero(llm=llm, reduction_executor="thread", near_duplicates=index)
+
+    first = hero.extract(product_page("red"), SPEC, reduce_html=False)
+    variant = hero.extract(product_page("blue"), SPEC, reduce_html=False)
+    passed &= print_result(first.content == {"Colour": "red", "Price": "89 EUR"}, "First page extracted")
+    passed &= print_result(llm.filter_calls == 1, f"Variant reused the filter output ({llm.filter_calls} filter calls)")
+    passed &= print_result(variant.content == {"Colour": "blue", "Price": "89 EUR"}, f"Variant parsed from patched text: {variant.content}")
+    passed &= print_result("red" not in llm.parse_inputs[-1], "Stale value not shown to the parser")
+    passed &= print_result(variant.usage.get("near_duplicate_hits") == 1, "Usage reports the reuse")
+
+    similarity = simhash_similarity(simhash(product_page("red")), simhash(product_page("navy")))
+    parse_calls = len(llm.parse_inputs)
+    navy = hero.extract(product_page("navy"), SPEC, reduce_html=False)
+    passed &= print_result(
+        similarity < 1.0 and len(llm.parse_inputs) == parse_calls + 1 and navy.content["Colour"] == "navy",
+        f"Similarity {similarity:.3f} < 1.0 with a changed line: parse re-runs",
+    )
+
+    parse_calls = len(llm.parse_inputs)
+    again = hero.extract(product_page("blue"), SPEC, reduce_html=False)
+    passed &= print_result(len(llm.parse_inputs) == parse_calls and llm.filter_calls == 1, "Identical page: no LLM calls")
+    passed &= print_result(again.content == variant.content, "Identical page: content reused")
+
+    sized = hero.extract(product_page("black", size="XL"), SPEC, reduce_html=False)
+    parse_calls = len(llm.parse_inputs)
+    unsized = hero.extract(product_page("black"), SPEC, reduce_html=False)
+    passed &= print_result(sized.content.get("Size") == "XL", "Sized page extracted")
+    passed &= print_result(len(llm.parse_inputs) == parse_calls + 1, "Deleted line: parse re-runs instead of a skip")
+    passed &= print_result("Size" not in unsized.content and "XL" not in llm.parse_inputs[-1], f"Deleted value gone: {unsized.content}")
+
+    filter_calls = llm.filter_calls
+    hero.extract("\n".join(f"release notes entry {i} fixes bug {i * 7}" for i in range(60)), SPEC, reduce_html=False)
+    passed &= print_result(llm.filter_calls == filter_calls + 1, "Unrelated page runs the full extraction")
+    passed &= print_result(index.stats()["skips"] == 1, f"Stats: {index.stats()}")
+    hero.close()
+    return passed
+
+
+# Test 4: Persistent index
+def test_sqlite_index():
+    """A new ExtractHero finds near-duplicates indexed by an earlier one"""
+    print_test_header("4. Persistent Index")
+
+    passed = True
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "near_duplicates.sqlite")
+
+        llm = StubLLM()
+        hero = ExtractHero(llm=llm, reduction_executor="thread", near_duplicates=SqliteNearDuplicateIndex(path))
+        hero.extract(product_page("green"), SPEC, reduce_html=False)
+        hero.close()
+
+        llm = StubLLM()
+        hero = ExtractHero(llm=llm, reduction_executor="thread", near_duplicates=SqliteNearDuplicateIndex(path))
+        op = hero.extract(product_page("green", price="79 EUR"), SPEC, reduce_html=False)
+        hero.close()
+
+        passed &= print_result(llm.filter_calls == 0 and len(llm.parse_inputs) == 1, "Only the parse ran, using the persisted index")
+        passed &= print_result(op.content == {"Colour": "green", "Price": "79 EUR"}, f"Content: {op.content}")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 18: NEAR-DUPLICATE DETECTION")
+    print("="*80)
+
+    results = []
+    results.append(("SimHash Similarity", test_simhash()))
+    results.append(("Patching Filter Output", test_patch_filtered()))
+    results.append(("Filter Reuse and Skip", test_extract_reuse()))
+    results.append(("Persistent Index", test_sqlite_index()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
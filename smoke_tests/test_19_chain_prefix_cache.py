@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+"""
+Test 19: Chain prefix cache
+Tests that FilterHero(chain_cache=...) resumes a chain after the longest
+cached prefix of stages on the same input, reports the reused stages in
+usage, and never shares stages across different inputs. The filter prompt
+method is a stub that counts its calls.
+
+Run: python smoke_tests/test_19_chain_prefix_cache.py
+
+Critical because: a prefix hit for the wrong input or stage list silently returns another page's data.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+from llmservice import GenerationResult
+
+from extracthero import FilterHero, WhatToRetain
+from extracthero.chain_cache import ChainPrefixCache
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+PRODUCTS = WhatToRetain(name="products", desc="product lines")
+PRICES = WhatToRetain(name="prices", desc="prices")
+NAMES = WhatToRetain(name="names", desc="product names")
+CORPUS = "\n".join(["nav home", "Product: Lamp", "Price: 20 EUR", "Product: Desk", "Price: 90 EUR", "footer"])
+
+
+class StubLLM(MyLLMService):
+    """Keeps the lines that contain the spec's name keyword."""
+
+    KEYWORDS = {"products": ("Product", "Price"), "prices": ("Price",), "names": ("Product",)}
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        name = next(name for name in self.KEYWORDS if name in thing_to_extract)
+        self.calls.append(name)
+        kept = [line for line in corpus.split("\n") if line.startswith(self.KEYWORDS[name])]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 10})
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        return self.filter_via_llm(corpus, thing_to_extract, model, filter_strategy)
+
+
+# Test 1: Shared first stage
+def test_shared_prefix():
+    """A second chain with the same first stage only runs its second stage"""
+    print_test_header("1. Shared Prefix")
+
+    passed = True
+    llm = StubLLM()
+    cache = ChainPrefixCache()
+    hero = FilterHero(llm=llm, chain_cache=cache)
+
+    prices = hero.chain(CORPUS, [(PRODUCTS, "relaxed"), (PRICES, "relaxed")])
+    names = hero.chain(CORPUS, [(PRODUCTS, "relaxed"), (NAMES, "relaxed")])
+
+    passed &= print_result(prices.content == "Price: 20 EUR\nPrice: 90 EUR", "First chain filtered")
+    passed &= print_result(names.content == "Product: Lamp\nProduct: Desk", "Second chain filtered")
+    passed &= print_result(llm.calls == ["products", "prices", "names"], f"Shared stage ran once: {llm.calls}")
+    reused = names.filterops[0].usage
+    passed &= print_result(reused.get("chain_prefix_hits") == 1 and reused.get("total_tokens") == 0, f"Reused stage usage: {reused}")
+    passed &= print_result(prices.filterops[0].usage.get("chain_prefix_hits") is None, "Live stage usage untouched")
+
+    op = prices.filterops[1]
+    op.generation_result.formatted_prompt = "corpus " * 200_000
+    small = ChainPrefixCache(max_bytes=64 * 1024)
+    small.put("k", op)
+    cached = small.get("k")
+    passed &= print_result(
+        cached is not None and cached.generation_result.formatted_prompt is None and small.stats()["bytes"] < 64 * 1024,
+        "Stage prompt not kept in the cache",
+    )
+    return passed
+
+
+# Test 2: Full hit and async
+def test_full_hit_async():
+    """chain_async resumes from stages cached by chain; a full hit makes no call"""
+    print_test_header("2. Full Hit (async)")
+
+    passed = True
+    llm = StubLLM()
+    hero = FilterHero(llm=llm, chain_cache=ChainPrefixCache())
+    stages = [(PRODUCTS, "relaxed"), (PRICES, "relaxed")]
+
+    first = hero.chain(CORPUS, stages)
+    again = asyncio.run(hero.chain_async(CORPUS, stages))
+    passed &= print_result(len(llm.calls) == 2, f"No calls on a full hit ({len(llm.calls)})")
+    passed &= print_result(again.success and again.content == first.content, "Same content")
+    return passed
+
+
+# Test 3: Keys are input- and stage-specific
+def test_no_false_hits():
+    """A different input or a different first stage misses"""
+    print_test_header("3. No False Hits")
+
+    passed = True
+    llm = StubLLM()
+    cache = ChainPrefixCache()
+    hero = FilterHero(llm=llm, chain_cache=cache)
+
+    hero.chain(CORPUS, [(PRODUCTS, "relaxed"), (PRICES, "relaxed")])
+    other = hero.chain(CORPUS.replace("Lamp", "Sofa"), [(PRODUCTS, "relaxed"), (NAMES, "relaxed")])
+    passed &= print_result("Sofa" in other.content, "Other input filtered from scratch")
+    hero.chain(CORPUS, [(PRODUCTS, "contextual"), (PRICES, "relaxed")])
+    passed &= print_result(len(llm.calls) == 6, f"Every stage ran ({len(llm.calls)} calls)")
+    passed &= print_result(cache.stats()["hits"] == 0, f"Stats: {cache.stats()}")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 19: CHAIN PREFIX CACHE")
+    print("="*80)
+
+    results = []
+    results.append(("Shared Prefix", test_shared_prefix()))
+    results.append(("Full Hit (async)", test_full_hit_async()))
+    results.append(("No False Hits", test_no_false_hits()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Test 20: Spec fingerprints
+Tests WhatToRetain.freeze() / fingerprint() and spec_list_fingerprint: equal
+specs share a fingerprint (also across processes), any field change or
+list reordering changes it, compiled prompts are memoized, and frozen specs
+are accepted wherever a WhatToRetain is. The filter prompt method is a stub.
+
+Run: python smoke_tests/test_20_spec_fingerprints.py
+
+Critical because: every cache layer keys on these; a collision serves one spec's result for another.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dataclasses
+import subprocess
+
+from llmservice import GenerationResult
+
+from extracthero import FilterHero, FrozenWhatToRetain, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.schemas import spec_list_fingerprint
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+def make_spec(**overrides):
+    fields = dict(name="price", desc="product price", text_rules=["numbers only"])
+    fields.update(overrides)
+    return WhatToRetain(**fields)
+
+
+# Test 1: Fingerprint stability
+def test_fingerprint():
+    """Equal specs agree, different specs differ, across processes too"""
+    print_test_header("1. Fingerprint Stability")
+
+    passed = True
+    spec = make_spec()
+    passed &= print_result(spec.fingerprint() == make_spec().fingerprint(), "Equal specs share a fingerprint")
+    passed &= print_result(spec.fingerprint() != make_spec(text_rules=["numbers"]).fingerprint(), "text_rules change → new fingerprint")
+    passed &= print_result(spec.fingerprint() != make_spec(include_context_chunk=False).fingerprint(), "Flag change → new fingerprint")
+
+    code = (
+        "from extracthero import WhatToRetain;"
+        "print(WhatToRetain(name='price', desc='product price', text_rules=['numbers only']).fingerprint())"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    other = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True,
+                           env={**os.environ, "PYTHONHASHSEED": "123"})
+    passed &= print_result(other.stdout.strip() == spec.fingerprint(), "Same fingerprint in another process")
+
+    a, b = make_spec(name="a"), make_spec(name="b")
+    passed &= print_result(spec_list_fingerprint([a, b]) != spec_list_fingerprint([b, a]), "List order matters")
+    passed &= print_result(spec_list_fingerprint([a]) != spec_list_fingerprint(a), "One-spec list differs from the spec")
+    passed &= print_result(spec_list_fingerprint([a, b]) == spec_list_fingerprint([a.freeze(), b]), "Frozen and mutable specs mix")
+    return passed
+
+
+# Test 2: Freeze and memoized compile
+def test_freeze():
+    """Snapshots are hashable, memoized and follow mutations"""
+    print_test_header("2. Freeze and Memoized Compile")
+
+    passed = True
+    spec = make_spec()
+    frozen = spec.freeze()
+    passed &= print_result(isinstance(frozen, FrozenWhatToRetain) and spec.freeze() is frozen, "Unchanged spec → same snapshot")
+    passed &= print_result({frozen: 1}[make_spec().freeze()] == 1, "Snapshots work as dict keys")
+    passed &= print_result(spec.compile() is spec.compile(), "Compiled prompt memoized")
+    passed &= print_result(frozen.thaw() == spec, "thaw() round-trips")
+    passed &= print_result(
+        [f.name for f in dataclasses.fields(FrozenWhatToRetain)] == [f.name for f in dataclasses.fields(WhatToRetain)],
+        "Frozen fields mirror WhatToRetain",
+    )
+
+    dict_example = WhatToRetain(name="price", example={"amount": 20, "currency": "EUR"})
+    passed &= print_result("Example: {'amount': 20, 'currency': 'EUR'}" in dict_example.compile(), "Dict example compiles")
+    passed &= print_result(dict_example.fingerprint() == WhatToRetain(name="price", example={"currency": "EUR", "amount": 20}).fingerprint(), "Dict example fingerprinted by content")
+    passed &= print_result("Example: [1, 2]" in WhatToRetain(name="sizes", example=[1, 2]).compile(), "List example kept as a list")
+
+    spec.desc = "sale price"
+    passed &= print_result("sale price" in spec.compile() and spec.freeze() is not frozen, "Mutation yields a new snapshot")
+    passed &= print_result("product price" in frozen.compile_parser(), "Old snapshot unchanged")
+    return passed
+
+
+# Test 3: Frozen specs in FilterHero
+def test_frozen_in_filterhero():
+    """FilterHero accepts frozen specs and sends the same prompt"""
+    print_test_header("3. Frozen Specs in FilterHero")
+
+    class StubLLM(MyLLMService):
+        def __init__(self):
+            super().__init__()
+            self.targets = []
+
+        def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+            self.targets.append(thing_to_extract)
+            return GenerationResult(success=True, trace_id="f", content="price: 5", usage={"total_tokens": 1})
+
+    passed = True
+    llm = StubLLM()
+    hero = FilterHero(llm=llm)
+    specs = [make_spec(name="a"), make_spec(name="b")]
+    hero.run("price: 5\nother", specs)
+    op = hero.run("price: 5\nother", [spec.freeze() for spec in specs])
+    passed &= print_result(op.success, "Frozen spec list filtered")
+    passed &= print_result(llm.targets[0] == llm.targets[1], "Same compiled prompt")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 20: SPEC FINGERPRINTS")
+    print("="*80)
+
+    results = []
+    results.append(("Fingerprint Stability", test_fingerprint()))
+    results.append(("Freeze and Memoized Compile", test_freeze()))
+    results.append(("Frozen Specs in FilterHero", test_frozen_in_filterhero()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
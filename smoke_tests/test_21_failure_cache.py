@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""
+Test 21: Failure cache
+Tests that FilterHero(failure_cache=...) answers repeat attempts on an
+input whose filter call failed with a fast failed FilterOp until the
+backoff window expires, that the window grows per consecutive failure,
+and that ExtractHero returns a failed ExtractOp without any LLM call. The
+filter prompt method is a stub that fails on demand.
+
+Run: python smoke_tests/test_21_failure_cache.py
+
+Critical because: a short-circuit must never outlive its window or block other inputs and specs.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, FilterHero, WhatToRetain
+from extracthero.failure_cache import FailureCache
+from extracthero.myllmservice import MyLLMService
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="price", desc="product price")
+OTHER_SPEC = WhatToRetain(name="title", desc="product title")
+BAD_PAGE = "<<garbled page that always fails>>"
+GOOD_PAGE = "Title: Lamp\nprice: 20 EUR"
+
+
+class StubLLM(MyLLMService):
+    """Fails on pages containing "garbled" unless healed."""
+
+    def __init__(self):
+        super().__init__()
+        self.filter_calls = 0
+        self.parse_calls = 0
+        self.healed = False
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self.filter_calls += 1
+        if "garbled" in corpus and not self.healed:
+            return GenerationResult(success=False, trace_id="f", content=None, error_message="bad JSON", usage={"total_tokens": 10})
+        return GenerationResult(success=True, trace_id="f", content=corpus, usage={"total_tokens": 10})
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        return self.filter_via_llm(corpus, thing_to_extract, model, filter_strategy)
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        self.parse_calls += 1
+        return GenerationResult(success=True, trace_id="p", content={"price": "20 EUR"}, usage={"total_tokens": 5})
+
+
+# Test 1: Short-circuit inside the window
+def test_short_circuit():
+    """A failed input is refused without an LLM call; other keys are unaffected"""
+    print_test_header("1. Short-Circuit")
+
+    passed = True
+    llm = StubLLM()
+    cache = FailureCache(base_seconds=60)
+    hero = FilterHero(llm=llm, failure_cache=cache)
+
+    first = hero.run(BAD_PAGE, SPEC)
+    again = hero.run(BAD_PAGE, SPEC)
+    again_async = asyncio.run(hero.run_async(BAD_PAGE, SPEC, filter_strategy="relaxed"))
+    passed &= print_result(not first.success and llm.filter_calls == 1, "First attempt called the LLM and failed")
+    passed &= print_result(not again.success and not again_async.success and llm.filter_calls == 1, "Repeats short-circuited (sync and async)")
+    passed &= print_result("llm_filter" in again.error and "LLM filter failed" in again.error, f"Error: {again.error}")
+    passed &= print_result(again.usage == {"failure_cache_hits": 1}, f"Usage: {again.usage}")
+
+    hero.run(BAD_PAGE, OTHER_SPEC)
+    hero.run(GOOD_PAGE, SPEC)
+    passed &= print_result(llm.filter_calls == 3, "Other spec and other input still call the LLM")
+    passed &= print_result(cache.stats()["short_circuits"] == 2, f"Stats: {cache.stats()}")
+    return passed
+
+
+# Test 2: Backoff growth and recovery
+def test_backoff():
+    """Windows double per failure; a success after the window forgets the key"""
+    print_test_header("2. Exponential Backoff")
+
+    passed = True
+    llm = StubLLM()
+    cache = FailureCache(base_seconds=0.2, max_seconds=10)
+    hero = FilterHero(llm=llm, failure_cache=cache)
+
+    hero.run(BAD_PAGE, SPEC)
+    time.sleep(0.25)
+    hero.run(BAD_PAGE, SPEC)
+    passed &= print_result(llm.filter_calls == 2, "Retried once the first window expired")
+
+    time.sleep(0.25)
+    hero.run(BAD_PAGE, SPEC)
+    passed &= print_result(llm.filter_calls == 2, "Second window is longer (0.4s)")
+
+    time.sleep(0.3)
+    llm.healed = True
+    op = hero.run(BAD_PAGE, SPEC)
+    passed &= print_result(op.success and llm.filter_calls == 3, "Retried after the second window and succeeded")
+    passed &= print_result(cache.stats()["entries"] == 0, "Success forgot the key")
+    return passed
+
+
+# Test 3: ExtractHero
+def test_extract_short_circuit():
+    """A failed ExtractOp is returned without filter or parse calls"""
+    print_test_header("3. ExtractHero Short-Circuit")
+
+    passed = True
+    llm = StubLLM()
+    hero = ExtractHero(llm=llm, reduction_executor="thread", failure_cache=FailureCache())
+
+    hero.extract(BAD_PAGE, SPEC, reduce_html=False)
+    op = hero.extract(BAD_PAGE, SPEC, reduce_html=False)
+    passed &= print_result(not op.success and llm.filter_calls == 1 and llm.parse_calls == 0, "No LLM calls on the repeat")
+    passed &= print_result(op.usage.get("failure_cache_hits") == 1, f"Usage: {op.usage}")
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 21: FAILURE CACHE")
+    print("="*80)
+
+    results = []
+    results.append(("Short-Circuit", test_short_circuit()))
+    results.append(("Exponential Backoff", test_backoff()))
+    results.append(("ExtractHero Short-Circuit", test_extract_short_circuit()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Test 22: Chunked extractive filtering
+Tests split_structural_chunks and FilterHero(chunk_max_tokens=...): an
+oversized corpus is split on paragraph/heading boundaries, the chunks are
+filtered concurrently and their retained content is concatenated in
+document order, so content at the bottom of the page survives. The filter
+prompt method is a stub that keeps "Spec" lines.
+
+Run: python smoke_tests/test_22_chunked_filtering.py
+
+Critical because: chunking must never drop, duplicate or reorder retained content.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, FilterHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.utils import split_structural_chunks
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="specs", desc="technical specifications")
+SECTIONS = [
+    f"## Section {i}\n" + "\n".join(f"Marketing sentence {i}.{j} about the product" for j in range(15))
+    for i in range(12)
+]
+CORPUS = "Spec: weight 2 kg\n\n" + "\n\n".join(SECTIONS) + "\n\n## Specifications\nSpec: voltage 12 V\nSpec: power 40 W"
+
+
+class StubLLM(MyLLMService):
+    """Keeps "Spec" lines; tracks how many calls overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _filter(self, corpus):
+        kept = [line for line in corpus.split("\n") if line.startswith("Spec")]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 10})
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self._enter()
+        time.sleep(0.05)
+        self._leave()
+        return self._filter(corpus)
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self._enter()
+        await asyncio.sleep(0.05)
+        self._leave()
+        return self._filter(corpus)
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        fields = dict(line[len("Spec: "):].split(" ", 1) for line in corpus.split("\n") if line.startswith("Spec"))
+        return GenerationResult(success=True, trace_id="p", content=fields, usage={"total_tokens": 5})
+
+    async def parse_via_llm_async(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return self.parse_via_llm(corpus, parse_keywords, model, content_output_format)
+
+
+# Test 1: Splitter
+def test_splitter():
+    """Chunks respect the budget, break at headings and rebuild the text"""
+    print_test_header("1. Structural Splitter")
+
+    passed = True
+    count = lambda s: len(s.split())
+    chunks = split_structural_chunks(CORPUS, 250, count_tokens=count)
+    passed &= print_result(len(chunks) > 1, f"{len(chunks)} chunks")
+    passed &= print_result(all(count(c) <= 250 for c in chunks), "Every chunk within budget")
+    passed &= print_result("\n".join(chunks) == CORPUS, "Chunks rebuild the corpus")
+    passed &= print_result(all(c.startswith(("Spec", "##")) for c in chunks), "Chunks start at structural boundaries")
+    passed &= print_result(split_structural_chunks("short text", 250) == ["short text"], "Small text → one chunk")
+    return passed
+
+
+# Test 2: Chunked filtering
+def test_chunked_filter():
+    """Every chunk is filtered concurrently; output is in document order"""
+    print_test_header("2. Chunked Filtering")
+
+    passed = True
+    expected = "Spec: weight 2 kg\n\nSpec: voltage 12 V\nSpec: power 40 W"
+    llm = StubLLM()
+    hero = FilterHero(llm=llm)
+
+    op = hero.run(CORPUS, SPEC, chunk_max_tokens=300)
+    passed &= print_result(llm.calls > 1 and llm.max_in_flight > 1, f"{llm.calls} chunk calls, {llm.max_in_flight} concurrent")
+    passed &= print_result(op.success and op.content == expected, "Top and bottom content retained in order")
+    passed &= print_result(op.usage.get("fanout_calls") == llm.calls, f"Usage sums the chunk calls: {op.usage}")
+
+    encodes = hero.token_ledger.encodes
+    hero.run(CORPUS, SPEC, chunk_max_tokens=300)
+    passed &= print_result(hero.token_ledger.encodes == encodes, "Chunk counts memoized in the token ledger")
+
+    llm = StubLLM()
+    op_async = asyncio.run(FilterHero(llm=llm).run_async(CORPUS, SPEC, chunk_max_tokens=300))
+    passed &= print_result(op_async.content == expected and llm.max_in_flight > 1, "Async path matches")
+
+    llm = StubLLM()
+    FilterHero(llm=llm).run(CORPUS, SPEC, chunk_max_tokens=100_000)
+    passed &= print_result(llm.calls == 1, "Corpus within budget → single call")
+    return passed
+
+
+# Test 3: ExtractHero pass-through
+def test_extract_chunked():
+    """extract(chunk_max_tokens=...) reads the whole page"""
+    print_test_header("3. ExtractHero Chunking")
+
+    passed = True
+    llm = StubLLM()
+    hero = ExtractHero(llm=llm, reduction_executor="thread")
+    op = hero.extract(CORPUS, SPEC, reduce_html=False, chunk_max_tokens=300)
+    passed &= print_result(op.content == {"weight": "2 kg", "voltage": "12 V", "power": "40 W"}, f"Content: {op.content}")
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 22: CHUNKED EXTRACTIVE FILTERING")
+    print("="*80)
+
+    results = []
+    results.append(("Structural Splitter", test_splitter()))
+    results.append(("Chunked Filtering", test_chunked_filter()))
+    results.append(("ExtractHero Chunking", test_extract_chunked()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
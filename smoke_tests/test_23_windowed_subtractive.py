@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Test 23: Windowed subtractive filtering
+Tests FilterHero.run(filter_mode="subtractive", window_lines=...): the
+numbered document is split into overlapping windows, one ToC call per
+window runs in parallel, and the sections are stitched on global line
+numbers so the result matches a single-call run. The ToC call is replaced
+with a stub that classifies lines by prefix.
+
+Run: python smoke_tests/test_23_windowed_subtractive.py
+
+Critical because: a stitching error keeps navigation or drops content at window boundaries.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import re
+import threading
+import time
+
+from llmservice import GenerationResult
+
+from extracthero import FilterHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService, TocOutput, TocSection
+from extracthero.windowing import line_windows, stitch_toc, window_ownership
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="article", desc="article body")
+LINE_RE = re.compile(r"^\[(\d+)\] (.*)$")
+DOCUMENT = "\n".join(
+    [f"nav link {i}" for i in range(12)]
+    + [f"Article paragraph {i}" for i in range(60)]
+    + [f"nav related {i}" for i in range(15)]
+    + [f"Article appendix {i}" for i in range(20)]
+    + [f"footer item {i}" for i in range(10)]
+)
+
+
+def section(start, end, is_content):
+    return TocSection(
+        name="content" if is_content else "chrome", category="content" if is_content else "navigation",
+        start_line=start, end_line=end, is_content=is_content, is_navigation=not is_content,
+    )
+
+
+class StubLLM(MyLLMService):
+    """One section per run of lines; "nav"/"footer" lines are non-content."""
+
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _toc(self, numbered_corpus):
+        sections = []
+        for line in numbered_corpus.split("\n"):
+            n, text = LINE_RE.match(line).groups()
+            n = int(n)
+            is_content = not text.startswith(("nav", "footer"))
+            last = sections[-1] if sections else None
+            if last and last.end_line == n - 1 and last.is_content == is_content:
+                last.end_line = n
+            else:
+                sections.append(section(n, n, is_content))
+        return GenerationResult(success=True, trace_id="toc", content=TocOutput(sections=sections), usage={"total_tokens": 10})
+
+    def get_content_toc(self, numbered_corpus, max_line, what_to_retain, model=None):
+        with self._lock:
+            self.prompts.append(numbered_corpus)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+        return self._toc(numbered_corpus)
+
+    async def get_content_toc_async(self, numbered_corpus, max_line, what_to_retain, model=None):
+        self.prompts.append(numbered_corpus)
+        await asyncio.sleep(0)
+        return self._toc(numbered_corpus)
+
+
+# Test 1: Window helpers
+def test_stitching():
+    """Ownership splits overlaps at their midpoint; cut sections are rejoined"""
+    print_test_header("1. Window Stitching")
+
+    passed = True
+    windows = line_windows(100, 40, 10)
+    owned = window_ownership(windows, list(range(1, 101)))
+    passed &= print_result(windows == [(0, 40), (30, 70), (60, 100)], f"Windows: {windows}")
+    passed &= print_result(owned == [(1, 35), (36, 65), (66, 100)], f"Ownership: {owned}")
+
+    tocs = [
+        TocOutput(sections=[section(1, 20, False), section(21, 40, True)]),
+        TocOutput(sections=[section(1, 50, True), section(51, 70, False)]),  # overreaches into window 1
+        TocOutput(sections=[section(61, 100, False)]),
+    ]
+    stitched = stitch_toc(tocs, owned).sections
+    spans = [(s.start_line, s.end_line, s.is_content) for s in stitched]
+    passed &= print_result(spans == [(1, 20, False), (21, 50, True), (51, 100, False)], f"Stitched: {spans}")
+    return passed
+
+
+# Test 2: Windowed run matches a single call
+def test_windowed_run():
+    """Windowed filtering keeps exactly the lines a single call keeps"""
+    print_test_header("2. Windowed Run")
+
+    passed = True
+    single = FilterHero(llm=StubLLM()).run(DOCUMENT, SPEC, filter_mode="subtractive")
+
+    llm = StubLLM()
+    op = FilterHero(llm=llm).run(DOCUMENT, SPEC, filter_mode="subtractive", window_lines=30, window_overlap=6)
+    line_count = len(DOCUMENT.split("\n"))
+    passed &= print_result(len(llm.prompts) == len(line_windows(line_count, 30, 6)), f"{len(llm.prompts)} window calls")
+    passed &= print_result(llm.max_in_flight > 1, f"Calls ran in parallel ({llm.max_in_flight})")
+    passed &= print_result(all(len(p.split("\n")) <= 30 for p in llm.prompts), "Each prompt holds one window")
+    first_lines = sorted(int(LINE_RE.match(p.split("\n")[0]).group(1)) for p in llm.prompts)
+    passed &= print_result(first_lines == [start + 1 for start, _ in line_windows(line_count, 30, 6)], f"Windows keep global line numbers: {first_lines}")
+    passed &= print_result(op.success and op.content == single.content, "Same content as one call")
+    passed &= print_result(len(op.SSM.sections) == len(single.SSM.sections), f"Sections stitched ({len(op.SSM.sections)})")
+    passed &= print_result(op.deletions_applied == single.deletions_applied, "Same deletion ranges")
+
+    llm = StubLLM()
+    op_async = asyncio.run(FilterHero(llm=llm).run_async(
+        DOCUMENT, SPEC, filter_strategy="relaxed", filter_mode="subtractive", window_lines=30, window_overlap=6
+    ))
+    passed &= print_result(op_async.content == single.content and len(llm.prompts) > 1, "Async path matches")
+
+    llm = StubLLM()
+    FilterHero(llm=llm).run(DOCUMENT, SPEC, filter_mode="subtractive", window_lines=1000)
+    passed &= print_result(len(llm.prompts) == 1, "Document within one window → single call")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 23: WINDOWED SUBTRACTIVE FILTERING")
+    print("="*80)
+
+    results = []
+    results.append(("Window Stitching", test_stitching()))
+    results.append(("Windowed Run", test_windowed_run()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+"""
+Test 24: Token-budget trimming
+Tests utils.trim_to_token_budget and ExtractHero(trim_token_length=...):
+the corpus is cut to a token budget at a block or line boundary, the
+"Trimming" stage reports the real token counts, the trimmed corpus is
+not encoded a second time, and the async paths trim in a worker thread.
+The LLM prompt methods are stubs.
+
+Run: python smoke_tests/test_24_token_trimming.py
+
+Critical because: a character budget over- or under-fills the context window depending on the script.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.pipeline import ExtractPipeline
+from extracthero.token_ledger import TokenLedger
+from extracthero.utils import trim_to_token_budget
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="price", desc="product price")
+BLOCKS = [f"Paragraph {i}: the lamp has a steel base and a linen shade, item {i}." for i in range(40)]
+CORPUS = "Price: 20 EUR\n\n" + "\n\n".join(BLOCKS)
+CJK = "\n".join("台灯采用钢制底座和亚麻灯罩，第%d项。" % i for i in range(40))
+
+
+class StubLLM(MyLLMService):
+    """Filter keeps the first line; parse returns a dict."""
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        return GenerationResult(success=True, trace_id="f", content=corpus.split("\n")[0], usage={"total_tokens": 1})
+
+    async def filter_via_llm_async(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        return self.filter_via_llm(corpus, thing_to_extract, model, filter_strategy)
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return GenerationResult(success=True, trace_id="p", content={"price": "20 EUR"}, usage={"total_tokens": 1})
+
+    async def parse_via_llm_async(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return self.parse_via_llm(corpus, parse_keywords, model, content_output_format)
+
+
+# Test 1: Trimming helper
+def test_trim_helper():
+    """Cuts land on boundaries and the reported count is exact"""
+    print_test_header("1. Token Budget Trimming")
+
+    passed = True
+    encoding = TokenLedger().encoding
+    for name, text, snap, boundary in (("ASCII", CORPUS, "block", "\n\n"), ("CJK", CJK, "line", "\n")):
+        trimmed, n, total = trim_to_token_budget(text, 120, encoding, snap=snap)
+        passed &= print_result(n <= 120 and n == len(encoding.encode(trimmed)), f"{name}: {n} tokens (of {total}), matches a re-encode")
+        passed &= print_result(text.startswith(trimmed) and text[len(trimmed):].startswith(boundary), f"{name}: cut at a {snap} boundary")
+
+    same, n, total = trim_to_token_budget(CORPUS, 100_000, encoding)
+    passed &= print_result(same == CORPUS and n == total, "Within budget → unchanged")
+    return passed
+
+
+# Test 2: ExtractHero stage tokens
+def test_extract_trimming():
+    """stage_tokens["Trimming"] reports tokens; the trimmed corpus is encoded once"""
+    print_test_header("2. ExtractHero Token Trimming")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    op = hero.extract(CORPUS, SPEC, reduce_html=False, trim_token_length=150)
+    trimming = op.stage_tokens.get("Trimming", {})
+    ledger = hero.token_ledger
+
+    passed &= print_result(op.success and op.content == {"price": "20 EUR"}, "Extraction succeeded")
+    passed &= print_result(trimming.get("output", 999) <= 150 and trimming.get("trimmed_to_tokens") == 150, f"Trimming: {trimming}")
+    passed &= print_result(op.stage_tokens["Filter"]["input"] == trimming.get("output"), "Filter input is the trimmed count")
+    # filter output and parse output; the corpus counts came from the trim
+    passed &= print_result(ledger.encodes == 2, f"No second encode of the corpus ({ledger.encodes} ledger encodes)")
+    passed &= print_result(op.trimmed_to is not None and CORPUS[op.trimmed_to:].startswith("\n\n"), f"trimmed_to={op.trimmed_to} chars at a block boundary")
+
+    untouched = hero.extract(CORPUS, SPEC, reduce_html=False, trim_token_length=100_000)
+    passed &= print_result("Trimming" not in untouched.stage_tokens and untouched.trimmed_to is None, "Within budget → no Trimming stage")
+    hero.close()
+    return passed
+
+
+# Test 3: Async paths
+def test_async_off_loop():
+    """The async paths trim and count tokens in a worker thread"""
+    print_test_header("3. Async Trimming Off The Event Loop")
+
+    passed = True
+    hero = ExtractHero(llm=StubLLM(), reduction_executor="thread")
+    on_loop = []
+
+    def spy(method):
+        def wrapper(*args, **kwargs):
+            on_loop.append((method.__name__, threading.current_thread() is threading.main_thread()))
+            return method(*args, **kwargs)
+        return wrapper
+
+    hero._trim_phase = spy(hero._trim_phase)
+    hero._filter_inputs = spy(hero._filter_inputs)
+
+    op = asyncio.run(hero.extract_async(CORPUS, SPEC, reduce_html=False, trim_token_length=150))
+    passed &= print_result(op.success and "Trimming" in op.stage_tokens, "Async extraction trimmed the corpus")
+
+    async def run_pipeline():
+        return [r async for _, r in ExtractPipeline(hero).run([CORPUS], SPEC, reduce_html=False, trim_token_length=150)]
+
+    results = asyncio.run(run_pipeline())
+    passed &= print_result(results[0].success and "Trimming" in results[0].stage_tokens, "Pipeline trimmed the corpus")
+    passed &= print_result(
+        len(on_loop) == 4 and not any(loop for _, loop in on_loop),
+        f"Trim and filter inputs ran in worker threads: {on_loop}",
+    )
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 24: TOKEN-BUDGET TRIMMING")
+    print("="*80)
+
+    results = []
+    results.append(("Token Budget Trimming", test_trim_helper()))
+    results.append(("ExtractHero Token Trimming", test_extract_trimming()))
+    results.append(("Async Trimming Off The Event Loop", test_async_off_loop()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
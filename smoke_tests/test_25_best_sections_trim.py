@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Test 25: Best-sections trimming
+Tests section_scoring and ExtractHero(trim_strategy="best_sections"): the
+corpus's blocks are scored against the spec and the best set that fits the
+budget is kept in original order, so content below a long navigation head
+survives a trim that would otherwise keep only the navigation. The LLM
+prompt methods are stubs.
+
+Run: python smoke_tests/test_25_best_sections_trim.py
+
+Critical because: keep-the-head trimming hands the filter a page without the content the spec asks for.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llmservice import GenerationResult
+
+from extracthero import ExtractHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService
+from extracthero.section_scoring import best_sections_trim, compiled_target, score_blocks
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="battery", desc="battery capacity and charging time of the phone")
+NAV = [f"[Menu {i}](https://shop.example/menu/{i}) | [Deals](https://shop.example/deals/{i})" for i in range(30)]
+CONTENT = [
+    "## Battery\nThe phone has a 5000 mAh battery capacity.",
+    "## Charging\nCharging time is 45 minutes with the bundled charger.",
+]
+FOOTER = [f"© Shop {i} · [Privacy](https://shop.example/privacy) · [Terms](https://shop.example/terms)" for i in range(10)]
+PAGE = "\n\n".join(NAV + ["## Reviews\nCustomers like the screen."] + CONTENT + FOOTER)
+
+
+class StubLLM(MyLLMService):
+    """Filter records its corpus and keeps the battery lines; parse returns a dict."""
+
+    def __init__(self):
+        super().__init__()
+        self.filter_corpora = []
+
+    def filter_via_llm(self, corpus, thing_to_extract, model=None, filter_strategy=None):
+        self.filter_corpora.append(corpus)
+        kept = [line for line in corpus.split("\n") if "battery" in line or "Charging time" in line]
+        return GenerationResult(success=True, trace_id="f", content="\n".join(kept), usage={"total_tokens": 1})
+
+    def parse_via_llm(self, corpus, parse_keywords=None, model=None, content_output_format="json"):
+        return GenerationResult(success=True, trace_id="p", content={"battery": corpus}, usage={"total_tokens": 1})
+
+
+# Test 1: Scoring and selection
+def test_selection():
+    """Spec blocks outscore navigation; the kept set fits and keeps order"""
+    print_test_header("1. Block Scoring and Selection")
+
+    passed = True
+    target = compiled_target(SPEC)
+    scored = {b.text.strip(): b.score for b in score_blocks(PAGE, target, len)}
+    passed &= print_result(min(scored[c] for c in CONTENT) > max(scored[n] for n in NAV), "Content blocks outscore navigation")
+
+    budget = 200
+    trimmed, kept, total, kept_blocks = best_sections_trim(PAGE, budget, target, len)
+    passed &= print_result(all(c in trimmed for c in CONTENT), f"Both content blocks kept ({kept_blocks} blocks)")
+    passed &= print_result(len(trimmed) <= budget and kept == len(trimmed), f"{len(trimmed)} chars within the {budget} budget")
+    passed &= print_result(trimmed.index(CONTENT[0]) < trimmed.index(CONTENT[1]), "Blocks stay in document order")
+    passed &= print_result(not any(c in PAGE[:budget] for c in CONTENT), "A head trim of the same size would drop them")
+
+    same, _, _, none = best_sections_trim(PAGE, total, target, len)
+    passed &= print_result(same == PAGE and none is None, "Within budget → unchanged")
+    return passed
+
+
+# Test 2: ExtractHero trim_strategy
+def test_extract_best_sections():
+    """The filter sees the content blocks instead of the navigation head"""
+    print_test_header("2. ExtractHero Best-Sections Trimming")
+
+    passed = True
+    llm = StubLLM()
+    hero = ExtractHero(llm=llm, reduction_executor="thread")
+
+    hero.extract(PAGE, SPEC, reduce_html=False, trim_token_length=120)
+    passed &= print_result(not any(c in llm.filter_corpora[-1] for c in CONTENT), "Head trim keeps only navigation")
+
+    op = hero.extract(PAGE, SPEC, reduce_html=False, trim_token_length=120, trim_strategy="best_sections")
+    trimming = op.stage_tokens.get("Trimming", {})
+    fresh = ExtractHero(llm=StubLLM(), reduction_executor=None)
+    stage_tokens = {}
+    trimmed, _ = fresh._trim_phase(PAGE, PAGE, None, stage_tokens, 120, "best_sections", SPEC)
+    blocks = {b.text for b in score_blocks(PAGE, compiled_target(SPEC), len)}
+    ledger = fresh.token_ledger
+    passed &= print_result(
+        ledger.encodes == len(blocks)
+        and ledger.peek(PAGE) is not None
+        and ledger.peek(trimmed) == stage_tokens["Trimming"]["output"],
+        f"Block costs and kept/total counts go through the token ledger ({ledger.encodes} encodes, {len(blocks)} blocks)",
+    )
+    passed &= print_result(all(c in llm.filter_corpora[-1] for c in CONTENT), "Best-sections trim keeps the content")
+    passed &= print_result(trimming.get("output", 999) <= 120 and trimming.get("kept_blocks", 0) >= 2, f"Trimming: {trimming}")
+    passed &= print_result(op.success and "5000 mAh" in op.content["battery"], "Extraction finds the battery capacity")
+
+    by_chars = hero.extract(PAGE, SPEC, reduce_html=False, trim_char_length=300, trim_strategy="best_sections")
+    passed &= print_result(by_chars.trimmed_to is not None and by_chars.trimmed_to <= 300 and "5000 mAh" in by_chars.content["battery"], "Character budget works too")
+
+    try:
+        hero.extract(PAGE, SPEC, reduce_html=False, trim_char_length=300, trim_strategy="middle")
+        passed &= print_result(False, "Unknown strategy accepted")
+    except ValueError:
+        passed &= print_result(True, "Unknown strategy rejected")
+    hero.close()
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 25: BEST-SECTIONS TRIMMING")
+    print("="*80)
+
+    results = []
+    results.append(("Block Scoring and Selection", test_selection()))
+    results.append(("ExtractHero Best-Sections Trimming", test_extract_best_sections()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
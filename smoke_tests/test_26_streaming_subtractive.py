@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+"""
+Test 26: Streaming subtractive filtering
+Tests FilterHero.run_stream / run_stream_async: lines are read lazily from a
+file or iterator, numbered in windows on the fly and the kept lines are
+written to a sink window by window, with the same output as a windowed
+run(). The ToC call is replaced with a stub that classifies lines by prefix.
+
+Run: python smoke_tests/test_26_streaming_subtractive.py
+
+Critical because: very large inputs must not be held in memory several times over.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import io
+import re
+import tempfile
+import threading
+import time
+
+from llmservice import GenerationResult
+
+from extracthero import FilterHero, WhatToRetain
+from extracthero.myllmservice import MyLLMService, TocOutput, TocSection
+from extracthero.windowing import iter_line_windows, line_windows, window_ownership
+
+
+def print_test_header(test_name):
+    print("\n" + "="*80)
+    print(f"TEST: {test_name}")
+    print("="*80)
+
+def print_result(passed, details=""):
+    if passed:
+        print(f"✅ PASSED: {details}")
+    else:
+        print(f"❌ FAILED: {details}")
+    return passed
+
+
+SPEC = WhatToRetain(name="article", desc="article body")
+LINE_RE = re.compile(r"^\[(\d+)\] (.*)$")
+LINES = (
+    [f"nav link {i}" for i in range(12)]
+    + [f"Article paragraph {i}" for i in range(60)]
+    + [f"nav related {i}" for i in range(15)]
+    + [f"Article appendix {i}" for i in range(20)]
+    + [f"footer item {i}" for i in range(10)]
+)
+DOCUMENT = "\n".join(LINES)
+
+
+class StubLLM(MyLLMService):
+    """One section per run of lines; "nav"/"footer" lines are non-content."""
+
+    def __init__(self, fail_on_call=None, progress=None):
+        super().__init__()
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on_call = fail_on_call  # 1-based number of the call to fail
+        self.progress = progress  # called on each ToC call to snapshot the stream
+        self.snapshots = []
+        self._lock = threading.Lock()
+
+    def _toc(self, numbered_corpus):
+        if self.progress is not None:
+            self.snapshots.append((int(LINE_RE.match(numbered_corpus.split("\n")[-1]).group(1)), *self.progress()))
+        if self.fail_on_call is not None and len(self.prompts) == self.fail_on_call:
+            return GenerationResult(success=False, trace_id="toc", content=None, error_message="boom", usage={"total_tokens": 10})
+        sections = []
+        for line in numbered_corpus.split("\n"):
+            n, text = LINE_RE.match(line).groups()
+            n = int(n)
+            is_content = not text.startswith(("nav", "footer"))
+            last = sections[-1] if sections else None
+            if last and last.end_line == n - 1 and last.is_content == is_content:
+                last.end_line = n
+            else:
+                sections.append(TocSection(
+                    name="content" if is_content else "chrome", category="content" if is_content else "navigation",
+                    start_line=n, end_line=n, is_content=is_content, is_navigation=not is_content,
+                ))
+        return GenerationResult(success=True, trace_id="toc", content=TocOutput(sections=sections), usage={"total_tokens": 10})
+
+    def get_content_toc(self, numbered_corpus, max_line, what_to_retain, model=None):
+        with self._lock:
+            self.prompts.append(numbered_corpus)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self._lock:
+            self.in_flight -= 1
+            return self._toc(numbered_corpus)
+
+    async def get_content_toc_async(self, numbered_corpus, max_line, what_to_retain, model=None):
+        self.prompts.append(numbered_corpus)
+        await asyncio.sleep(0)
+        return self._toc(numbered_corpus)
+
+
+# Test 1: Lazy windows
+def test_lazy_windows():
+    """iter_line_windows matches line_windows + window_ownership"""
+    print_test_header("1. Lazy Windows")
+
+    passed = True
+    for count, size, overlap in ((117, 30, 6), (30, 30, 6), (5, 30, 6), (100, 40, 10)):
+        lines = [str(n) for n in range(1, count + 1)]
+        windows = line_windows(count, size, overlap)
+        owned = window_ownership(windows, list(range(1, count + 1)))
+        expected = [(start + 1, lines[start:end], own) for (start, end), own in zip(windows, owned)]
+        passed &= print_result(list(iter_line_windows(iter(lines), size, overlap)) == expected, f"{count} lines, window {size}, overlap {overlap}")
+    return passed
+
+
+# Test 2: Streamed run matches a windowed run
+def test_streamed_run():
+    """The sink receives the windowed run's content; the op reports the same map"""
+    print_test_header("2. Streamed Run")
+
+    passed = True
+    windowed = FilterHero(llm=StubLLM()).run(DOCUMENT, SPEC, filter_mode="subtractive", window_lines=30, window_overlap=6)
+
+    llm = StubLLM()
+    sink = io.StringIO()
+    op = FilterHero(llm=llm).run_stream(io.StringIO(DOCUMENT), SPEC, sink, window_lines=30, window_overlap=6)
+    passed &= print_result(op.success and sink.getvalue() == windowed.content, "Sink holds the windowed run's content")
+    passed &= print_result(op.deletions_applied == windowed.deletions_applied, "Same deletion ranges")
+    passed &= print_result(
+        (op.original_line_count, op.retained_line_count) == (windowed.original_line_count, windowed.retained_line_count),
+        f"{op.retained_line_count}/{op.original_line_count} lines kept",
+    )
+    passed &= print_result(llm.max_in_flight > 1 and op.usage.get("fanout_calls") == len(llm.prompts), f"{len(llm.prompts)} window calls, {llm.max_in_flight} concurrent")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "page.txt"), os.path.join(tmp, "kept.txt")
+        with open(source, "w", encoding="utf-8") as handle:
+            handle.write(DOCUMENT + "\n")
+        with open(target, "w", encoding="utf-8") as handle:
+            FilterHero(llm=StubLLM()).run_stream(source, SPEC, handle, window_lines=30, window_overlap=6)
+        with open(target, encoding="utf-8") as handle:
+            passed &= print_result(handle.read() == windowed.content, "Path source and file sink")
+
+    chunks = []
+    asyncio.run(FilterHero(llm=StubLLM()).run_stream_async(
+        iter(LINES), SPEC, chunks.append, filter_strategy="relaxed", window_lines=30, window_overlap=6
+    ))
+    passed &= print_result("".join(chunks) == windowed.content, "Async path with an iterator and a callable sink")
+    return passed
+
+
+# Test 3: Bounded memory
+def test_bounded_memory():
+    """Lines are read just ahead of the windows in flight; output flows before the end"""
+    print_test_header("3. Bounded Read-Ahead")
+
+    passed = True
+    read = [0]
+    written = []
+
+    def source():
+        for line in LINES:
+            read[0] += 1
+            yield line
+
+    llm = StubLLM(progress=lambda: (read[0], len(written)))
+    FilterHero(llm=llm).run_stream(source(), SPEC, written.append, window_lines=20, window_overlap=4, max_concurrent_windows=1)
+    ahead = max(lines_read - last_line for last_line, lines_read, _ in llm.snapshots)
+    passed &= print_result(ahead <= 20, f"At most {ahead} lines read past the window being filtered")
+    passed &= print_result(any(n_written and lines_read < len(LINES) for _, lines_read, n_written in llm.snapshots), "Kept lines written before the input is exhausted")
+    return passed
+
+
+# Test 4: Failure
+def test_stream_failure():
+    """A failed window stops the stream and is named in the error"""
+    print_test_header("4. Failed Window")
+
+    passed = True
+    sink = io.StringIO()
+    op = FilterHero(llm=StubLLM(fail_on_call=2)).run_stream(
+        io.StringIO(DOCUMENT), SPEC, sink, window_lines=30, window_overlap=6, max_concurrent_windows=1
+    )
+    passed &= print_result(not op.success and "window 2" in op.error, f"Error: {op.error}")
+    passed &= print_result(sink.getvalue().startswith("Article paragraph 0") and "appendix" not in sink.getvalue(), "Only the first window's lines were written")
+    return passed
+
+
+def main():
+    print("\n" + "="*80)
+    print("SMOKE TEST 26: STREAMING SUBTRACTIVE FILTERING")
+    print("="*80)
+
+    results = []
+    results.append(("Lazy Windows", test_lazy_windows()))
+    results.append(("Streamed Run", test_streamed_run()))
+    results.append(("Bounded Read-Ahead", test_bounded_memory()))
+    results.append(("Failed Window", test_stream_failure()))
+
+    # Summary
+    print("\n" + "="*80)
+    print("SUMMARY")
+    print("="*80)
+
+    passed_count = sum(1 for _, passed in results if passed)
+    total_count = len(results)
+
+    for test_name, passed in results:
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    print(f"\nTotal: {passed_count}/{total_count} tests passed")
+    return passed_count == total_count
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)